@@ -3,9 +3,39 @@ import time
 import json
 import os
 import base64
+import io
 import requests
 import urllib.parse
 import hashlib
+import queue
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None # Icons are then cached as downloaded and scaled by the launcher
+
+# How many requests of each action may run at once, so a slow skin sync can't
+# hold up interactive searches queued behind it.
+ACTION_LIMITS = {
+    "search_mods": 4,
+    "gh_skin_sync": 1,
+    "fetch_thumbnails": 2,
+    "ping": 1,
+}
+
+# Search results are reused for this long; Modrinth's own index refreshes slower than that
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_SIZE = 256
+# Upper bound for the launcher's "pages to prefetch" setting
+PREFETCH_MAX_DEPTH = 3
+
+# Mod icons are stored as THUMBNAIL_SIZE PNGs, downloaded this many at a time
+THUMBNAIL_SIZE = 64
+THUMBNAIL_WORKERS = 6
+ICON_CACHE_MAX_BYTES = 32 * 1024 * 1024
 
 # Global session for connection pooling
 _session = None
@@ -18,6 +48,222 @@ def get_session():
         _session.headers.update({"User-Agent": "NewLauncher-Agent"})
     return _session
 
+def get_base_dir():
+    """Launcher config dir passed as the first argument (None when run standalone)."""
+    return sys.argv[1] if len(sys.argv) > 1 else None
+
+class SearchCache:
+    """
+    LRU cache of search responses with a TTL. Entries are stamped with wall-clock
+    time so they can be persisted and stay valid across agent restarts.
+    """
+    def __init__(self, max_entries=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL, path=None, save_interval=10):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (stored_at, data)
+        self._dirty = False
+        self._last_save = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_key(query, facets, index, limit, offset):
+        query = " ".join((query or "").lower().split())
+        # Facets are ANDed, so their order doesn't change the result
+        facets = sorted(str(f).strip() for f in facets or [])
+        return json.dumps([query, facets, index, int(limit), int(offset)])
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.time(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            now = time.time()
+            for key, stored_at, data in records:
+                if now - stored_at <= self.ttl:
+                    self._entries[key] = (stored_at, data)
+        except Exception:
+            self._entries.clear()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            records = [[k, t, d] for k, (t, d) in self._entries.items() if now - t <= self.ttl]
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            pass
+
+def make_thumbnail(data):
+    """PNG bytes of the image in `data` scaled to THUMBNAIL_SIZE square."""
+    if Image is None:
+        return data
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    if img.size != (THUMBNAIL_SIZE, THUMBNAIL_SIZE):
+        img = img.resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), getattr(Image, "Resampling", Image).LANCZOS)
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+class IconCache:
+    """
+    Mod icons as ready-to-show thumbnails, stored under their URL's sha1 in the
+    agent's base dir. Least recently used files are removed once the folder grows
+    past max_bytes; file mtimes serve as access times, so the order survives restarts.
+    """
+    def __init__(self, root, max_bytes=ICON_CACHE_MAX_BYTES, workers=THUMBNAIL_WORKERS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight = {}  # url -> Event set when its download finishes
+        self._size = None    # bytes on disk, counted on the first write
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AgentIcons")
+
+    @staticmethod
+    def name_for(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".png"
+
+    def path_for(self, url):
+        return os.path.join(self.root, self.name_for(url))
+
+    def get(self, url):
+        """Cached thumbnail path for `url` (marked as used), or None."""
+        path = self.path_for(url)
+        try:
+            os.utime(path)
+            return path
+        except OSError:
+            return None
+
+    def fetch(self, url):
+        """Thumbnail path for `url`, downloading it if needed; None if it can't be loaded."""
+        while True:
+            path = self.get(url)
+            if path:
+                return path
+            with self._lock:
+                event = self._inflight.get(url)
+                owner = event is None
+                if owner:
+                    event = self._inflight[url] = threading.Event()
+            if not owner:
+                event.wait(timeout=20)
+                if self.get(url) is None:
+                    return None # That download failed; don't try again right away
+                continue
+            try:
+                r = get_session().get(url, timeout=10)
+                if r.status_code != 200 or not r.content:
+                    return None
+                thumb = make_thumbnail(r.content)
+                os.makedirs(self.root, exist_ok=True)
+                dest = self.path_for(url)
+                with open(f"{dest}.tmp", "wb") as f:
+                    f.write(thumb)
+                os.replace(f"{dest}.tmp", dest)
+                self._added(len(thumb))
+                return dest
+            except Exception:
+                return None
+            finally:
+                with self._lock:
+                    self._inflight.pop(url, None)
+                event.set()
+
+    def fetch_many(self, urls):
+        """`{url: path or None}` for a batch, downloading the missing ones in parallel."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        return dict(zip(urls, self._pool.map(self.fetch, urls)))
+
+    def warm(self, urls):
+        self.fetch_many(urls)
+
+    def _scan(self):
+        entries = []
+        try:
+            with os.scandir(self.root) as it:
+                for e in it:
+                    if e.is_file() and not e.name.endswith(".tmp"):
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            pass
+        return entries
+
+    def _added(self, n):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += n
+            if self._size <= self.max_bytes:
+                return
+            # Trim to 80% so the folder isn't rescanned on every new icon
+            target = self.max_bytes * 0.8
+            for _, size, path in sorted(self._scan()):
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self._size -= size
+                except OSError:
+                    pass
+
+_search_cache = None
+_icon_cache = None
+
+def get_search_cache():
+    global _search_cache
+    if _search_cache is None:
+        base_dir = get_base_dir()
+        path = os.path.join(base_dir, "search_cache.json") if base_dir else None
+        _search_cache = SearchCache(path=path)
+    return _search_cache
+
+def get_icon_cache():
+    global _icon_cache
+    if _icon_cache is None:
+        _icon_cache = IconCache(os.path.join(get_base_dir() or ".", "icon_cache"))
+    return _icon_cache
+
 def get_file_sha(filepath):
     """Calculate SHA hash for file comparison."""
     if not os.path.exists(filepath):
@@ -139,39 +385,126 @@ def handle_gh_skin_sync(payload):
     except Exception as e:
         return {"status": "error", "msg": str(e)}
 
+class SearchFailed(Exception):
+    def __init__(self, code, msg):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+
+_inflight = {}  # search cache key -> Event set when that page's fetch finishes
+_inflight_lock = threading.Lock()
+
+def build_search_request(payload):
+    """(cache key, URL) for a search payload."""
+    query = payload.get("query")
+    limit = payload.get("limit", 20)
+    offset = payload.get("offset", 0)
+    facets = payload.get("facets", [])
+    index = payload.get("index") or ("relevance" if query else "downloads")
+    cache_key = SearchCache.make_key(query, facets, index, limit, offset)
+    
+    # Build query parameters
+    params = f"limit={limit}&offset={offset}"
+    if query:
+        params += f"&query={urllib.parse.quote(query)}"
+    if index != "relevance":
+        params += f"&index={urllib.parse.quote(index)}"
+
+    if facets:
+         facet_str = ""
+         for f in facets:
+             facet_str += f',["{f}"]'
+         facet_str = facet_str.lstrip(',')
+         enc = urllib.parse.quote(f'[{facet_str}]')
+         params += f'&facets={enc}'
+
+    return cache_key, f"https://api.modrinth.com/v2/search?{params}"
+
+def fetch_search_page(payload):
+    """
+    One page of search results as (data, cache_hit). If the same page is already
+    being fetched (e.g. by a prefetch), waits for that instead of asking twice.
+    """
+    cache = get_search_cache()
+    cache_key, url = build_search_request(payload)
+    while True:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached, True
+        with _inflight_lock:
+            event = _inflight.get(cache_key)
+            owner = event is None
+            if owner:
+                event = _inflight[cache_key] = threading.Event()
+        if not owner:
+            # If that fetch failed the page still isn't cached and the next pass fetches it itself
+            event.wait(timeout=20)
+            continue
+        try:
+            headers = {"User-Agent": "AmneDev/NewLauncher/1.8.2"}
+            response = get_session().get(url, headers=headers, timeout=15)
+            if response.status_code != 200:
+                raise SearchFailed(response.status_code, response.text)
+            data = response.json()
+            cache.put(cache_key, data)
+            return data, False
+        finally:
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+            event.set()
+
+# Set by Dispatcher around each handler call
+_request_context = threading.local()
+
+def current_staleness_check():
+    """Callable telling whether the request running on this thread has been superseded (see Dispatcher)."""
+    return getattr(_request_context, "is_stale", None) or (lambda: False)
+
+def prefetch_next_pages(payload, data, depth, is_stale=lambda: False):
+    """
+    Queue the next `depth` pages (and their icons) so "load more" is answered from
+    the cache. Pages still queued when `is_stale()` turns true are skipped.
+    """
+    limit = int(payload.get("limit", 20))
+    offset = int(payload.get("offset", 0))
+    total = data.get("total_hits")
+    if len(data.get("hits", [])) < limit:
+        return # Last page
+    for k in range(1, min(depth, PREFETCH_MAX_DEPTH) + 1):
+        next_offset = offset + limit * k
+        if total is not None and next_offset >= total:
+            break
+        _prefetch_pool.submit(_prefetch_page, dict(payload, offset=next_offset), is_stale)
+
+def _prefetch_page(payload, is_stale):
+    if is_stale():
+        return # The search was replaced (e.g. the user kept typing)
+    try:
+        page, _ = fetch_search_page(payload)
+        get_icon_cache().warm(hit.get("icon_url") for hit in page.get("hits", []))
+    except Exception:
+        pass # Best effort; the real request will try again
+
+def handle_fetch_thumbnails(payload):
+    """Local thumbnail paths for a batch of icon URLs (`null` for icons that couldn't be loaded)."""
+    try:
+        paths = get_icon_cache().fetch_many(payload.get("urls", []))
+        return {"status": "success", "paths": paths}
+    except Exception as e:
+        return {"status": "error", "msg": str(e)}
+
 def handle_search_mods(payload):
     """Search mods on Modrinth API with proper error handling and timeout."""
     try:
-        query = payload.get("query")
-        limit = payload.get("limit", 20)
-        offset = payload.get("offset", 0)
-        facets = payload.get("facets", [])
-        
-        # Build query parameters
-        params = f"limit={limit}&offset={offset}"
-        if query:
-            params += f"&query={urllib.parse.quote(query)}"
-        else:
-            params += "&index=downloads"
-
-        if facets:
-             facet_str = ""
-             for f in facets:
-                 facet_str += f',["{f}"]'
-             facet_str = facet_str.lstrip(',')
-             enc = urllib.parse.quote(f'[{facet_str}]')
-             params += f'&facets={enc}'
-
-        url = f"https://api.modrinth.com/v2/search?{params}"
-        headers = {"User-Agent": "AmneDev/NewLauncher/1.8.2"}
-        
-        session = get_session()
-        response = session.get(url, headers=headers, timeout=15)
-        if response.status_code == 200:
-            return {"status": "success", "data": response.json()}
-        else:
-            return {"status": "error", "code": response.status_code, "msg": response.text}
+        data, cache_hit = fetch_search_page(payload)
+        depth = int(payload.get("prefetch", 0) or 0)
+        is_stale = current_staleness_check()
+        if depth > 0 and not is_stale():
+            prefetch_next_pages(payload, data, depth, is_stale)
+        return {"status": "success", "data": data, "cache_hit": cache_hit}
             
+    except SearchFailed as e:
+        return {"status": "error", "code": e.code, "msg": e.msg}
     except requests.Timeout:
         return {"status": "error", "msg": "Request timed out"}
     except requests.RequestException as e:
@@ -179,10 +512,132 @@ def handle_search_mods(payload):
     except Exception as e:
         return {"status": "error", "msg": str(e)}
 
+def handle_ping(payload):
+    return {"status": "success", "data": "pong"}
+
+# Prefetches run one at a time, apart from the request workers, so they never delay a real request
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AgentPrefetch")
+
+HANDLERS = {
+    "search_mods": handle_search_mods,
+    "gh_skin_sync": handle_gh_skin_sync,
+    "fetch_thumbnails": handle_fetch_thumbnails,
+    "ping": handle_ping,
+}
+
+class ResponseWriter:
+    """Single thread that owns stdout; responses are written whole, in completion order."""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="AgentWriter", daemon=True)
+        self._thread.start()
+
+    def send(self, req_id, result):
+        self._queue.put({"id": req_id, "result": result})
+
+    def _run(self):
+        while True:
+            response = self._queue.get()
+            if response is None:
+                break
+            try:
+                self.stream.write(json.dumps(response) + "\n")
+                self.stream.flush()
+            except Exception:
+                pass
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+SUPERSEDED = {"status": "cancelled", "msg": "Superseded by a newer request"}
+
+class Dispatcher:
+    """
+    Runs requests on a worker pool, at most ACTION_LIMITS[action] at a time per
+    action. Requests over the limit wait in a per-action queue instead of
+    occupying a worker, so every admitted request starts immediately.
+
+    Requests may name a `channel` and a `generation`: a newer generation on a
+    channel supersedes the older ones. Superseded requests that haven't started
+    are dropped, and the results of running ones are discarded; both are
+    answered with SUPERSEDED so the caller can drop its callback. Handlers can
+    ask `current_staleness_check()` to skip follow-up work such as prefetching.
+    """
+    def __init__(self, writer, handlers=HANDLERS, limits=ACTION_LIMITS):
+        self.writer = writer
+        self.handlers = handlers
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._running = collections.Counter()
+        self._waiting = collections.defaultdict(collections.deque)
+        self._latest = {}  # channel -> newest generation seen
+        self._pool = ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="AgentWorker")
+
+    def _is_stale(self, channel, generation):
+        return channel is not None and generation < self._latest.get(channel, generation)
+
+    def submit(self, req_id, action, payload, channel=None, generation=None):
+        if action not in self.handlers:
+            self.writer.send(req_id, {"status": "error", "msg": "Unknown action"})
+            return
+        dropped = []
+        with self._lock:
+            if channel is not None:
+                if generation is None:
+                    generation = self._latest.get(channel, 0) + 1
+                self._latest[channel] = max(generation, self._latest.get(channel, generation))
+                # Queued requests this one supersedes never need to run
+                for waiting in self._waiting.values():
+                    for item in [i for i in waiting if self._is_stale(i[2], i[3])]:
+                        waiting.remove(item)
+                        dropped.append(item[0])
+            item = (req_id, payload, channel, generation)
+            if self._running[action] >= self.limits.get(action, 1):
+                self._waiting[action].append(item)
+                item = None
+            else:
+                self._running[action] += 1
+        for old_id in dropped:
+            self.writer.send(old_id, SUPERSEDED)
+        if item is not None:
+            self._pool.submit(self._run, action, item)
+
+    def _run(self, action, item):
+        while True:
+            req_id, payload, channel, generation = item
+            if self._is_stale(channel, generation):
+                result = SUPERSEDED
+            else:
+                _request_context.is_stale = lambda c=channel, g=generation: self._is_stale(c, g)
+                try:
+                    result = self.handlers[action](payload)
+                except Exception as e:
+                    result = {"status": "error", "msg": str(e)}
+                finally:
+                    _request_context.is_stale = None
+                if self._is_stale(channel, generation):
+                    # Finished after a newer request on its channel arrived (a search result is still cached)
+                    result = SUPERSEDED
+            self.writer.send(req_id, result)
+            # Hand this worker straight to the next queued request of the same action
+            with self._lock:
+                if not self._waiting[action]:
+                    self._running[action] -= 1
+                    return
+                item = self._waiting[action].popleft()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
 def main():
     print("Agent process started.")
     sys.stdout.flush()
     
+    writer = ResponseWriter()
+    dispatcher = Dispatcher(writer)
+    
     while True:
         try:
             # Blocking read from stdin
@@ -199,31 +654,19 @@ def main():
             except json.JSONDecodeError:
                 continue
             
-            req_id = request.get("id")
-            action = request.get("action")
-            payload = request.get("payload", {})
-            
-            result = None
-            
-            if action == "search_mods":
-                result = handle_search_mods(payload)
-            elif action == "gh_skin_sync":
-                result = handle_gh_skin_sync(payload)
-            elif action == "ping":
-                result = {"status": "success", "data": "pong"}
-
-            else:
-                result = {"status": "error", "msg": "Unknown action"}
-            
-            # Send response
-            response = {"id": req_id, "result": result}
-            print(json.dumps(response))
-            sys.stdout.flush()
+            dispatcher.submit(request.get("id"), request.get("action"), request.get("payload", {}),
+                              request.get("channel"), request.get("generation"))
             
         except KeyboardInterrupt:
             break
         except Exception:
             time.sleep(1)
 
+    # Finish what was already accepted before exiting; pending prefetches aren't worth waiting for
+    _prefetch_pool.shutdown(wait=False, cancel_futures=True)
+    dispatcher.shutdown()
+    writer.close()
+    get_search_cache().save()
+
 if __name__ == "__main__":
     main()
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['requests'],
+    hiddenimports=['requests', 'PIL'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
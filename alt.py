@@ -38,16 +38,33 @@ import socketserver
 import base64
 import uuid
 import urllib.parse
+import argparse
+import shlex
 import ctypes
 from ctypes import wintypes
 
-from config import (COLORS, CURRENT_VERSION, MSA_CLIENT_ID, MSA_REDIRECT_URI, 
+from config import (COLORS, CURRENT_VERSION, MSA_CLIENT_ID, 
                     DEFAULT_RAM, LOADERS, MOD_COMPATIBLE_LOADERS, 
                     DEFAULT_USERNAME, INSTALL_MARK) 
 from utils import (resource_path, get_minecraft_dir, is_version_installed, 
                    RESAMPLE_NEAREST, FLIP_LEFT_RIGHT, AFFINE)
 from handlers import MicrosoftLoginHandler, LocalSkinServer
-from auth import ElyByAuth
+from auth import ElyByAuth, MicrosoftAuth
+from launch_cache import JavaRuntimeIndex, InstalledVersionIndex, LaunchCommandCache
+from game_output import GameOutputPump
+from http_client import get_client
+from downloads import (ParallelDownloader, DownloadEntry, DownloadCancelled, format_rate,
+                       format_eta, resumable_download)
+from object_store import ObjectStore
+from bandwidth import get_limiter
+import mrpack
+from mod_resolver import ModResolver, ResolveError
+from mod_updates import FileHashCache, find_updates
+from mod_index import ModIndex
+from download_manager import (DownloadManager, TaskFailed, PRIORITY_MOD, PRIORITY_PACK,
+                              STATE_DONE, STATE_CANCELLED)
+from launch_pipeline import (LaunchPipeline, LaunchTimer, LaunchHistory,
+                             LAUNCH_PHASES, LAUNCH_MARKS, GAME_OUTPUT_MARKERS)
 
 try:
     from pypresence import Presence # type: ignore
@@ -1079,62 +1096,37 @@ messagebox.showerror = custom_showerror # type: ignore[assignment]
 messagebox.askyesno = custom_askyesno # type: ignore[assignment]
 
 # --- Main App ---
-class DownloadManager:
-    def __init__(self, app):
-        self.app = app
-        self.mod_queue = []     # List of (func, task_id)
-        self.pack_queue = []    # List of (func, task_id)
-        self.active_mods = 0
-        self.active_packs = 0
-        self.MAX_MODS = 3
-        self.MAX_PACKS = 1
-        
-    def queue_mod(self, func, task_id):
-        self.mod_queue.append((func, task_id))
-        self.app.root.after(0, lambda: self.app.update_download_task(task_id, detail="Queued..."))
-        self.process_queues()
-
-    def queue_modpack(self, func, task_id):
-        self.pack_queue.append((func, task_id))
-        self.app.root.after(0, lambda: self.app.update_download_task(task_id, detail="Queued..."))
-        self.process_queues()
-
-    def process_queues(self):
-        max_p = getattr(self.app, 'max_concurrent_packs', 1)
-        max_m = getattr(self.app, 'max_concurrent_mods', 3)
-        
-        # Process Packs
-        while self.active_packs < max_p and self.pack_queue:
-            self.active_packs += 1
-            func, task_id = self.pack_queue.pop(0)
-            self.start_task(func, task_id, is_pack=True)
-            
-        # Process Mods
-        while self.active_mods < max_m and self.mod_queue:
-            self.active_mods += 1
-            func, task_id = self.mod_queue.pop(0)
-            self.start_task(func, task_id, is_pack=False)
-
-    def start_task(self, func, task_id, is_pack):
-        self.app.root.after(0, lambda: self.app.update_download_task(task_id, status="Downloading", detail="Starting..."))
-        
-        def wrapper():
-            try:
-                func() 
-            finally:
-                self.app.root.after(0, lambda: self.task_finished(is_pack))
+def resolve_config_file():
+    """
+    Config Priority:
+    1. Local "launcher_config.json" (Portable / Dev mode)
+    2. AppData/.nlc (Standard Install)
+    Returns (config_file, config_dir).
+    """
+    local_config = "launcher_config.json"
+    
+    if os.path.exists(local_config):
+        config_file = os.path.abspath(local_config)
+        print(f"Using local config: {config_file}")
+        return config_file, os.path.dirname(config_file)
 
-        threading.Thread(target=wrapper, daemon=True).start()
+    app_data = os.getenv('APPDATA')
+    if app_data:
+        config_dir = os.path.join(app_data, ".nlc")
+    else:
+        config_dir = os.path.join(os.path.expanduser("~"), ".nlc")
+        
+    if not os.path.exists(config_dir):
+        os.makedirs(config_dir, exist_ok=True)
+        
+    config_file = os.path.join(config_dir, "launcher_config.json")
+    print(f"Using global config: {config_file}")
+    return config_file, config_dir
 
-    def task_finished(self, is_pack):
-        if is_pack: self.active_packs -= 1
-        else: self.active_mods -= 1
-        self.process_queues()
 
 class MinecraftLauncher:
     def __init__(self, root):
         self.root = root
-        self.download_manager = DownloadManager(self)
         self.root.title("NLC | New launcher")
         
         # Determine config path early for logging
@@ -1245,28 +1237,38 @@ class MinecraftLauncher:
         self.addons_config: dict[str, Any] = {} # Addons configuration
         self.download_queue_visible = False
         
-        # Config Priority: 
-        # 1. Local "launcher_config.json" (Portable / Dev mode)
-        # 2. AppData/.nlc (Standard Install)
-        
-        local_config = "launcher_config.json"
-        
-        if os.path.exists(local_config):
-            self.config_file = os.path.abspath(local_config)
-            self.config_dir = os.path.dirname(self.config_file)
-            print(f"Using local config: {self.config_file}")
-        else:
-            app_data = os.getenv('APPDATA')
-            if app_data:
-                self.config_dir = os.path.join(app_data, ".nlc")
-            else:
-                self.config_dir = os.path.join(os.path.expanduser("~"), ".nlc")
-                
-            if not os.path.exists(self.config_dir):
-                os.makedirs(self.config_dir, exist_ok=True)
-                
-            self.config_file = os.path.join(self.config_dir, "launcher_config.json")
-            print(f"Using global config: {self.config_file}")
+        self.config_file, self.config_dir = resolve_config_file()
+
+        # Launch-path caches (persisted next to the config)
+        self.java_index = JavaRuntimeIndex(os.path.join(self.config_dir, "java_runtimes.json"))
+        self.version_index = InstalledVersionIndex()
+        self.command_cache = LaunchCommandCache(os.path.join(self.config_dir, "launch_commands.json"))
+        self.launch_history = LaunchHistory(os.path.join(self.config_dir, "metrics"))
+        # Pooled per-host HTTP sessions shared by every network call in the launcher
+        self.http = get_client()
+        # One bandwidth budget for all downloads (configured from settings)
+        self.limiter = get_limiter()
+        # sha512-addressed jar cache, hardlinked into modpack folders
+        self.cache_max_mb = 4096
+        self.object_store = ObjectStore(os.path.join(self.config_dir, "cache", "objects"), self.cache_max_mb * 1024 * 1024)
+        # Modrinth project/version lookups, memoized for the session
+        self.mod_resolver = ModResolver(self.http)
+        # Guards pack['mods'] and the projects mod installs are currently downloading per pack
+        self._pack_mods_lock = threading.Lock()
+        self._pack_mod_claims = {}
+        # Jar hashes by (path, size, mtime) for the modpack update check
+        self.file_hashes = FileHashCache(os.path.join(self.config_dir, "cache", "file_hashes.json"))
+        # Name/version/icon read from each mod jar once, for the modpack contents view
+        self.mod_index = ModIndex(os.path.join(self.config_dir, "cache", "mod_index.json"),
+                                  os.path.join(self.config_dir, "cache", "mod_icons"))
+        # Prioritized download worker pool; unfinished tasks are saved and picked up on the next start
+        self.download_manager = DownloadManager(self, queue_file=os.path.join(self.config_dir, "download_queue.json"))
+        self.download_manager.register("modpack", self._run_modpack_install, 'max_concurrent_packs', 1, "modpack",
+                                       on_finish=self._on_modpack_install_finished)
+        self.download_manager.register("mod", self._run_mod_install, 'max_concurrent_mods', 3, "mod",
+                                       on_finish=self._on_mod_install_finished)
+        self.download_manager.register("mod_update", self._run_mod_updates, 'max_concurrent_packs', 1, "modpack",
+                                       on_finish=self._on_mod_updates_finished)
         
         # --- Pre-load Accent Color ---
         self.accent_color_name = "Green"
@@ -1302,6 +1304,7 @@ class MinecraftLauncher:
         self.mod_available_online = False
         self.ram_allocation = DEFAULT_RAM
         self.java_args = ""
+        self.console_max_lines = 5000
         self.loader_var = tk.StringVar(value="Vanilla")
         self.version_var = tk.StringVar()
         self.rpc_enabled = True # Default True
@@ -1319,9 +1322,18 @@ class MinecraftLauncher:
             "p3_reload_menu": False
         }
         
+        # Microsoft session (expiry-aware refresh)
+        self.ms_auth = MicrosoftAuth(MSA_CLIENT_ID, http=self.http)
+        self._ms_refresh_lock = threading.Lock()
+        self._ms_prerefresh_retry_at = 0.0
+        self._launch_active = False
+
         # Agent / Background Process
         self.agent_process = None
         self.agent_callbacks = {}
+        # channel -> newest request generation; replies to older generations are ignored
+        self.agent_generations = {}
+        self.agent_request_channels = {}  # req_id -> (channel, generation)
         self.agent_lock = threading.Lock()
 
         self.start_time = None
@@ -1342,6 +1354,8 @@ class MinecraftLauncher:
         self.setup_window_chrome()
         self.create_layout()
         self.load_from_config()
+        # Re-queue downloads left unfinished by the last session (needs the queue panel)
+        self.root.after(1000, lambda: self.download_manager.restore(self.add_download_task))
         # Refresh UI with loaded data
         self.update_installation_dropdown()
         self.refresh_installations_list()
@@ -1353,6 +1367,9 @@ class MinecraftLauncher:
             
         # Start Background Agent
         self.start_agent_process()
+
+        # Keep Microsoft sessions warm so PLAY doesn't wait on the OAuth chain
+        self.root.after(30000, self._ms_prerefresh_tick)
             
         # Onboarding Trigger
         if self.first_run:
@@ -2727,21 +2744,38 @@ class MinecraftLauncher:
              # Let's keep it simpler: hidden by default.
              pass
 
+        # Percent / speed / ETA, filled in by the progress tick
+        stats_lbl = tk.Label(top, text="", font=("Segoe UI", 7), fg="#aaaaaa", bg=card_bg, anchor="e")
+        stats_lbl.pack(side="right")
+
         # Progress
         pb = ttk.Progressbar(frame, orient="horizontal", mode="determinate", length=100)
         pb.pack(fill="x", pady=3)
         
         self.download_tasks[task_id] = {
+            "border_frame": border_frame,
             "frame": frame,
             "pb": pb,
             "detail_lbl": detail_lbl,
             "detail_frame": detail_frame,
+            "stats_lbl": stats_lbl,
             "type": type_str,
             "cancel_event": threading.Event()
         }
         
-        # Context Menu for Cancellation
-        menu = tk.Menu(frame, tearoff=0, bg="#2b2b2b", fg="white")
+        if getattr(self, '_queue_tick_after_id', None) is None:
+            self._queue_tick_after_id = self.root.after(100, self._tick_download_progress)
+        
+        # Context Menu for Pause / Cancellation
+        def toggle_pause():
+            if self.download_manager.is_paused(task_id):
+                self.download_manager.resume(task_id)
+            else:
+                self.download_manager.pause(task_id)
+
+        menu = tk.Menu(frame, tearoff=0, bg="#2b2b2b", fg="white",
+                       postcommand=lambda: menu.entryconfig(0, label="Resume" if self.download_manager.is_paused(task_id) else "Pause"))
+        menu.add_command(label="Pause", command=toggle_pause)
         menu.add_command(label="Cancel", command=lambda: self.cancel_download(task_id))
         
         def show_menu(e):
@@ -2755,48 +2789,98 @@ class MinecraftLauncher:
         
         return task_id
 
+    def _apply_bandwidth_limit(self):
+        """Push the download speed settings into the process-wide limiter."""
+        if getattr(self, 'limit_download_speed_enabled', False):
+            total_kb = max(0, int(getattr(self, 'max_download_speed', 2048)))
+            host_kb = max(0, int(getattr(self, 'max_download_speed_per_host', 0)))
+        else:
+            total_kb = host_kb = 0
+        self.limiter.configure(total_kb * 1024, host_kb * 1024)
+
+    def _tick_download_progress(self):
+        """
+        Single UI-thread refresh of the download queue (every 100 ms). Workers only
+        write to the download manager's progress board; this applies the rows that
+        changed and shows the aggregate speed in the queue header.
+        """
+        if not self.download_tasks:
+            self._queue_tick_after_id = None
+            self.queue_header.config(text="Downloads")
+            return
+        for task_id, row in self.download_manager.progress.collect().items():
+            parts = []
+            if row['progress'] is not None:
+                parts.append(f"{row['progress']:.0f}%")
+            if row['rate'] > 0:
+                parts.append(format_rate(row['rate']))
+            if row['eta'] is not None:
+                parts.append(format_eta(row['eta']))
+            self.update_download_task(task_id, row['progress'], detail=row['detail'], stats=" · ".join(parts))
+        rate = self.limiter.throughput()
+        header = f"Downloads · {format_rate(rate)}" if rate > 0 else "Downloads"
+        if self.queue_header.cget("text") != header:
+            self.queue_header.config(text=header)
+        self._queue_tick_after_id = self.root.after(100, self._tick_download_progress)
+
     def cancel_download(self, task_id):
         if task_id in self.download_tasks:
             self.download_tasks[task_id]['cancel_event'].set()
             self.update_download_task(task_id, detail="Cancelling...")
+            self.download_manager.cancel(task_id)
 
-    def update_download_task(self, task_id, progress=None, status=None, detail=None):
+    def update_download_task(self, task_id, progress=None, status=None, detail=None, stats=None):
         if task_id not in self.download_tasks: return
         data = self.download_tasks[task_id]
         
-        if progress is not None:
+        if progress is not None and data['pb']['value'] != progress:
             data['pb']['value'] = progress
             
-        if detail is not None:
+        if detail is not None and data['detail_lbl'].cget("text") != detail:
              data['detail_lbl'].config(text=detail)
 
+        if stats is not None and data['stats_lbl'].cget("text") != stats:
+            data['stats_lbl'].config(text=stats)
+
     def complete_download_task(self, task_id):
         if task_id not in self.download_tasks: return
         
+        self.download_manager.progress.discard(task_id)
         data = self.download_tasks[task_id]
         data['pb']['value'] = 100
         data['detail_lbl'].config(text="Completed ✓", fg="#2ecc71")
+        data['stats_lbl'].config(text="")
         
         # Visual feedback - brief green highlight
         if 'border_frame' in data:
             data['border_frame'].config(bg="#2ecc71")
             self.root.after(300, lambda: data['border_frame'].config(bg="#3d3d3d") if task_id in self.download_tasks else None)
         
-        # Fade out or remove
-        def remove():
-            if task_id in self.download_tasks:
-                data = self.download_tasks[task_id]
-                if 'border_frame' in data:
-                    data['border_frame'].destroy()
-                elif 'frame' in data:
-                    data['frame'].destroy()
-                del self.download_tasks[task_id]
-            
-            if not self.download_tasks:
-                 self.queue_container.pack_forget()
-        
         # Wait 2 sec
-        self.root.after(2000, remove)
+        self.root.after(2000, lambda: self.remove_download_task(task_id))
+
+    def fail_download_task(self, task_id, detail="Failed"):
+        if task_id not in self.download_tasks: return
+        self.download_manager.progress.discard(task_id)
+        data = self.download_tasks[task_id]
+        data['detail_lbl'].config(text=detail, fg="#e74c3c")
+        data['stats_lbl'].config(text="")
+        if not data['detail_frame'].winfo_ismapped():
+            data['detail_frame'].pack(fill="x", pady=(2,0))
+        self.root.after(5000, lambda: self.remove_download_task(task_id))
+
+    def remove_download_task(self, task_id):
+        self.download_manager.progress.discard(task_id)
+        if task_id in self.download_tasks:
+            data = self.download_tasks[task_id]
+            if 'border_frame' in data:
+                data['border_frame'].destroy()
+            elif 'frame' in data:
+                data['frame'].destroy()
+            del self.download_tasks[task_id]
+        
+        if not self.download_tasks:
+             self.queue_container.pack_forget()
 
     def apply_accent_color(self, name):
         # Update Data
@@ -2868,6 +2952,12 @@ class MinecraftLauncher:
                                                 font=("Segoe UI", 9), 
                                                 bg=COLORS['bottom_bar_bg'], fg=COLORS['text_secondary'])
             self.update_counter_label.place(relx=0.98, rely=0.75, anchor="e")
+
+            # Per-stage status (launch pipeline)
+            self.update_stages_label = tk.Label(self.update_frame, text="", 
+                                               font=("Segoe UI", 9), 
+                                               bg=COLORS['bottom_bar_bg'], fg=COLORS['text_secondary'])
+            self.update_stages_label.place(relx=0.02, rely=0.75, anchor="w")
             
             # Progress Bar
             self.update_progress_bar = ttk.Progressbar(self.update_frame, orient='horizontal', mode='determinate', 
@@ -2878,6 +2968,7 @@ class MinecraftLauncher:
             self.update_progress_label.config(text=task_name)
             self.update_progress_bar['value'] = 0
             if hasattr(self, 'update_counter_label'): self.update_counter_label.config(text="")
+            if hasattr(self, 'update_stages_label'): self.update_stages_label.config(text="")
 
         # Show Frame
         # Height 100 to match bottom_bar height
@@ -2917,53 +3008,40 @@ class MinecraftLauncher:
             # Determine filename
             filename = "NewLauncher_Update.exe"
             path = os.path.join(updates_dir, filename)
-            part_path = path + ".part"
             
             self.root.after(0, lambda: self.update_progress_label.config(text="Connecting to update server...") if hasattr(self, "update_progress_label") else None)
 
-            # Download with explicit connect/read timeouts and throttled UI updates.
-            with requests.get(url, stream=True, timeout=(8, 25)) as r:
-                r.raise_for_status()
-                total_size = int(r.headers.get('content-length', 0))
-                block_size = 1024 * 64
-                wrote = 0
-                last_ui_tick = 0.0
-
-                with open(part_path, 'wb') as f:
-                    for data in r.iter_content(block_size):
-                        if not data:
-                            continue
-                        wrote += len(data)
-                        f.write(data)
-
-                        # Throttle to avoid flooding Tk event queue, which can look like a freeze.
-                        now = time.monotonic()
-                        if (now - last_ui_tick) >= 0.08:
-                            last_ui_tick = now
-                            if total_size > 0:
-                                self.root.after(0, lambda c=wrote, t=total_size: self.update_download_progress(c, t))
-                            else:
-                                self.root.after(
-                                    0,
-                                    lambda b=wrote: self.update_status_lbl.config(
-                                        text=f"Downloading update... {b // (1024 * 1024)} MB",
-                                        fg=COLORS['accent_blue']
-                                    )
-                                )
-
-                # Final UI update to 100% for known-size downloads.
-                if total_size > 0:
-                    self.root.after(0, lambda c=wrote, t=total_size: self.update_download_progress(c, t))
+            # Resumable download with explicit connect/read timeouts and throttled UI updates.
+            last_ui_tick = 0.0
+
+            def on_progress(delta, wrote, total_size):
+                nonlocal last_ui_tick
+                # Throttle to avoid flooding Tk event queue, which can look like a freeze.
+                now = time.monotonic()
+                if (now - last_ui_tick) >= 0.08 or (total_size and wrote >= total_size):
+                    last_ui_tick = now
+                    if total_size:
+                        self.root.after(0, lambda c=wrote, t=total_size: self.update_download_progress(c, t))
+                    else:
+                        self.root.after(
+                            0,
+                            lambda b=wrote: self.update_status_lbl.config(
+                                text=f"Downloading update... {b // (1024 * 1024)} MB",
+                                fg=COLORS['accent_blue']
+                            )
+                        )
+
+            resumable_download(self.http, url, path, on_progress=on_progress, timeout=(8, 25))
+            wrote = os.path.getsize(path)
 
             if wrote <= 0:
                 raise RuntimeError("Downloaded file is empty.")
 
-            with open(part_path, "rb") as f:
+            with open(path, "rb") as f:
                 mz = f.read(2)
             if mz != b"MZ":
+                os.remove(path)
                 raise RuntimeError("Downloaded update is not a valid Windows executable.")
-
-            os.replace(part_path, path)
             
             # On Finish
             self.root.after(0, self.hide_update_progress)
@@ -2971,12 +3049,8 @@ class MinecraftLauncher:
             self.root.after(0, lambda: self._on_download_complete(path))
             
         except Exception as e:
+            # The .part file is kept so the next attempt resumes instead of starting over
             print(f"Update download failed: {e}")
-            try:
-                if 'part_path' in locals() and os.path.exists(part_path): # type: ignore
-                    os.remove(part_path) # type: ignore
-            except Exception:
-                pass
             self.root.after(0, self.hide_update_progress)
             self.root.after(0, self._reset_update_state)
             self.root.after(0, lambda err=str(e): self.update_status_lbl.config(text=f"Update failed: {err}", fg=COLORS['error_red']))
@@ -3322,7 +3396,7 @@ class MinecraftLauncher:
                         if not wizard.winfo_exists(): return
                         status_lbl.config(text="Requesting device code...")
 
-                        r = requests.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/devicecode",
+                        r = self.http.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/devicecode",
                                           data={"client_id": client_id, "scope": scope})
                         if r.status_code != 200:
                             if wizard.winfo_exists():
@@ -3348,7 +3422,7 @@ class MinecraftLauncher:
 
                         while wizard.winfo_exists():
                             time.sleep(interval)
-                            r_poll = requests.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/token",
+                            r_poll = self.http.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/token",
                                 data={"grant_type": "device_code", "client_id": client_id, "device_code": device_code})
 
                             if r_poll.status_code == 200:
@@ -3373,7 +3447,8 @@ class MinecraftLauncher:
                                     "name": profile["name"], "uuid": profile["id"],
                                     "type": "microsoft", "skin_path": "",
                                     "access_token": mc_auth["access_token"],
-                                    "refresh_token": refresh_token
+                                    "refresh_token": refresh_token,
+                                    "expires_at": time.time() + float(mc_auth.get("expires_in", 86400))
                                 }
                                 if wizard.winfo_exists():
                                     wizard.after(0, save_account_and_continue)
@@ -4806,7 +4881,8 @@ class MinecraftLauncher:
 
     def open_installation_folder(self, idx):
         try:
-            os.startfile(self.minecraft_dir)
+            inst_id = self.installations[idx].get("id") if 0 <= idx < len(self.installations) else None
+            os.startfile(self.get_game_directory(inst_id))
         except Exception:
             pass
 
@@ -5022,7 +5098,7 @@ class MinecraftLauncher:
         
         self._bind_smooth_scroll(canvas, scroll_frame)
 
-    def create_background_resource_pack(self):
+    def create_background_resource_pack(self, game_dir=None):
         """Generates a resource pack that replaces the menu panorama with the current launcher wallpaper"""
         if not self.current_wallpaper or not os.path.exists(self.current_wallpaper):
             return "LauncherTheme" # Return just valid name if creation fails
@@ -5031,7 +5107,7 @@ class MinecraftLauncher:
             self.log("Generating Launcher Theme Resource Pack...")
             
             # Paths
-            rp_dir = os.path.join(self.minecraft_dir, "resourcepacks")
+            rp_dir = os.path.join(game_dir or self.minecraft_dir, "resourcepacks")
             if not os.path.exists(rp_dir): os.makedirs(rp_dir)
             
             pack_name = "LauncherTheme"
@@ -5378,6 +5454,13 @@ class MinecraftLauncher:
         java_entry.insert(0, "<Use Bundled Java Runtime>")
         java_entry.config(state="disabled") # Placeholder for now
 
+        # Game Directory
+        create_label("GAME DIRECTORY").pack(in_=opts_container, fill="x", pady=(15,5))
+        isolated_var = tk.BooleanVar(value=bool(existing_data.get("isolated", False)))
+        tk.Checkbutton(opts_container, text="Use a separate folder for saves, mods and settings", variable=isolated_var,
+                       bg="#1e1e1e", fg="white", selectcolor="#1e1e1e", activebackground="#1e1e1e",
+                       activeforeground="white", anchor="w").pack(fill="x")
+
         # Resolution
         create_label("RESOLUTION").pack(in_=opts_container, fill="x", pady=(15,5))
         res_frame = tk.Frame(opts_container, bg="#1e1e1e")
@@ -5397,9 +5480,10 @@ class MinecraftLauncher:
         # -- Logic --
         self.cached_loader_versions = [] 
 
-        def check_installed(version_id, loader_type):
+        def check_installed(version_id, loader_type, installed_list=None):
             try:
-                installed_list = [v['id'] for v in minecraft_launcher_lib.utils.get_installed_versions(self.minecraft_dir)]
+                if installed_list is None:
+                    installed_list = self.version_index.get_ids(self.minecraft_dir)
                 if loader_type == "Vanilla":
                     return version_id in installed_list
                 elif loader_type == "Fabric":
@@ -5450,14 +5534,14 @@ class MinecraftLauncher:
                 elif loader_type == "Other versions (ie: BatMod, Laby Mod)":
                      # Scan installed versions directory for custom clients
                      try:
-                         installed = minecraft_launcher_lib.utils.get_installed_versions(self.minecraft_dir)
+                         installed = self.version_index.get_versions(self.minecraft_dir)
                          # Get known vanilla versions to filter
                          vanilla_ids = {v['id'] for v in minecraft_launcher_lib.utils.get_version_list()}
                          
                          for inst in installed:
                              vid = inst['id']
                              # Filter out standard loaders and vanilla versions
-                             if "fabric" in vid.lower() or "forge" in vid.lower() or vid in vanilla_ids:
+                             if inst['loader'] in ("fabric", "forge", "neoforge", "quilt") or "fabric" in vid.lower() or "forge" in vid.lower() or vid in vanilla_ids:
                                  continue
                              # Add to list
                              raw_versions.append({'id': vid, 'type': inst['type']})
@@ -5477,11 +5561,12 @@ class MinecraftLauncher:
             loader = loader_var.get()
             show_snaps = self.modal_show_snapshots.get()
             display_values = []
+            installed_list = self.version_index.get_ids(self.minecraft_dir)
             
             for v in self.cached_loader_versions:
                 if v['type'] == 'snapshot' and not show_snaps: continue
                 
-                is_inst = check_installed(v['id'], loader)
+                is_inst = check_installed(v['id'], loader, installed_list)
                 entry = v['id']
                 if not is_inst:
                      if loader == "Other versions (ie: BatMod, Laby Mod)":
@@ -5536,10 +5621,12 @@ class MinecraftLauncher:
              icon_val = current_icon_var.get()
              
              new_profile = {
+                 "id": existing_data.get("id") or str(uuid.uuid4()),
                  "name": name,
                  "version": version_id,
                  "loader": loader,
                  "icon": icon_val,
+                 "isolated": isolated_var.get(),
                  "last_played": existing_data.get("last_played", "Never"),
                  "created": existing_data.get("created", "2024-01-01")
              }
@@ -6533,7 +6620,7 @@ class MinecraftLauncher:
              status.config(text="Contacting Microsoft...")
              
              # Request Device Code
-             r = requests.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/devicecode",
+             r = self.http.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/devicecode",
                                data={"client_id": client_id, "scope": scope})
              
              if r.status_code != 200:
@@ -6558,7 +6645,7 @@ class MinecraftLauncher:
              while win.winfo_exists():
                  time.sleep(interval)
                  
-                 r_poll = requests.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/token",
+                 r_poll = self.http.post("https://login.microsoftonline.com/consumers/oauth2/v2.0/token",
                                        data={"grant_type": "device_code", "client_id": client_id, "device_code": device_code})
                  
                  if r_poll.status_code == 200:
@@ -6620,6 +6707,7 @@ class MinecraftLauncher:
                 "skin_path": "", # Will fetch later
                 "access_token": mc_auth["access_token"],
                 "refresh_token": refresh_token,
+                "expires_at": time.time() + float(mc_auth.get("expires_in", 86400)),
                 "created": datetime.now().strftime("%Y-%m-%d")
             }
             
@@ -6957,10 +7045,68 @@ class MinecraftLauncher:
         
         def refresh_list():
             render_mods()
+            threading.Thread(target=index_in_background, daemon=True).start()
         
+        update_state = {"updates": []}
+
+        def apply_updates():
+            updates, update_state["updates"] = update_state["updates"], []
+            update_btn.config(text="⬆ Check for updates")
+            if not updates:
+                return
+            name = f"Update {pack['name']}"
+            task_id = self.add_download_task(name, "modpack")
+            payload = {"pack_id": pack['id'], "updates": [u.to_record() for u in updates]}
+            self.download_manager.submit("mod_update", name, payload, PRIORITY_MOD, task_id=task_id,
+                                         on_finish=lambda t: self._on_mod_updates_finished(
+                                             t, refresh=lambda: refresh_list() if dialog.winfo_exists() else None))
+
+        def check_updates():
+            if update_state["updates"]:
+                apply_updates()
+                return
+            update_btn.config(state="disabled", text="⏳ Checking...")
+
+            def work():
+                updates, error = [], None
+                try:
+                    jars = [os.path.join(mods_dir, f) for f in os.listdir(mods_dir) if f.endswith(".jar")]
+                    hashes = self.file_hashes.hash_many(jars, workers=min(8, os.cpu_count() or 4))
+                    updates = find_updates(self.http, hashes, pack['loader'], pack['mc_version'])
+                except Exception as e:
+                    error = e
+
+                def done():
+                    if not update_btn.winfo_exists():
+                        return
+                    update_btn.config(state="normal", text="⬆ Check for updates")
+                    if error is not None:
+                        custom_showerror("Error", f"Update check failed: {error}", parent=dialog)
+                        return
+                    if not updates:
+                        custom_showinfo("Up to date", "All mods are up to date.", parent=dialog)
+                        return
+                    update_state["updates"] = updates
+                    update_btn.config(text=f"⬆ Update {len(updates)} mod{'s' if len(updates) != 1 else ''}")
+                    lines = [f"• {u.filename} → {u.version.get('version_number', '?')}" for u in updates[:15]]
+                    if len(updates) > 15:
+                        lines.append(f"... and {len(updates) - 15} more")
+                    if custom_askyesno("Updates Available",
+                                       f"{len(updates)} mod update(s) found:\n\n" + "\n".join(lines) + "\n\nUpdate now?",
+                                       parent=dialog):
+                        apply_updates()
+
+                self.root.after(0, done)
+
+            threading.Thread(target=work, daemon=True).start()
+
         self._make_btn(actions, "📁 Open Folder", style="secondary", font_size=9,
                       command=open_folder).pack(side="left", padx=5)
 
+        update_btn = self._make_btn(actions, "⬆ Check for updates", style="secondary", font_size=9,
+                                    command=check_updates)
+        update_btn.pack(side="left", padx=(0, 5))
+
         self._make_btn(actions, "🔄 Refresh", style="secondary", font_size=9,
                       command=refresh_list).pack(side="left")
         
@@ -7134,7 +7280,9 @@ class MinecraftLauncher:
             "cols": 1,
             "batch_size": 24,
             "grid_wrap": None,
-            "is_loading": False
+            "is_loading": False,
+            "cards": {},   # filename -> widgets to fill in once the jar is indexed
+            "icons": {}    # icon file -> PhotoImage (kept referenced for Tk)
         }
 
         def compute_grid_columns():
@@ -7195,9 +7343,13 @@ class MinecraftLauncher:
                 files = sorted([f for f in os.listdir(mods_dir) if f.endswith(".jar")], key=str.lower)
                 search_term = search_var.get().lower()
                 
-                # Filter by search
+                # Filter by search (file name, or mod name/id once indexed)
                 if search_term:
-                    files = [f for f in files if search_term in f.lower()]
+                    def matches(f):
+                        meta = self.mod_index.get(os.path.join(mods_dir, f)) or {}
+                        return any(search_term in str(v).lower() for v in (f, meta.get('name') or "", meta.get('id') or ""))
+                    files = [f for f in files if matches(f)]
+                lazy_state["cards"] = {}
 
                 lazy_state["files"] = files
                 lazy_state["loaded_count"] = 0
@@ -7262,6 +7414,8 @@ class MinecraftLauncher:
             icon = tk.Label(left, text=initial, font=("Segoe UI", 14, "bold"),
                            bg=icon_color, fg="white", width=2, height=1)
             icon.pack(anchor="w")
+            name_lbl = None
+            size_lbl = None
             
             # Info
             info = tk.Frame(left, bg=COLORS['card_bg'])
@@ -7269,9 +7423,10 @@ class MinecraftLauncher:
             
             # Filename (remove .jar extension for cleaner display)
             display_name = filename[:-4] if filename.endswith('.jar') else filename
-            tk.Label(info, text=display_name, font=("Segoe UI", 11, "bold"),
+            name_lbl = tk.Label(info, text=display_name, font=("Segoe UI", 11, "bold"),
                     bg=COLORS['card_bg'], fg=COLORS['text_primary'], anchor="w",
-                    wraplength=190, justify="left").pack(fill="x")
+                    wraplength=190, justify="left")
+            name_lbl.pack(fill="x")
             
             # File size
             try:
@@ -7284,11 +7439,18 @@ class MinecraftLauncher:
                 else:
                     size_str = f"{size_bytes / (1024 * 1024):.1f} MB"
                 
-                tk.Label(info, text=f"📊 {size_str}", font=("Segoe UI", 9),
+                size_lbl = tk.Label(info, text=f"📊 {size_str}", font=("Segoe UI", 9),
                         bg=COLORS['card_bg'], fg=COLORS['text_secondary'], 
-                        anchor="w").pack(fill="x", pady=(4, 0))
+                        anchor="w")
+                size_lbl.pack(fill="x", pady=(4, 0))
             except:
-                pass
+                size_str = ""
+
+            widgets = {"icon": icon, "name": name_lbl, "size": size_lbl, "size_text": size_str}
+            lazy_state["cards"][filename] = widgets
+            meta = self.mod_index.get(os.path.join(mods_dir, filename))
+            if meta:
+                apply_card_meta(widgets, meta)
             
             # Right side - Actions
             actions = tk.Frame(card, bg=COLORS['card_bg'])
@@ -7351,8 +7513,42 @@ class MinecraftLauncher:
             card.bind("<Enter>", on_enter_card)
             card.bind("<Leave>", on_leave_card)
         
-        # Initial render
-        render_mods()
+        def apply_card_meta(widgets, meta):
+            """Show the indexed mod name, version and icon on an already built card."""
+            if meta.get('name') and widgets["name"] is not None:
+                widgets["name"].config(text=meta['name'])
+            if meta.get('version') and widgets["size"] is not None:
+                widgets["size"].config(text=f"📊 {widgets['size_text']} · {meta['version']}")
+            icon_file = meta.get('icon')
+            if icon_file:
+                photo = lazy_state["icons"].get(icon_file)
+                if photo is None:
+                    try:
+                        img = Image.open(icon_file).resize((28, 28), Image.Resampling.LANCZOS)
+                        photo = lazy_state["icons"][icon_file] = ImageTk.PhotoImage(img)
+                    except Exception:
+                        return
+                widgets["icon"].config(image=photo, text="", width=28, height=28, bg=COLORS['card_bg'])
+
+        def on_indexed(batch):
+            """UI thread: fill in cards for a batch of jars the background indexer just read."""
+            if not dialog.winfo_exists():
+                return
+            for path in batch:
+                widgets = lazy_state["cards"].get(os.path.basename(path))
+                if not widgets or not widgets["icon"].winfo_exists():
+                    continue
+                meta = self.mod_index.get(path)
+                if meta:
+                    apply_card_meta(widgets, meta)
+
+        def index_in_background():
+            jars = [os.path.join(mods_dir, f) for f in os.listdir(mods_dir) if f.endswith(".jar")]
+            self.mod_index.forget_missing()
+            self.mod_index.index_many(jars, on_batch=lambda b: self.root.after(0, lambda: on_indexed(b)))
+
+        # Initial render; names/icons of jars that aren't indexed yet fill in as batches finish
+        refresh_list()
         
         # Bind search to debounced re-render
         search_state = {"after_id": None}
@@ -7804,7 +8000,9 @@ class MinecraftLauncher:
         frame.bind("<Enter>", lambda e: self._bind_smooth_scroll(self.mods_canvas, self.mods_scrollable_frame))
 
         self.mod_search_timer = None
-        self.cached_mod_images = {}
+        self.cached_mod_images = {} # url -> PhotoImage, least recently used first
+        self.mod_image_cache_size = 200
+        self.pending_mod_icons = {} # url -> labels waiting for that icon
         
         # Pagination State
         self.mod_offset = 0
@@ -7831,7 +8029,8 @@ class MinecraftLauncher:
     def schedule_mod_search(self, *args):
         if self.mod_search_timer:
             self.root.after_cancel(self.mod_search_timer)
-        self.mod_search_timer = self.root.after(800, lambda: self.search_mods_thread(reset=True))
+        # Short debounce: older searches still in flight are superseded, not answered
+        self.mod_search_timer = self.root.after(200, lambda: self.search_mods_thread(reset=True))
 
     def load_more_mods(self):
         if self.mod_loading or self.mod_end_reached: return
@@ -7889,9 +8088,13 @@ class MinecraftLauncher:
             payload["facets"].append(f'categories:{loader}')
         if version_facet:
             payload["facets"].append(f'versions:{version_facet}')
+
+        # Let the agent fetch the next pages while this one is being read, unless bandwidth is capped
+        payload["prefetch"] = 0 if self.limiter.limited else getattr(self, 'mod_prefetch_depth', 1)
             
         # Use Agent
-        self.send_agent_request("search_mods", payload, lambda res: self._on_mod_search_result(res, reset))
+        self.send_agent_request("search_mods", payload, lambda res: self._on_mod_search_result(res, reset),
+                                channel="mod_search")
 
     def _on_mod_search_result(self, result, reset):
         if not result or result.get("status") != "success":
@@ -8002,266 +8205,395 @@ class MinecraftLauncher:
         # Update button state
         btn_widget.config(state="disabled", text="Queued...", bg=COLORS['text_secondary'])
         
-        # Add to Queue
-        task_id = self.add_download_task(mod_data.get('title', 'Mod'), "mod")
+        # Add to Queue (payload is kept small and JSON-safe so the queue can be persisted)
+        title = mod_data.get('title', 'Mod')
+        task_id = self.add_download_task(title, "mod")
+        payload = {"mod_data": {"slug": mod_data['slug'], "title": title}, "pack_id": pack['id']}
+        self.download_manager.submit("mod", title, payload, PRIORITY_MOD, task_id=task_id,
+                                     on_finish=lambda t: self._on_mod_install_finished(t, btn_widget))
+
+    def _run_mod_install(self, task):
+        """
+        Download-manager handler: install the newest compatible version of a mod
+        and its required dependencies (those not already in the pack) into a pack.
+        """
+        task_id = task.id
+        mod_data = task.payload['mod_data']
+        pack = next((p for p in self.modpacks if p['id'] == task.payload.get('pack_id')), None)
+        if not pack:
+            raise TaskFailed("The target modpack no longer exists.")
+
+        mod_id = mod_data['slug'] # or project_id or slug from search hit
         
-        def run_install():
-            self.root.after(0, lambda: btn_widget.config(text="Installing..."))
-            success = False
+        self.download_manager.progress.update(task_id, 0, detail="Resolving dependencies...")
+        installed = self._installed_in_pack(pack)
+        try:
+            closure = self.mod_resolver.resolve(mod_id, pack['loader'], pack['mc_version'], installed)
+        except ResolveError as e:
+            raise TaskFailed(str(e))
+
+        # Another install into this pack may have picked the same dependencies meanwhile; it downloads those
+        with self._pack_mods_lock:
+            claims = self._pack_mod_claims.setdefault(pack['id'], set())
+            recorded = {m.get('project_id') for m in pack['mods']}
+            closure = closure[:1] + [m for m in closure[1:] if m.project_id not in claims | recorded]
+            mine = {m.project_id for m in closure} - claims
+            claims |= mine
+        try:
+            self._download_mod_closure(task, pack, closure)
+        finally:
+            with self._pack_mods_lock:
+                self._pack_mod_claims.get(pack['id'], set()).difference_update(mine)
+
+    def _installed_in_pack(self, pack):
+        """
+        Project ids/slugs already in a pack: its recorded mods plus the jars in its
+        mods folder (packs imported from an .mrpack ship mods that aren't recorded).
+        """
+        with self._pack_mods_lock:
+            installed = {m.get('slug') for m in pack['mods']} | {m.get('project_id') for m in pack['mods']}
+        mods_dir = os.path.join(self.get_modpack_dir(pack['id']), "mods")
+        jars = [os.path.join(mods_dir, f) for f in os.listdir(mods_dir)
+                if f.endswith(".jar")] if os.path.isdir(mods_dir) else []
+        if jars:
+            hashes = self.file_hashes.hash_many(jars)
             try:
-                mod_id = mod_data['slug'] # or project_id or slug from search hit
-                
-                self.root.after(0, lambda: self.update_download_task(task_id, 0, detail="Fetching versions..."))
-                
-                # version request
-                v_url = f"https://api.modrinth.com/v2/project/{mod_id}/version?loaders=[%22{pack['loader']}%22]&game_versions=[%22{pack['mc_version']}%22]"
-                r = requests.get(v_url, timeout=10)
-                if r.status_code != 200:
-                    raise Exception(f"Failed to fetch versions: {r.status_code}")
-                
-                versions = r.json()
-                if not versions:
-                    raise Exception("No compatible version found for this modpack.")
-                
-                # Pick first (newest)
-                best_ver = versions[0]
-                files = best_ver.get('files', [])
-                if not files:
-                    raise Exception("No files in version.")
-                    
-                primary_file = next((f for f in files if f.get('primary', False)), files[0])
-                download_url = primary_file['url']
-                filename = primary_file['filename']
-                size = primary_file.get('size', 0)
-                
-                # Download
-                target_dir = os.path.join(self.get_modpack_dir(pack['id']), "mods")
-                if not os.path.exists(target_dir): os.makedirs(target_dir)
-                
-                target_path = os.path.join(target_dir, filename)
-                
-                self.root.after(0, lambda: self.update_download_task(task_id, 0, detail=f"Downloading {filename}..."))
-                
-                with requests.get(download_url, stream=True) as d_r:
-                    d_r.raise_for_status()
-                    total_downloaded = 0
-                    with open(target_path, 'wb') as f:
-                        for chunk in d_r.iter_content(chunk_size=8192):
-                            # Check Cancel
-                            if task_id in self.download_tasks and self.download_tasks[task_id]['cancel_event'].is_set():
-                                raise Exception("Cancelled by user")
-                                
-                            f.write(chunk)
-                            total_downloaded += len(chunk)
-                            
-                            # Speed Limit
-                            if getattr(self, 'limit_download_speed_enabled', False):
-                                limit_kb = getattr(self, 'max_download_speed', 2048)
-                                if limit_kb > 0:
-                                    try: time.sleep(len(chunk) / (limit_kb * 1024))
-                                    except: pass
-
-                            if size > 0:
-                                prog = (total_downloaded / size) * 100
-                                # Throttle UI updates? 100 updates per mod is fine.
-                                self.root.after(0, lambda p=prog: self.update_download_task(task_id, p))
-                            
-                success = True
-                
-                # Update Pack Meta
-                # Store full info to detect duplicates
-                meta = {
-                    "slug": mod_id,
-                    "filename": filename,
-                    "version_id": best_ver['id']
-                }
-                
-                # Remove old entry if same slug exists (updating?)
-                # For now just append, user can manage files manually if needed
-                pack['mods'].append(meta) 
-                
-                self.save_modpacks()
-                
+                installed |= self.mod_resolver.projects_for_hashes([h["sha512"] for h in hashes.values()])
             except Exception as e:
-                err_msg = str(e)
-                self.root.after(0, lambda m=err_msg: messagebox.showerror("Error", m))
-            
-            # Post-Op UI Update
-            def finish():
-                self.complete_download_task(task_id)
-                if success:
+                self.log(f"Could not identify installed mods on Modrinth: {e}")
+            # Jars Modrinth doesn't know still count by their mod id (usually the project slug)
+            self.mod_index.index_many(jars)
+            installed |= {(self.mod_index.get(j) or {}).get("id") for j in jars}
+        installed.discard(None)
+        return installed
+
+    def _download_mod_closure(self, task, pack, closure):
+        task_id = task.id
+        target_dir = os.path.join(self.get_modpack_dir(pack['id']), "mods")
+        if not os.path.exists(target_dir): os.makedirs(target_dir)
+
+        entries = []
+        metas = []
+        for mod in closure:
+            primary_file = mod.primary_file()
+            if not primary_file:
+                raise TaskFailed(f"No files in version of '{mod.title}'.")
+            filename = os.path.basename(primary_file['filename'])
+            entries.append(DownloadEntry([primary_file['url']], os.path.join(target_dir, filename),
+                                         hashes=primary_file.get('hashes'), size=primary_file.get('size'),
+                                         name=filename))
+            # Store full info to detect duplicates
+            metas.append({
+                "slug": mod.slug,
+                "project_id": mod.project_id,
+                "filename": filename,
+                "version_id": mod.version['id']
+            })
+
+        def on_progress(state):
+            total = state["files_total"]
+            detail = f"{state['files_done']}/{total} files" if total > 1 else f"Downloading {entries[0].name}..."
+            self.download_manager.progress.update(task_id, detail=detail,
+                                                  done=state['bytes_done'], total=state['bytes_total'])
+
+        # Download the whole closure in parallel (cached jars are linked in from the object store)
+        downloader = ParallelDownloader(self.http, workers=getattr(self, 'max_concurrent_mods', 3),
+                                        cancel_event=task.interrupt, on_progress=on_progress,
+                                        store=self.object_store)
+        downloader.run(entries)
+        self.object_store.evict()
+
+        if len(closure) > 1:
+            deps = ", ".join(m.title for m in closure[1:])
+            self.log(f"Installed {closure[0].title} with {len(closure) - 1} dependencies: {deps}")
+        
+        # Update Pack Meta; a project recorded by a concurrent install isn't added twice
+        with self._pack_mods_lock:
+            recorded = {m.get('project_id') for m in pack['mods']}
+            pack['mods'].extend(m for m in metas if m['project_id'] not in recorded)
+            self.save_modpacks()
+
+    def _on_mod_install_finished(self, task, btn_widget=None):
+        def finish():
+            btn_alive = btn_widget is not None and btn_widget.winfo_exists()
+            if task.state == STATE_DONE:
+                self.complete_download_task(task.id)
+                if btn_alive:
                     btn_widget.destroy() # Remove install button (or replace with checkmark)
-                    pass 
-                else:
-                    btn_widget.config(state="normal", text="Install", bg=COLORS['play_btn_green'])
-            
-            self.root.after(0, finish)
+                return
+            if task.state == STATE_CANCELLED:
+                self.remove_download_task(task.id)
+            else:
+                self.fail_download_task(task.id, "Error")
+                messagebox.showerror("Error", str(task.error))
+            if btn_alive:
+                btn_widget.config(state="normal", text="Install", bg=COLORS['play_btn_green'])
+        
+        self.root.after(0, finish)
+
+    def _run_mod_updates(self, task):
+        """Download-manager handler: replace outdated jars in a pack with the versions found by the update check."""
+        task_id = task.id
+        pack = next((p for p in self.modpacks if p['id'] == task.payload.get('pack_id')), None)
+        if not pack:
+            raise TaskFailed("The target modpack no longer exists.")
+        mods_dir = os.path.join(self.get_modpack_dir(pack['id']), "mods")
+        updates = task.payload['updates']
+
+        entries = [DownloadEntry([u['url']], os.path.join(mods_dir, os.path.basename(u['filename'])),
+                                 hashes=u.get('hashes'), size=u.get('size'), name=u['filename'])
+                   for u in updates]
+
+        def on_progress(state):
+            total = state["files_total"]
+            self.download_manager.progress.update(task_id, detail=f"{state['files_done']}/{total} files",
+                                                  done=state['bytes_done'], total=state['bytes_total'])
+
+        downloader = ParallelDownloader(self.http, workers=getattr(self, 'max_concurrent_mods', 3),
+                                        cancel_event=task.interrupt, on_progress=on_progress,
+                                        store=self.object_store)
+        downloader.run(entries)
+
+        # Every new jar is in place: drop the old files and point the pack metadata at the new versions
+        for u in updates:
+            old_name = os.path.basename(u['old_filename'])
+            new_name = os.path.basename(u['filename'])
+            if old_name != new_name:
+                try: os.remove(os.path.join(mods_dir, old_name))
+                except FileNotFoundError: pass
+            meta = next((m for m in pack['mods'] if m.get('filename') == old_name), None)
+            if meta:
+                meta.update({"filename": new_name, "version_id": u['version_id']})
+                if u.get('project_id'):
+                    meta['project_id'] = u['project_id']
+        self.save_modpacks()
+        self.object_store.evict()
+        self.log(f"Updated {len(updates)} mods in {pack['name']}")
+
+    def _on_mod_updates_finished(self, task, refresh=None):
+        def finish():
+            if task.state == STATE_DONE:
+                self.complete_download_task(task.id)
+                if refresh:
+                    refresh()
+            elif task.state == STATE_CANCELLED:
+                self.remove_download_task(task.id)
+            else:
+                self.fail_download_task(task.id, "Error")
+                messagebox.showerror("Error", f"Failed to update mods: {task.error}")
         
-        self.download_manager.queue_mod(run_install, task_id)
+        self.root.after(0, finish)
 
     def _install_mr_modpack(self, mod_data, btn_widget):
         btn_widget.config(state="disabled", text="Queued...")
         task_id = self.add_download_task(mod_data['title'], "modpack")
+        # The pack id is part of the saved task, so a retried or resumed install reuses the files it already fetched
+        payload = {"mod_data": {"slug": mod_data['slug'], "title": mod_data['title']}, "pack_id": str(uuid.uuid4())}
+        self.download_manager.submit("modpack", mod_data['title'], payload, PRIORITY_PACK, task_id=task_id,
+                                     on_finish=lambda t: self._on_modpack_install_finished(t, btn_widget))
+
+    def _run_modpack_install(self, task):
+        """Download-manager handler: download a Modrinth .mrpack and install its mods as a new pack."""
+        task_id = task.id
+        mod_data = task.payload['mod_data']
+        mod_id = mod_data['slug']
+        
+        self.download_manager.progress.update(task_id, 0, detail="Fetching info...")
+        
+        v_url = f"https://api.modrinth.com/v2/project/{mod_id}/version"
+        r = self.http.get(v_url, timeout=10)
+        if r.status_code != 200:
+            raise Exception(f"Failed to fetch versions: {r.status_code}")
+        versions = r.json()
+        if not versions:
+            raise TaskFailed("No versions found")
+            
+        best = versions[0]
+        
+        files = best.get('files', [])
+        mrpack_file = next((f for f in files if f['filename'].endswith('.mrpack')), None)
+        
+        if not mrpack_file:
+            # Some packs might not distribute mrpack on all versions?
+            raise TaskFailed("No .mrpack file found in latest version")
+            
+        # Create Pack Entry
+        pack_name = mod_data['title']
+        mc_ver = best['game_versions'][0]
+        loader = best['loaders'][0]
+        
+        new_id = task.payload.get("pack_id") or str(uuid.uuid4())
+        new_pack = {
+            "id": new_id,
+            "name": pack_name,
+            "loader": loader,
+            "mc_version": mc_ver,
+            "mods": [],
+            "linked_installation_id": None
+        }
         
-        def run():
-             self.root.after(0, lambda: btn_widget.config(text="Installing..."))
-             self._install_mr_modpack_thread(mod_data, btn_widget, task_id)
-             
-        self.download_manager.queue_modpack(run, task_id)
+        # Download .mrpack
+        self.download_manager.progress.update(task_id, 5, detail="Downloading mrpack...")
+        # Kept in the download cache so an interrupted download resumes on the next attempt
+        mr_path = os.path.join(self.config_dir, "cache", "downloads", f"{best['id']}.mrpack")
+        def on_archive_progress(delta, have, total):
+            prog = 5 + (have / total * 5) if total else 5
+            self.download_manager.progress.update(task_id, prog, done=have, total=total)
+
+        resumable_download(self.http, mrpack_file['url'], mr_path,
+                           size=mrpack_file.get('size'), hashes=mrpack_file.get('hashes'),
+                           should_cancel=task.should_stop, on_progress=on_archive_progress)
+                
+        if task.should_stop(): raise DownloadCancelled("Cancelled")
 
-    def _install_mr_modpack_thread(self, mod_data, btn_widget, task_id):
+        # Read index.json straight from the archive
+        self.download_manager.progress.update(task_id, 10, detail="Reading index...")
         try:
-             mod_id = mod_data['slug']
-             
-             self.root.after(0, lambda: self.update_download_task(task_id, 0, detail="Fetching info..."))
-             
-             v_url = f"https://api.modrinth.com/v2/project/{mod_id}/version"
-             r = requests.get(v_url, headers={"User-Agent": "AmneDev/NewLauncher"}, timeout=10)
-             versions = r.json()
-             if not versions:
-                 raise Exception("No versions found")
-                 
-             best = versions[0]
-             
-             files = best.get('files', [])
-             mrpack_file = next((f for f in files if f['filename'].endswith('.mrpack')), None)
-             
-             if not mrpack_file:
-                 # Some packs might not distribute mrpack on all versions?
-                 raise Exception("No .mrpack file found in latest version")
-                 
-             # Create Pack Entry
-             pack_name = mod_data['title']
-             mc_ver = best['game_versions'][0]
-             loader = best['loaders'][0]
-             
-             new_id = str(uuid.uuid4())
-             new_pack = {
-                 "id": new_id,
-                 "name": pack_name,
-                 "loader": loader,
-                 "mc_version": mc_ver,
-                 "mods": [],
-                 "linked_installation_id": None
-             }
-             
-             # Download .mrpack to temp
-             self.root.after(0, lambda: self.update_download_task(task_id, 5, detail="Downloading mrpack..."))
-             import tempfile
-             with tempfile.TemporaryDirectory() as temp_dir:
-                 mr_path = os.path.join(temp_dir, "pack.mrpack")
-                 with requests.get(mrpack_file['url'], stream=True) as d_r:
-                     d_r.raise_for_status()
-                     with open(mr_path, 'wb') as f:
-                         for chunk in d_r.iter_content(chunk_size=8192):
-                             if task_id in self.download_tasks and self.download_tasks[task_id]['cancel_event'].is_set():
-                                 raise Exception("Cancelled")
-                             f.write(chunk)
-                         
-                 # Extract
-                 if task_id in self.download_tasks and self.download_tasks[task_id]['cancel_event'].is_set(): raise Exception("Cancelled")
-
-                 self.root.after(0, lambda: self.update_download_task(task_id, 10, detail="Extracting..."))
-                 with zipfile.ZipFile(mr_path, 'r') as zf:
-                     zf.extractall(temp_dir)
-                     
-                 # Read index.json
-                 index_path = os.path.join(temp_dir, "modrinth.index.json")
-                 if not os.path.exists(index_path):
-                     raise Exception("Invalid mrpack: No index.json")
-                     
-                 with open(index_path, 'r') as f:
-                     idx = json.load(f)
-                     
-                 # Download mods
-                 target_dir = os.path.join(self.get_modpack_dir(new_id), "mods")
-                 if not os.path.exists(target_dir): os.makedirs(target_dir)
-                 
-                 files_list = idx.get('files', [])
-                 total_files = len(files_list)
-                 completed_files = 0
-                 
-                 for file_def in files_list:
-                     if task_id in self.download_tasks and self.download_tasks[task_id]['cancel_event'].is_set():
-                         raise Exception("Cancelled")
+            idx = mrpack.read_index(mr_path)
+        except mrpack.InvalidPack as e:
+            raise TaskFailed(str(e))
+            
+        target_dir = os.path.join(self.get_modpack_dir(new_id), "mods")
+        if not os.path.exists(target_dir): os.makedirs(target_dir)
+        
+        pack_dir = os.path.abspath(self.get_modpack_dir(new_id))
+        entries = []
+        for file_def in idx.get('files', []):
+            f_path = file_def['path']
+            if file_def.get('env', {}).get('client') == "unsupported":
+                continue
+            dest = mrpack.safe_target(pack_dir, f_path) # e.g. pack/mods/fabric-api.jar
+            if dest is None:
+                raise TaskFailed(f"Invalid mrpack: unsafe path {f_path}")
+            entries.append(DownloadEntry(file_def.get('downloads', []), dest,
+                                         hashes=file_def.get('hashes'), size=file_def.get('fileSize')))
+
+        def on_progress(state):
+            total = state["files_total"]
+            prog = 10 + (state["files_done"] / total * 85) if total else 95
+            detail = f"{state['files_done']}/{total} files"
+            self.download_manager.progress.update(task_id, prog, detail=detail,
+                                                  done=state['bytes_done'], total=state['bytes_total'])
+
+        # Stream overrides/ and client-overrides/ into the pack while the mods download.
+        # Overrides for a path the index also downloads are written afterwards so they still win.
+        downloaded = {e.dest for e in entries}
+        stop_overrides = threading.Event()
+        overrides = {"files": 0, "bytes": 0, "error": None}
+
+        def write_overrides():
+            try:
+                overrides["files"], overrides["bytes"] = mrpack.extract_overrides(
+                    mr_path, pack_dir, skip=downloaded,
+                    should_cancel=lambda: stop_overrides.is_set() or task.should_stop())
+            except BaseException as e:
+                overrides["error"] = e
+
+        overrides_thread = threading.Thread(target=write_overrides, name="MrpackOverrides", daemon=True)
+        overrides_thread.start()
+
+        # Download mods (verified against the index hashes, mirrors tried in order)
+        net_before = self.http.stats()
+        downloader = ParallelDownloader(self.http, workers=getattr(self, 'max_concurrent_mods', 3),
+                                        cancel_event=task.interrupt, on_progress=on_progress,
+                                        store=self.object_store)
+        try:
+            downloader.run(entries)
+        except BaseException:
+            stop_overrides.set()
+            raise
+        finally:
+            overrides_thread.join()
+        self.object_store.evict()
+
+        if isinstance(overrides["error"], mrpack.InvalidPack):
+            raise TaskFailed(str(overrides["error"]))
+        if overrides["error"] is not None:
+            raise overrides["error"]
+        self.download_manager.progress.update(task_id, 97, detail="Applying overrides...")
+        late_files, late_bytes = mrpack.extract_overrides(mr_path, pack_dir, only=downloaded,
+                                                          should_cancel=task.should_stop)
+        
+        net_after = self.http.stats()
+        sent = net_after["requests"] - net_before["requests"]
+        opened = net_after["connections"] - net_before["connections"]
+        elapsed = max(time.monotonic() - downloader.started, 0.001)
+        self.log(f"Modpack files: {downloader.files_done} files ({downloader.files_skipped} already present, "
+                 f"{downloader.files_cached} from cache), "
+                 f"{downloader.bytes_done / (1024 * 1024):.1f} MB in {elapsed:.1f}s, "
+                 f"{sent} requests over {opened} new connections; "
+                 f"{overrides['files'] + late_files} override files "
+                 f"({(overrides['bytes'] + late_bytes) / (1024 * 1024):.1f} MB)")
+        
+        # Add to modpacks list
+        self.modpacks.append(new_pack)
+        self.save_modpacks()
+        try: os.remove(mr_path)
+        except OSError: pass
 
-                     d_url = file_def['downloads'][0]
-                     f_path = file_def['path'] 
-                     f_name = os.path.basename(f_path)
-                     
-                     # Allow subdirectories 
-                     # Modrinth packs put mods in 'mods/...' usually.
-                     # We flatten? No, keep it in mods dir.
-                     # If path starts with 'mods/', it goes to target_dir.
-                     # If path is 'config/', we ignore for now as requested (simple implementation)
-                     if f_path.startswith("mods/"):
-                         dest = os.path.join(self.get_modpack_dir(new_id), f_path) # e.g. pack/mods/fabric-api.jar
-                         # Ensure dir exists
-                         os.makedirs(os.path.dirname(dest), exist_ok=True)
-                         
-                         self.root.after(0, lambda n=f_name: self.update_download_task(task_id, detail=f"Downloading {n}"))
-                         
-                         with requests.get(d_url, stream=True) as mf:
-                             mf.raise_for_status()
-                             with open(dest, 'wb') as out:
-                                 for chunk in mf.iter_content(chunk_size=8192):
-                                     if task_id in self.download_tasks and self.download_tasks[task_id]['cancel_event'].is_set():
-                                         raise Exception("Cancelled")
-                                     out.write(chunk)
-                                 
-                     completed_files += 1
-                     if total_files > 0:
-                         prog = 10 + (completed_files / total_files * 85)
-                         self.root.after(0, lambda p=prog: self.update_download_task(task_id, p))
-                                 
-                     # To support config overrides, we would need to copy from extracted 'overrides' folder too.
-                 
-                 # Add to modpacks list
-                 self.root.after(0, lambda: self.complete_download_task(task_id))
-                 
-                 self.modpacks.append(new_pack)
-                 self.save_modpacks()
-                 
-             self.root.after(0, lambda: [
-                 self.refresh_modpacks_list(),
-                 self.update_active_modpack_dropdown(),
-                 messagebox.showinfo("Success", f"Installed modpack '{pack_name}'"),
-                 btn_widget.destroy()
-             ])
-             
-        except Exception as e:
-            print(f"Modpack install error: {e}")
-            err_msg = f"Failed to install pack: {e}"
-            self.root.after(0, lambda m=err_msg: [
-                self.update_download_task(task_id, detail="Error"),
-                messagebox.showerror("Error", m),
+    def _on_modpack_install_finished(self, task, btn_widget=None):
+        def finish():
+            btn_alive = btn_widget is not None and btn_widget.winfo_exists()
+            if task.state == STATE_DONE:
+                self.complete_download_task(task.id)
+                self.refresh_modpacks_list()
+                self.update_active_modpack_dropdown()
+                messagebox.showinfo("Success", f"Installed modpack '{task.name}'")
+                if btn_alive:
+                    btn_widget.destroy()
+                return
+            if task.state == STATE_CANCELLED:
+                self.remove_download_task(task.id)
+            else:
+                print(f"Modpack install error: {task.error}")
+                self.fail_download_task(task.id, "Error")
+                messagebox.showerror("Error", f"Failed to install pack: {task.error}")
+            if btn_alive:
                 btn_widget.config(state="normal", text="Download")
-            ])
+        
+        self.root.after(0, finish)
 
     def _load_mod_icon_async(self, url, label):
-        if url in self.cached_mod_images:
-            label.config(image=self.cached_mod_images[url], text="", width=64, height=64)
+        """Show a mod icon. Icons of the cards built in one pass are fetched by the agent in one request."""
+        photo = self.cached_mod_images.pop(url, None)
+        if photo is not None:
+            self.cached_mod_images[url] = photo
+            label.image = photo
+            label.config(image=photo, text="", width=64, height=64)
             return
 
-        def fetch():
+        if not self.pending_mod_icons:
+            self.root.after_idle(self._request_mod_icons)
+        self.pending_mod_icons.setdefault(url, []).append(label)
+
+    def _request_mod_icons(self):
+        pending, self.pending_mod_icons = self.pending_mod_icons, {}
+        if pending:
+            self.send_agent_request("fetch_thumbnails", {"urls": list(pending)},
+                                    lambda res: self._on_mod_icons_fetched(res, pending))
+
+    def _on_mod_icons_fetched(self, result, pending):
+        # The agent returns small local PNGs, so this only decodes files from disk
+        if not result or result.get("status") != "success":
+            return # Cards keep their placeholder
+        for url, path in result.get("paths", {}).items():
+            labels = [l for l in pending.get(url, []) if l.winfo_exists()]
+            if not path or not labels:
+                continue
             try:
-                r = requests.get(url, timeout=5)
-                if r.status_code == 200:
-                    data = r.content
-                    img = Image.open(io.BytesIO(data))
+                with Image.open(path) as img:
+                    img = img.convert("RGBA")
+                if img.size != (64, 64): # Agent running without Pillow stores icons unscaled
                     img = img.resize((64, 64), Image.Resampling.LANCZOS)
-                    photo = ImageTk.PhotoImage(img)
-                    
-                    def update_ui():
-                        if label.winfo_exists():
-                            self.cached_mod_images[url] = photo 
-                            label.config(image=photo, text="", width=64, height=64)
-                            # label.image = photo # tk bug prevention # already doing it via dict? No need to set attr if we have dict ref
-                    
-                    self.root.after(0, update_ui)
-            except: pass
-        
-        threading.Thread(target=fetch, daemon=True).start()
+                photo = ImageTk.PhotoImage(img)
+            except Exception:
+                continue
+            self.cached_mod_images[url] = photo
+            for label in labels:
+                label.image = photo # Keeps it alive after it leaves cached_mod_images
+                label.config(image=photo, text="", width=64, height=64)
+        while len(self.cached_mod_images) > self.mod_image_cache_size:
+            self.cached_mod_images.pop(next(iter(self.cached_mod_images)))
 
     def create_settings_tab(self):
         container = tk.Frame(self.tab_container, bg=COLORS['main_bg'])
@@ -8466,6 +8798,7 @@ class MinecraftLauncher:
              try:
                  self.max_concurrent_packs = int(self.limit_packs_var.get())
                  self.max_concurrent_mods = int(self.limit_mods_var.get())
+                 self.download_manager.limits_changed()
                  self.save_config(sync_ui=False)
              except: pass
 
@@ -8483,24 +8816,86 @@ class MinecraftLauncher:
 
         # Download Speed
         speed_frame = tk.Frame(main_container, bg=COLORS['main_bg'])
-        speed_frame.pack(fill="x", pady=15)
+        speed_frame.pack(fill="x", pady=(15, 2))
         
         self.limit_speed_enc_var = tk.BooleanVar(value=getattr(self, 'limit_download_speed_enabled', False))
-        tk.Checkbutton(speed_frame, text="Limit Download Speed", variable=self.limit_speed_enc_var,
+        tk.Checkbutton(speed_frame, text="Limit Mod & Modpack Download Speed", variable=self.limit_speed_enc_var,
                       bg=COLORS['main_bg'], fg=COLORS['text_primary'], selectcolor=COLORS['main_bg'], activebackground=COLORS['main_bg'],
-                      command=lambda: [setattr(self, 'limit_download_speed_enabled', self.limit_speed_enc_var.get()), self.save_config(sync_ui=False)]).pack(side="left")
+                      command=lambda: [setattr(self, 'limit_download_speed_enabled', self.limit_speed_enc_var.get()), self._apply_bandwidth_limit(), self.save_config(sync_ui=False)]).pack(side="left")
         
         self.limit_speed_val_var = tk.StringVar(value=str(getattr(self, 'max_download_speed', 2048)))
+        self.limit_host_speed_var = tk.StringVar(value=str(getattr(self, 'max_download_speed_per_host', 0)))
         
         def update_speed(*args):
              try:
                  self.max_download_speed = int(self.limit_speed_val_var.get())
+                 self.max_download_speed_per_host = int(self.limit_host_speed_var.get() or 0)
+                 self._apply_bandwidth_limit()
                  self.save_config(sync_ui=False)
              except: pass
         self.limit_speed_val_var.trace_add("write", update_speed)
+        self.limit_host_speed_var.trace_add("write", update_speed)
 
         tk.Entry(speed_frame, textvariable=self.limit_speed_val_var, width=8, bg=COLORS['input_bg'], fg="white", relief="flat").pack(side="left", padx=(10, 5))
-        tk.Label(speed_frame, text="KB/s", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        tk.Label(speed_frame, text="KB/s total", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        tk.Entry(speed_frame, textvariable=self.limit_host_speed_var, width=8, bg=COLORS['input_bg'], fg="white", relief="flat").pack(side="left", padx=(15, 5))
+        tk.Label(speed_frame, text="KB/s per server (0 = no cap)", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        # Game files are fetched by minecraft_launcher_lib and icons/skins by the agent; neither goes through the limiter
+        tk.Label(main_container, text="Applies to modpack and mod downloads, launcher updates and authlib-injector. "
+                                      "Game files, assets, mod icons and skins are not limited.",
+                 bg=COLORS['main_bg'], fg=COLORS['text_secondary'], font=("Segoe UI", 8),
+                 wraplength=520, justify="left").pack(anchor="w", pady=(0, 15))
+
+        # Search prefetch
+        prefetch_frame = tk.Frame(main_container, bg=COLORS['main_bg'])
+        prefetch_frame.pack(fill="x", pady=(0, 15))
+
+        self.prefetch_depth_var = tk.StringVar(value=str(getattr(self, 'mod_prefetch_depth', 1)))
+        def update_prefetch(*args):
+             try:
+                 self.mod_prefetch_depth = max(0, min(3, int(self.prefetch_depth_var.get())))
+                 self.save_config(sync_ui=False)
+             except: pass
+        self.prefetch_depth_var.trace_add("write", update_prefetch)
+
+        tk.Label(prefetch_frame, text="Search prefetch:", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        tk.Entry(prefetch_frame, textvariable=self.prefetch_depth_var, width=5, bg=COLORS['input_bg'], fg="white", relief="flat").pack(side="left", padx=(5, 5))
+        tk.Label(prefetch_frame, text="pages ahead, 0-3 (off while a speed limit is set)", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+
+        # Download Cache
+        tk.Label(main_container, text="Download Cache", font=("Segoe UI", 10, "bold"), 
+                bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(anchor="w", pady=(0, 5))
+
+        cache_frame = tk.Frame(main_container, bg=COLORS['main_bg'])
+        cache_frame.pack(fill="x", pady=5)
+
+        self.cache_max_var = tk.StringVar(value=str(getattr(self, 'cache_max_mb', 4096)))
+        def update_cache_limit(*args):
+             try:
+                 self.cache_max_mb = max(0, int(self.cache_max_var.get()))
+                 self.object_store.max_bytes = self.cache_max_mb * 1024 * 1024
+                 self.save_config(sync_ui=False)
+             except: pass
+        self.cache_max_var.trace_add("write", update_cache_limit)
+
+        tk.Label(cache_frame, text="Size limit:", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        tk.Entry(cache_frame, textvariable=self.cache_max_var, width=8, bg=COLORS['input_bg'], fg="white", relief="flat").pack(side="left", padx=(5, 5))
+        tk.Label(cache_frame, text="MB", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+
+        def clear_unused_cache():
+            removed, freed = self.object_store.evict(0)
+            self.log(f"Download cache: removed {removed} unused files ({freed / (1024 * 1024):.1f} MB)")
+            self.refresh_cache_stats()
+
+        self._make_btn(cache_frame, "Clear unused", style="secondary", font_size=9,
+                      command=clear_unused_cache).pack(side="left", padx=(15, 5))
+        self._make_btn(cache_frame, "Refresh", style="secondary", font_size=9,
+                      command=self.refresh_cache_stats).pack(side="left")
+
+        self.cache_stats_label = tk.Label(main_container, text="", font=("Segoe UI", 9), justify="left",
+                                          bg=COLORS['main_bg'], fg=COLORS['text_secondary'])
+        self.cache_stats_label.pack(anchor="w", pady=(0, 10))
+        self.refresh_cache_stats()
 
         # Discord RPC
         lbl_discord = tk.Label(main_container, text="DISCORD INTEGRATION", font=("Segoe UI", 14, "bold"),
@@ -8590,6 +8985,40 @@ class MinecraftLauncher:
                                                  fg=COLORS['text_secondary'], font=("Consolas", 9), relief="flat")
         self.log_area.pack(fill="both", expand=True)
 
+        console_frame = tk.Frame(main_container, bg=COLORS['main_bg'])
+        console_frame.pack(fill="x", pady=(5, 0))
+        tk.Label(console_frame, text="Max console lines:", bg=COLORS['main_bg'], fg=COLORS['text_secondary']).pack(side="left")
+        self.console_max_lines_var = tk.StringVar(value=str(getattr(self, 'console_max_lines', 5000)))
+
+        def commit_console_lines(*args):
+             # Applied when editing is done, not per keystroke ("" or "1" while typing aren't real values)
+             try:
+                 value = max(100, int(self.console_max_lines_var.get()))
+             except ValueError:
+                 value = self.console_max_lines
+             self.console_max_lines_var.set(str(value))
+             if value != self.console_max_lines:
+                 self.console_max_lines = value
+                 self.save_config(sync_ui=False)
+        console_entry = tk.Entry(console_frame, textvariable=self.console_max_lines_var, width=8, bg=COLORS['input_bg'], fg="white", relief="flat")
+        console_entry.pack(side="left", padx=(10, 5))
+        console_entry.bind("<FocusOut>", commit_console_lines)
+        console_entry.bind("<Return>", commit_console_lines)
+
+        # --- LAUNCH PERFORMANCE ---
+        lbl_perf = tk.Label(main_container, text="LAUNCH PERFORMANCE", font=("Segoe UI", 14, "bold"),
+                bg=COLORS['main_bg'], fg=COLORS['text_primary'])
+        lbl_perf.pack(anchor="w", pady=(30, 15))
+
+        self.launch_metrics_text = tk.Text(main_container, height=14, bg=COLORS['input_bg'],
+                                           fg=COLORS['text_secondary'], font=("Consolas", 9), relief="flat",
+                                           wrap="none", state="disabled")
+        self.launch_metrics_text.pack(fill="x")
+
+        self._make_btn(main_container, "Refresh", style="secondary", font_size=9,
+                      command=self.refresh_launch_metrics_view).pack(anchor="w", pady=(5, 0))
+        self.refresh_launch_metrics_view()
+
         # --- UPDATES ---
         lbl_updates = tk.Label(main_container, text="UPDATES", font=("Segoe UI", 14, "bold"),
                 bg=COLORS['main_bg'], fg=COLORS['text_primary'])
@@ -8633,6 +9062,7 @@ class MinecraftLauncher:
         create_nav_btn("Account", lbl_acct)
         create_nav_btn("Appearance", lbl_appear)
         create_nav_btn("Logs", lbl_logs)
+        create_nav_btn("Performance", lbl_perf)
         create_nav_btn("Updates", lbl_updates)
         create_nav_btn("Reset", lbl_danger)
 
@@ -8897,6 +9327,9 @@ How to use:
                     
                     if req_id in self.agent_callbacks:
                         callback = self.agent_callbacks.pop(req_id)
+                        channel, generation = self.agent_request_channels.pop(req_id, (None, None))
+                        if channel is not None and generation != self.agent_generations.get(channel):
+                            continue # Superseded by a newer request on the same channel
                         # Run callback on main thread
                         self.root.after(0, lambda c=callback, d=data.get("result"): c(d))
                         
@@ -8911,7 +9344,12 @@ How to use:
     def _on_agent_exit(self):
         self.agent_process = None
 
-    def send_agent_request(self, action, payload, callback=None):
+    def send_agent_request(self, action, payload, callback=None, channel=None):
+        """
+        Send a request to the agent. With a `channel`, this request supersedes any
+        earlier one on the same channel: the agent drops or discards the older
+        request and its reply (if any) never reaches its callback.
+        """
         if not self.agent_process or self.agent_process.poll() is not None:
             # Try to auto-start
             self.start_agent_process()
@@ -8929,12 +9367,20 @@ How to use:
             
         try:
             with self.agent_lock:
+                # Generations are numbered under the write lock so they reach the agent in order
+                if channel is not None:
+                    generation = self.agent_generations.get(channel, 0) + 1
+                    self.agent_generations[channel] = generation
+                    self.agent_request_channels[req_id] = (channel, generation)
+                    request["channel"] = channel
+                    request["generation"] = generation
                 if self.agent_process.stdin:
                     self.agent_process.stdin.write(json.dumps(request) + "\n")
                     self.agent_process.stdin.flush()
         except Exception as e:
             if req_id in self.agent_callbacks:
                  del self.agent_callbacks[req_id]
+            self.agent_request_channels.pop(req_id, None)
             if callback:
                  callback({"status": "error", "msg": str(e)})
 
@@ -8960,7 +9406,7 @@ How to use:
     def _update_check_thread(self):
         try:
             url = "https://api.github.com/repos/Amne-Dev/New-launcher/releases/latest"
-            response = requests.get(url, timeout=5)
+            response = self.http.get(url, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 latest_tag = data.get("tag_name", "").lstrip("v")
@@ -9318,6 +9764,7 @@ How to use:
                 # Strip [GAME] prefix for UI if needed, but keeping it is good for context
                 line = f"[{timestamp}] {message}"
                 self.log_area.insert(tk.END, line + "\n")
+                self._trim_log_area()
                 self.log_area.see(tk.END)
         except:
             pass
@@ -9325,6 +9772,68 @@ How to use:
         # Write to log file via logging module
         logging.info(message)
 
+    def _trim_log_area(self):
+        """Keep the console widget at most `console_max_lines` lines long."""
+        limit = max(100, int(getattr(self, 'console_max_lines', 5000)))
+        line_count = int(self.log_area.index("end-1c").split(".")[0])
+        if line_count > limit:
+            self.log_area.delete("1.0", f"{line_count - limit + 1}.0")
+
+    def _append_game_output(self, lines, dropped=0):
+        """Batched sink for GameOutputPump: one insert per frame instead of one per line."""
+        try:
+            if not (hasattr(self, 'log_area') and self.log_area.winfo_exists()):
+                return
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            chunk = []
+            if dropped:
+                chunk.append(f"[{timestamp}] [GAME] ... {dropped} lines skipped (see log file) ...")
+            chunk.extend(f"[{timestamp}] [GAME] {l}" for l in lines)
+            self.log_area.insert(tk.END, "\n".join(chunk) + "\n")
+            self._trim_log_area()
+            self.log_area.see(tk.END)
+        except Exception:
+            pass
+
+    def refresh_cache_stats(self):
+        """Settings readout for the shared download cache."""
+        if not (hasattr(self, 'cache_stats_label') and self.cache_stats_label.winfo_exists()):
+            return
+        st = self.object_store.stats()
+        mb = 1024 * 1024
+        self.cache_stats_label.config(text=(
+            f"{st['objects']} files, {st['bytes'] / mb:.1f} of {st['max_bytes'] / mb:.0f} MB "
+            f"({st['referenced']} used by modpacks, {st['unreferenced_bytes'] / mb:.1f} MB unused)\n"
+            f"This session: {st['hits']} hits, {st['misses']} misses, {st['bytes_saved'] / mb:.1f} MB not downloaded"
+        ))
+
+    def refresh_launch_metrics_view(self, count=10):
+        """Settings view: last N launches plus p50/p95 per phase over those launches."""
+        if not (hasattr(self, 'launch_metrics_text') and self.launch_metrics_text.winfo_exists()):
+            return
+        records = self.launch_history.load_recent(count)
+        lines = []
+        if not records:
+            lines.append("No launches recorded yet.")
+        else:
+            lines.append(f"{'Phase':<22}{'p50':>10}{'p95':>10}   (last {len(records)} launches)")
+            summary = LaunchHistory.summarize(records)
+            for key, label in LAUNCH_PHASES + LAUNCH_MARKS:
+                if key in summary:
+                    p50, p95, _n = summary[key]
+                    lines.append(f"{label:<22}{p50 * 1000:>8.0f}ms{p95 * 1000:>8.0f}ms")
+            lines.append("")
+            for rec in records:
+                menu = rec.get("marks", {}).get("main_menu")
+                menu_txt = f"menu {menu:.1f}s" if menu is not None else ("failed" if not rec.get("success") else "menu n/a")
+                prep = rec.get("phases", {}).get("prepare", 0.0)
+                lines.append(f"{rec.get('started_at', '?')[:19]:<20} {rec.get('installation') or rec.get('version', ''):<22.22} "
+                             f"prep {prep:.2f}s  {menu_txt}")
+        self.launch_metrics_text.config(state="normal")
+        self.launch_metrics_text.delete("1.0", tk.END)
+        self.launch_metrics_text.insert(tk.END, "\n".join(lines))
+        self.launch_metrics_text.config(state="disabled")
+
     def set_status(self, text, color=None):
         self.status_label.config(text=text, fg=color if color else COLORS['text_secondary'])
 
@@ -9474,9 +9983,16 @@ How to use:
                     # Downloads & Features
                     self.max_concurrent_packs = data.get("max_concurrent_packs", 1)
                     self.max_concurrent_mods = data.get("max_concurrent_mods", 3)
+                    if hasattr(self, 'download_manager'):
+                        self.download_manager.limits_changed()
                     self.limit_download_speed_enabled = data.get("limit_download_speed_enabled", False)
                     self.max_download_speed = data.get("max_download_speed", 2048) # KB/s
+                    self.max_download_speed_per_host = data.get("max_download_speed_per_host", 0) # KB/s, 0 = no cap
+                    self.mod_prefetch_depth = data.get("mod_prefetch_depth", 1)
+                    self._apply_bandwidth_limit()
                     self.enable_modrinth = data.get("enable_modrinth", False)
+                    self.cache_max_mb = data.get("cache_max_mb", 4096)
+                    self.object_store.max_bytes = self.cache_max_mb * 1024 * 1024
                     
                     if hasattr(self, 'enable_modrinth_var'): self.enable_modrinth_var.set(self.enable_modrinth)
                     
@@ -9507,6 +10023,9 @@ How to use:
                     self.close_launcher = data.get("close_launcher", True)
                     self.minimize_to_tray = data.get("minimize_to_tray", False)
                     self.show_console = data.get("show_console", False)
+                    self.console_max_lines = data.get("console_max_lines", 5000)
+                    if hasattr(self, 'console_max_lines_var'):
+                        self.console_max_lines_var.set(str(self.console_max_lines))
                     
                     if self.rpc_enabled:
                         self.root.after(1000, self.connect_rpc)
@@ -9627,10 +10146,14 @@ How to use:
             "max_concurrent_mods": getattr(self, 'max_concurrent_mods', 3),
             "limit_download_speed_enabled": getattr(self, 'limit_download_speed_enabled', False),
             "max_download_speed": getattr(self, 'max_download_speed', 2048),
+            "max_download_speed_per_host": getattr(self, 'max_download_speed_per_host', 0),
+            "mod_prefetch_depth": getattr(self, 'mod_prefetch_depth', 1),
+            "cache_max_mb": getattr(self, 'cache_max_mb', 4096),
             "enable_modrinth": getattr(self, 'enable_modrinth', True),
             "close_launcher": close_launcher_val,
             "minimize_to_tray": minimize_to_tray_val,
             "show_console": show_console_val,
+            "console_max_lines": getattr(self, 'console_max_lines', 5000),
             "current_wallpaper": getattr(self, 'current_wallpaper', None),
             "addons": getattr(self, "addons_config", {})
         }
@@ -9821,7 +10344,7 @@ How to use:
                  "file": ("skin.png", open(path, "rb"), "image/png")
              }
              
-             r = requests.post(url, headers=headers, files=files)
+             r = self.http.post(url, headers=headers, files=files)
              
              self.log(f"DEBUG: Response Status: {r.status_code}")
              self.log(f"DEBUG: Response Headers: {r.headers}")
@@ -9959,7 +10482,7 @@ How to use:
 
             headers = {"Authorization": f"Bearer {token}"}
             # Silent check
-            r = requests.get("https://api.minecraftservices.com/minecraft/profile", headers=headers, timeout=5)
+            r = self.http.get("https://api.minecraftservices.com/minecraft/profile", headers=headers, timeout=5)
             if r.status_code == 200:
                 data = r.json()
                 skins = data.get("skins", [])
@@ -9981,7 +10504,7 @@ How to use:
         try:
             headers = {"Authorization": f"Bearer {token}"}
             # Fetch Profile
-            r = requests.get("https://api.minecraftservices.com/minecraft/profile", headers=headers, timeout=10)
+            r = self.http.get("https://api.minecraftservices.com/minecraft/profile", headers=headers, timeout=10)
             if r.status_code == 200:
                 data = r.json()
                 skins = data.get("skins", [])
@@ -10001,7 +10524,7 @@ How to use:
                         os.makedirs(os.path.dirname(target_path))
                         
                     print(f"Downloading MS skin from {skin_url}")
-                    r_img = requests.get(skin_url, timeout=10)
+                    r_img = self.http.get(skin_url, timeout=10)
                     if r_img.status_code == 200:
                         with open(target_path, "wb") as f:
                             f.write(r_img.content)
@@ -10025,7 +10548,7 @@ How to use:
                 try:
                     # Ely.by Session Server endpoint
                     session_url = f"https://authserver.ely.by/api/authlib-injector/sessionserver/session/minecraft/profile/{uuid_}?unsigned=false"
-                    r_sess = requests.get(session_url, timeout=5)
+                    r_sess = self.http.get(session_url, timeout=5)
                     if r_sess.status_code == 200:
                         session_profile = r_sess.json()
                         props = session_profile.get("properties", [])
@@ -10037,7 +10560,7 @@ How to use:
             if not props:
                  print(f"[DEBUG] Session server produced no props, trying skinsystem/textures/{username}")
                  try:
-                     r_tex = requests.get(f"http://skinsystem.ely.by/textures/{username}", timeout=5)
+                     r_tex = self.http.get(f"http://skinsystem.ely.by/textures/{username}", timeout=5)
                      if r_tex.status_code == 200:
                          tex_data_direct = r_tex.json()
                          if "SKIN" in tex_data_direct and "url" in tex_data_direct["SKIN"]:
@@ -10068,7 +10591,7 @@ How to use:
              
         try:
             print(f"[DEBUG] Fetching skin from {skin_url}")
-            r_skin = requests.get(skin_url, timeout=5)
+            r_skin = self.http.get(skin_url, timeout=5)
             if r_skin.status_code == 200:
                 with open(target_path, "wb") as f:
                     f.write(r_skin.content)
@@ -10169,21 +10692,67 @@ How to use:
         api_url = f"https://api.github.com/repos/{repo}/releases/latest"
         try:
             self.log("Checking for authlib-injector...")
-            r = requests.get(api_url, timeout=10)
+            r = self.http.get(api_url, timeout=10)
             if r.status_code == 200:
                 release = r.json()
                 for asset in release.get("assets", []):
                     if asset["name"].endswith(".jar"):
                         self.log(f"Downloading authlib-injector: {asset['name']}...")
-                        r_file = requests.get(asset["browser_download_url"], stream=True)
-                        with open(jar_path, "wb") as f:
-                            for chunk in r_file.iter_content(8192): f.write(chunk)
+                        self._run_launch_download(lambda: resumable_download(
+                            self.http, asset["browser_download_url"], jar_path, size=asset.get("size") or None))
                         return jar_path
         except Exception as e:
             self.log(f"Error downloading authlib-injector: {e}")
             
         return None
 
+    def _refresh_ms_profile(self, profile, force=False):
+        """
+        Make sure a Microsoft profile holds a usable Minecraft token.
+        Skips the network entirely while the stored token is still valid.
+        """
+        with self._ms_refresh_lock:
+            if not force and MicrosoftAuth.is_token_valid(profile):
+                mins = int((float(profile["expires_at"]) - time.time()) // 60)
+                self.log(f"Microsoft session still valid for {profile.get('name')} ({mins} min left)")
+                return False
+
+            new_data = self.ms_auth.refresh(profile.get("refresh_token"))
+            if "error" in new_data:
+                raise Exception(f"Session Expired: {new_data.get('error')}")
+
+            profile["access_token"] = new_data["access_token"]
+            profile["refresh_token"] = new_data["refresh_token"]
+            profile["name"] = new_data["name"]
+            profile["uuid"] = new_data["id"]
+            profile["expires_at"] = new_data["expires_at"]
+            if self.root is not None:
+                self.root.after(0, lambda: self.save_config(sync_ui=False))
+            else:
+                self.save_config(sync_ui=False)
+            self.log(f"Session refreshed for {new_data['name']}")
+            return True
+
+    def _ms_prerefresh_tick(self):
+        """Idle-time check: refresh the active Microsoft session shortly before it expires."""
+        try:
+            if (not self._launch_active and not self._ms_refresh_lock.locked()
+                    and time.time() >= self._ms_prerefresh_retry_at
+                    and self.profiles and 0 <= self.current_profile_index < len(self.profiles)):
+                profile = self.profiles[self.current_profile_index]
+                if (profile.get("type") == "microsoft" and profile.get("refresh_token")
+                        and MicrosoftAuth.needs_prerefresh(profile)):
+                    def worker():
+                        try:
+                            self._refresh_ms_profile(profile, force=True)
+                        except Exception as e:
+                            # Offline or revoked: back off, PLAY will surface the real error
+                            self._ms_prerefresh_retry_at = time.time() + 600
+                            self.log(f"Background session refresh failed: {e}")
+                    threading.Thread(target=worker, daemon=True).start()
+        finally:
+            self.root.after(60000, self._ms_prerefresh_tick)
+
     def get_installations(self):
         # Return dict {id: inst}
         d = {}
@@ -10192,6 +10761,337 @@ How to use:
                 d[inst["id"]] = inst
         return d
 
+    def get_game_directory(self, inst_id):
+        """
+        Game directory (saves, mods, config, resourcepacks) for an installation.
+        Linked modpacks and isolated installations get their own folder, while
+        assets, libraries and versions stay shared in minecraft_dir.
+        """
+        if inst_id:
+            pack = next((p for p in self.modpacks if p.get('linked_installation_id') == inst_id), None)
+            if pack:
+                return self.get_modpack_dir(pack['id'])
+            inst = self.get_installations().get(inst_id)
+            if inst and inst.get("isolated"):
+                path = os.path.join(self.config_dir, "instances", inst_id)
+                os.makedirs(path, exist_ok=True)
+                return path
+        return self.minecraft_dir
+
+    def _seed_game_directory(self, game_dir):
+        """Carry over options/servers from the main .minecraft into a fresh game directory."""
+        if os.path.abspath(game_dir) == os.path.abspath(self.minecraft_dir):
+            return
+        for name in ("options.txt", "servers.dat"):
+            src = os.path.join(self.minecraft_dir, name)
+            dst = os.path.join(game_dir, name)
+            if os.path.exists(src) and not os.path.exists(dst):
+                try:
+                    shutil.copy2(src, dst)
+                except Exception as e:
+                    self.log(f"Could not copy {name} into game directory: {e}")
+
+    def _recover_mods_swap(self):
+        """
+        One-time migration: undo a mods-folder swap left behind by older versions
+        that crashed mid-launch. Only folders named like the old launcher's
+        backups (mods_backup_<unix time>) are considered. The live folder is moved
+        aside to mods_recovered_<time>, never deleted.
+        """
+        marker = os.path.join(self.config_dir, "mods_swap_recovered")
+        if os.path.exists(marker):
+            return
+        backups = []
+        for path in glob.glob(os.path.join(self.minecraft_dir, "mods_backup_*")):
+            stamp = os.path.basename(path)[len("mods_backup_"):]
+            if stamp.isdigit() and os.path.isdir(path):
+                backups.append((int(stamp), path))
+        try:
+            if backups:
+                # After repeated crashes the oldest backup is the one holding the user's own mods;
+                # newer ones are copies of a pack and are left in place
+                backups.sort()
+                oldest = backups[0][1]
+                current_mods = os.path.join(self.minecraft_dir, "mods")
+                if os.path.exists(current_mods):
+                    aside = os.path.join(self.minecraft_dir, f"mods_recovered_{int(time.time())}")
+                    os.rename(current_mods, aside)
+                    self.log(f"Moved current mods folder to {os.path.basename(aside)}")
+                os.rename(oldest, current_mods)
+                self.log(f"Restored mods folder from leftover backup: {os.path.basename(oldest)}")
+                for _, path in backups[1:]:
+                    self.log(f"Left newer mods swap folder untouched (copy of a pack): {os.path.basename(path)}")
+            with open(marker, "w", encoding="utf-8") as f:
+                f.write(str(int(time.time())))
+        except Exception as e:
+            self.log(f"Error restoring leftover mods backup: {e}")
+
+    def _show_launch_stages(self, stages):
+        """Pipeline status hook (any thread): per-stage line under the progress overlay."""
+        text = LaunchPipeline.format_status(stages)
+        self.root.after(0, lambda: self.update_stages_label.config(text=text) if hasattr(self, 'update_stages_label') else None)
+
+    def _resolve_setup_java(self, version, callback):
+        """Java used to run the Fabric/Forge installers."""
+        java_install_path = "java"
+        try:
+            # 1. Try Library Utility (No args)
+            rt = minecraft_launcher_lib.utils.get_java_executable()
+            
+            if rt and os.path.exists(rt):
+                java_install_path = rt
+            elif shutil.which("java"):
+                java_install_path = shutil.which("java")
+            else:
+                # 2. Check Local Runtime Folder (indexed, only re-walked when it changes)
+                runtime_dir = os.path.join(self.minecraft_dir, "runtime")
+                local_java = self.java_index.find_java(runtime_dir)
+                
+                if local_java:
+                    java_install_path = local_java
+                else:
+                    # 3. No Java found - Install Vanilla first to fetch Runtime
+                    self.log("Java not found. Installing Vanilla version to fetch Runtime...")
+                    try:
+                        self._run_launch_download(lambda: minecraft_launcher_lib.install.install_minecraft_version(
+                            version, self.minecraft_dir, callback=callback))
+                        # Index picks up the new runtime folder on its own
+                        local_java = self.java_index.find_java(runtime_dir)
+                        if local_java:
+                            java_install_path = local_java
+                    except Exception as e:
+                        self.log(f"Failed to install vanilla runtime: {e}")
+                        if "launchermeta.mojang.com" in str(e) or "getaddrinfo failed" in str(e):
+                            self.log("Network Error: Could not connect to Mojang. Check your internet.")
+
+                    if java_install_path == "java" and not shutil.which("java"):
+                         self.log("Warning: Could not resolve setup Java. Fabric/Forge installation might fail.")
+        except Exception as e:
+            self.log(f"Java resolution error: {e}")
+        return java_install_path
+
+    def _run_launch_download(self, fn):
+        """Run a download the launch is waiting on ahead of the download queue (see DownloadManager.run_now)."""
+        manager = getattr(self, 'download_manager', None)
+        return manager.run_now(fn) if manager else fn()
+
+    def _prepare_loader(self, version, loader, java_install_path, force_update, callback, timer=None):
+        """Install the loader/version if needed and return the version id to launch."""
+        timer = timer or LaunchTimer()
+        launch_id = version
+        
+        if loader == "Fabric":
+            found_fabric = None
+            if not force_update:
+                with timer.phase("version_check"):
+                    found_fabric = self.version_index.find_loader_version(self.minecraft_dir, "fabric", version)
+            
+            if found_fabric:
+                self.log(f"Using existing Fabric installation: {found_fabric}")
+                launch_id = found_fabric
+            else:
+                self.log(f"Installing Fabric for {version}...")
+                with timer.phase("loader_install"):
+                    result = self._run_launch_download(lambda: minecraft_launcher_lib.fabric.install_fabric(
+                        version, self.minecraft_dir, callback=callback, java=java_install_path))
+                if result: launch_id = result
+                else:
+                    loader_v = minecraft_launcher_lib.fabric.get_latest_loader_version()
+                    launch_id = f"fabric-loader-{loader_v}-{version}"
+
+        elif loader == "Forge":
+            found_forge = None
+            if not force_update:
+                with timer.phase("version_check"):
+                    found_forge = self.version_index.find_loader_version(self.minecraft_dir, "forge", version)
+                    
+            if found_forge:
+                self.log(f"Using existing Forge installation: {found_forge}")
+                launch_id = found_forge
+            else:
+                self.log(f"Installing Forge for {version}...")
+                with timer.phase("loader_install"):
+                    forge_v = minecraft_launcher_lib.forge.find_forge_version(version)
+                    if forge_v:
+                        self._run_launch_download(lambda: minecraft_launcher_lib.forge.install_forge_version(
+                            forge_v, self.minecraft_dir, callback=callback, java=java_install_path))
+                        launch_id = forge_v
+        
+        else:
+            # --- Check for existing installations to avoid re-downloading ---
+            with timer.phase("version_check"):
+                installed_versions = self.version_index.get_ids(self.minecraft_dir)
+            if force_update or (version not in installed_versions and launch_id not in installed_versions):
+                 self.log(f"Installing/Updating Vanilla version {version}...")
+                 with timer.phase("loader_install"):
+                     self._run_launch_download(lambda: minecraft_launcher_lib.install.install_minecraft_version(
+                         version, self.minecraft_dir, callback=callback))
+        return launch_id
+
+    def _prepare_account(self, current_profile, username, offline_uuid):
+        """Resolve the identity passed to the game: username, uuid, token (+ Ely.by injector URL)."""
+        acct_type = current_profile.get("type", "offline")
+        account = {"username": username, "uuid": "", "token": "", "injection_url": ""}
+
+        if acct_type == "ely.by":
+            # Use the explicit API URL to avoid redirects/ambiguity
+            account["injection_url"] = "https://authserver.ely.by/api/authlib-injector"
+            account["uuid"] = current_profile.get("uuid", "")
+            account["token"] = current_profile.get("token", "")
+            self.log("Launching with Ely.by account...")
+
+        elif acct_type == "microsoft":
+            self.log("Validating Microsoft Session...")
+            if not current_profile.get("refresh_token"):
+                raise Exception("No refresh token found. Please re-login.")
+            try:
+                 self._refresh_ms_profile(current_profile)
+            except Exception as e:
+                 self.log(f"Token refresh error: {e}")
+                 raise Exception("Failed to refresh Microsoft session. Please re-login.")
+            account["username"] = current_profile["name"]
+            account["uuid"] = current_profile["uuid"]
+            account["token"] = current_profile["access_token"]
+
+        elif acct_type == "offline":
+            account["uuid"] = offline_uuid
+            self.log(f"Offline UUID: {offline_uuid}")
+        return account
+
+    def _prepare_game_directory(self, inst_id):
+        """
+        Modpacks / isolated installs run straight from their own folder (no mods copying);
+        assets, libraries and versions are still read from minecraft_dir.
+        """
+        self._recover_mods_swap()
+        try:
+            game_dir = self.get_game_directory(inst_id)
+            if game_dir != self.minecraft_dir:
+                self._seed_game_directory(game_dir)
+                self.log(f"Using game directory: {game_dir}")
+            return game_dir
+        except Exception as e:
+            self.log(f"Game directory error: {e}")
+            return self.minecraft_dir
+
+    def _prepare_launch(self, version, loader, username, inst_id, current_profile, force_update, callback, timer, on_status=None):
+        """
+        Pre-launch pipeline shared by the launcher window and headless launches.
+        Returns the launch context; the caller owns ctx["skin_server"] and must stop it.
+        """
+        acct_type = current_profile.get("type", "offline")
+        offline_uuid = str(uuid.uuid3(uuid.NAMESPACE_DNS, f"OfflinePlayer:{username}")) if acct_type == "offline" else ""
+        # Only use authlib-injector if requested (Ely.by or Offline+Injection)
+        # (for offline, auto_download_mod now means "Enable Skin Injection")
+        offline_injection = acct_type == "offline" and self.auto_download_mod
+        
+        if force_update:
+            self.log("Force Update enabled: Verifying and re-installing versions...")
+
+        state = {"skin_server": None}
+
+        def skin_server_stage(results):
+            server = LocalSkinServer(port=0)
+            state["skin_server"] = server
+            skin_path = current_profile.get("skin_path") or self.skin_path
+            skin_model = current_profile.get("skin_model", "classic")
+            url = server.start(skin_path, username, offline_uuid, skin_model)
+            if url:
+                self.log(f"Local Skin Server active at {url}")
+            else:
+                self.log("Failed to start local skin server, launching without skin injection.")
+            return url
+
+        # Independent stages run concurrently; only the loader waits for Java.
+        pipeline = LaunchPipeline(max_workers=4, on_status=on_status)
+        pipeline.add("java", lambda r: self._resolve_setup_java(version, callback), label="Java")
+        pipeline.add("loader", lambda r: self._prepare_loader(version, loader, r["java"], force_update, callback, timer),
+                     deps=("java",), label=loader)
+        pipeline.add("auth", lambda r: self._prepare_account(current_profile, username, offline_uuid), label="Account")
+        if acct_type == "ely.by" or offline_injection:
+            pipeline.add("injector", lambda r: self.ensure_authlib_injector(), label="Injector")
+        if offline_injection:
+            pipeline.add("skin_server", skin_server_stage, label="Skin Server")
+        pipeline.add("game_dir", lambda r: self._prepare_game_directory(inst_id), label="Game Folder")
+        if self.current_wallpaper:
+            pipeline.add("resource_pack", lambda r: self.create_background_resource_pack(r["game_dir"]),
+                         deps=("game_dir",), label="Theme")
+
+        try:
+            try:
+                with timer.phase("prepare"):
+                    results = pipeline.run()
+            finally:
+                for name, secs in pipeline.timings().items():
+                    if name != "loader":  # split into version_check / loader_install
+                        timer.add(name, secs)
+        except Exception:
+            if state["skin_server"]:
+                try: state["skin_server"].stop()
+                except: pass
+            raise
+        self.log("Launch preparation: " + ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in pipeline.timings().items()))
+
+        account = results["auth"]
+        injector_path = results.get("injector")
+        skin_server_url = account.get("injection_url") or results.get("skin_server") or ""
+
+        # Build Options
+        jvm_args = [f"-Xmx{self.ram_allocation}M"]
+        if self.java_args:
+            jvm_args.extend(self.java_args.split())
+        
+        javaagent_arg = None
+        if injector_path and skin_server_url:
+            self.log(f"Applying authlib-injector: {injector_path}={skin_server_url}")
+            # Kept out of jvm_args: the local skin server port changes every launch
+            javaagent_arg = f"-javaagent:{injector_path}={skin_server_url}"
+            # Ensure we pass the prefab UUID/Token so authlib trusts it if we can
+            # For offline local server, token can be anything usually, but validation might fail if not careful.
+            # Authlib Injector usually disables signature checks.
+
+        return {
+            "acct_type": acct_type,
+            "launch_id": results["loader"],
+            "username": account["username"],
+            "uuid": account["uuid"],
+            "token": account["token"],
+            "game_dir": results["game_dir"],
+            "jvm_args": jvm_args,
+            "javaagent_arg": javaagent_arg,
+            "skin_server": state["skin_server"],
+        }
+
+    def _build_launch_command(self, ctx, cache_slot, force_update, timer):
+        """Launch command for a prepared context; returns (argv, "hit" | "miss")."""
+        launch_id = ctx["launch_id"]
+        javaagent_arg = ctx["javaagent_arg"]
+        options = {
+            "username": ctx["username"], 
+            "uuid": ctx["uuid"], 
+            "token": ctx["token"],
+            "jvmArguments": ctx["jvm_args"],
+            "launcherName": "MinecraftLauncher",
+            "gameDirectory": ctx["game_dir"]
+        }
+        
+        # Cached per installation; only the per-launch identity fields are substituted
+        chain = self.version_index.get_chain(self.minecraft_dir, launch_id)
+        cache_key = LaunchCommandCache.make_key(chain, ctx["jvm_args"], ctx["acct_type"], ctx["game_dir"], injected=bool(javaagent_arg))
+        with timer.phase("command"):
+            template = self.command_cache.get(cache_slot, cache_key) if (chain and not force_update) else None
+            if template is None:
+                self.log(f"Generating command for: {launch_id}")
+                template = minecraft_launcher_lib.command.get_minecraft_command(launch_id, self.minecraft_dir, LaunchCommandCache.template_options(options, bool(javaagent_arg))) # type: ignore
+                if chain:
+                    self.command_cache.put(cache_slot, cache_key, template)
+                cache_state = "miss"
+            else:
+                cache_state = "hit"
+            command = LaunchCommandCache.render(template, ctx["username"], ctx["uuid"], ctx["token"], javaagent_arg)
+        self.log(f"Launch command cache {cache_state} for {launch_id} (hits: {self.command_cache.hits}, misses: {self.command_cache.misses})")
+        return command, cache_state
+
     def start_launch(self, force_update=False):
         # Close any open menus
         self._close_all_menus()
@@ -10219,11 +11119,8 @@ How to use:
              self.profiles[self.current_profile_index]["name"] = username
              username = self.profiles[self.current_profile_index]["name"]
 
+        timer = LaunchTimer()
         self.save_config()
-        
-        # Generate Background Resource Pack if wallpaper exists
-        if self.current_wallpaper:
-            self.create_background_resource_pack()
 
         # Show Progress Overlay
         self.show_progress_overlay("Launching Minecraft...")
@@ -10232,12 +11129,12 @@ How to use:
 
         self.launch_btn.config(state="disabled", text="LAUNCHING...")
         self.launch_opts_btn.config(state="disabled")
+        self._launch_active = True
         # self.set_status("Launching Minecraft...") # Redundant with overlay
         inst_id = inst.get("id")
-        threading.Thread(target=self.launch_logic, args=(version_id, username, loader, force_update, inst_id), daemon=True).start()
+        threading.Thread(target=self.launch_logic, args=(version_id, username, loader, force_update, inst_id, timer), daemon=True).start()
 
-    def launch_logic(self, version, username, loader, force_update=False, inst_id=None):
-        mods_backup_path = None
+    def launch_logic(self, version, username, loader, force_update=False, inst_id=None, timer=None):
         # Callback wrapper to update overlay
         def update_status(t):
             self.log(f"Status: {t}")
@@ -10269,224 +11166,25 @@ How to use:
             "setMax": lambda m: self.root.after(0, lambda: set_max(m))
         })
         local_skin_server = None
+        timer = timer or LaunchTimer()
+        inst = self.get_installations().get(inst_id, {}) if inst_id else {}
+        metrics = {
+            "installation": inst.get("name", ""),
+            "version": version,
+            "loader": loader,
+            "success": False,
+        }
         try:
-            launch_id = version
-            
-            # --- Check for existing installations to avoid re-downloading ---
-            installed_versions = [v['id'] for v in minecraft_launcher_lib.utils.get_installed_versions(self.minecraft_dir)]
-
-            # Resolve Java for Installers (Fabric/Forge need Java to run their installer)
-            java_install_path = "java"
-            try:
-                # 1. Try Library Utility (No args)
-                rt = minecraft_launcher_lib.utils.get_java_executable()
-                
-                if rt and os.path.exists(rt):
-                    java_install_path = rt
-                elif shutil.which("java"):
-                    java_install_path = shutil.which("java")
-                else:
-                    # 2. Check Local Runtime Folder Manually
-                    runtime_dir = os.path.join(self.minecraft_dir, "runtime")
-                    local_java = None
-                    if os.path.exists(runtime_dir):
-                        for root, dirs, files in os.walk(runtime_dir):
-                            if "java.exe" in files:
-                                local_java = os.path.join(root, "java.exe")
-                                break
-                            elif "java" in files and sys.platform != "win32":
-                                local_java = os.path.join(root, "java")
-                                break
-                    
-                    if local_java:
-                        java_install_path = local_java
-                    else:
-                        # 3. No Java found - Install Vanilla first to fetch Runtime
-                        self.log("Java not found. Installing Vanilla version to fetch Runtime...")
-                        try:
-                            minecraft_launcher_lib.install.install_minecraft_version(version, self.minecraft_dir, callback=callback)
-                            # Scan again
-                            if os.path.exists(runtime_dir):
-                                for root, dirs, files in os.walk(runtime_dir):
-                                    if "java.exe" in files:
-                                        java_install_path = os.path.join(root, "java.exe")
-                                        break
-                                    elif "java" in files and sys.platform != "win32":
-                                        java_install_path = os.path.join(root, "java")
-                                        break
-                        except Exception as e:
-                            self.log(f"Failed to install vanilla runtime: {e}")
-                            if "launchermeta.mojang.com" in str(e) or "getaddrinfo failed" in str(e):
-                                self.log("Network Error: Could not connect to Mojang. Check your internet.")
-
-                        if java_install_path == "java" and not shutil.which("java"):
-                             self.log("Warning: Could not resolve setup Java. Fabric/Forge installation might fail.")
-            except Exception as e:
-                self.log(f"Java resolution error: {e}")
-            
-            if force_update:
-                self.log("Force Update enabled: Verifying and re-installing versions...")
-            
-            if loader == "Fabric":
-                found_fabric = None
-                if not force_update:
-                    for vid in installed_versions:
-                        if "fabric" in vid and version in vid:
-                             found_fabric = vid
-                             break
-                
-                if found_fabric:
-                    self.log(f"Using existing Fabric installation: {found_fabric}")
-                    launch_id = found_fabric
-                else:
-                    self.log(f"Installing Fabric for {version}...")
-                    result = minecraft_launcher_lib.fabric.install_fabric(version, self.minecraft_dir, callback=callback, java=java_install_path)
-                    if result: launch_id = result
-                    else:
-                        loader_v = minecraft_launcher_lib.fabric.get_latest_loader_version()
-                        launch_id = f"fabric-loader-{loader_v}-{version}"
-
-            elif loader == "Forge":
-                found_forge = None
-                if not force_update:
-                    for vid in installed_versions:
-                        if "forge" in vid and version in vid:
-                            found_forge = vid
-                            break
-                        
-                if found_forge:
-                    self.log(f"Using existing Forge installation: {found_forge}")
-                    launch_id = found_forge
-                else:
-                    self.log(f"Installing Forge for {version}...")
-                    forge_v = minecraft_launcher_lib.forge.find_forge_version(version)
-                    if forge_v:
-                        minecraft_launcher_lib.forge.install_forge_version(forge_v, self.minecraft_dir, callback=callback, java=java_install_path)
-                        launch_id = forge_v
-            
-            else:
-                if force_update or (version not in installed_versions and launch_id not in installed_versions):
-                     self.log(f"Installing/Updating Vanilla version {version}...")
-                     minecraft_launcher_lib.install.install_minecraft_version(version, self.minecraft_dir, callback=callback)
-
-            # Determine Account & Injection Settings
             current_profile = self.profiles[self.current_profile_index] if (self.profiles and 0 <= self.current_profile_index < len(self.profiles)) else {"type": "offline", "skin_path": "", "uuid": ""}
-            acct_type = current_profile.get("type", "offline")
-            
-            launch_uuid = ""
-            launch_token = ""
-            
-            injector_path = None
-            # Only use authlib-injector if requested (Ely.by or Offline+Injection)
-            use_injection = False
-            skin_server_url = ""
-
-            if acct_type == "ely.by":
-                # Ely.by Logic
-                use_injection = True
-                injector_path = self.ensure_authlib_injector()
-                # Use the explicit API URL to avoid redirects/ambiguity
-                skin_server_url = "https://authserver.ely.by/api/authlib-injector"
-                launch_uuid = current_profile.get("uuid", "")
-                launch_token = current_profile.get("token", "")
-                self.log("Launching with Ely.by account...")
-
-            elif acct_type == "microsoft":
-                self.log("Validating Microsoft Session...")
-                refresh_token = current_profile.get("refresh_token")
-                if refresh_token:
-                    try:
-                         # Refresh
-                         new_data = minecraft_launcher_lib.microsoft_account.complete_refresh(MSA_CLIENT_ID, None, MSA_REDIRECT_URI, refresh_token)
-                         if "error" not in new_data:
-                             # Update profile
-                             current_profile["access_token"] = new_data["access_token"]
-                             current_profile["refresh_token"] = new_data["refresh_token"]
-                             current_profile["name"] = new_data["name"]
-                             current_profile["uuid"] = new_data["id"]
-                             self.save_config()
-                             
-                             username = new_data["name"]
-                             launch_uuid = new_data["id"]
-                             launch_token = new_data["access_token"]
-                             self.log(f"Session refreshed for {username}")
-                         else:
-                             raise Exception(f"Session Expired: {new_data.get('error')}")
-                    except Exception as e:
-                         self.log(f"Token refresh error: {e}")
-                         raise Exception("Failed to refresh Microsoft session. Please re-login.")
-                else:
-                    raise Exception("No refresh token found. Please re-login.")
+            ctx = self._prepare_launch(version, loader, username, inst_id, current_profile, force_update,
+                                       callback, timer, on_status=self._show_launch_stages)
+            local_skin_server = ctx["skin_server"]
+            launch_id = ctx["launch_id"]
+            game_dir = ctx["game_dir"]
+            metrics["launch_id"] = launch_id
+            metrics["account_type"] = ctx["acct_type"]
 
-            elif acct_type == "offline":
-                # Offline Logic
-                launch_uuid = str(uuid.uuid3(uuid.NAMESPACE_DNS, f"OfflinePlayer:{username}"))
-                self.log(f"Offline UUID: {launch_uuid}")
-                
-                if self.auto_download_mod: # This toggle now means "Enable Skin Injection"
-                     use_injection = True
-                     injector_path = self.ensure_authlib_injector()
-                     
-                     # Start Local Skin Server
-                     try:
-                         local_skin_server = LocalSkinServer(port=0)
-                         skin_path = current_profile.get("skin_path") or self.skin_path
-                         skin_model = current_profile.get("skin_model", "classic")
-                         skin_server_url = local_skin_server.start(skin_path, username, launch_uuid, skin_model)
-                         self.log(f"Local Skin Server active at {skin_server_url}")
-                     except Exception as e:
-                         self.log(f"Failed to start local skin server: {e}")
-                         use_injection = False
-
-            # Build Options
-            jvm_args = [f"-Xmx{self.ram_allocation}M"]
-            if self.java_args:
-                jvm_args.extend(self.java_args.split())
-            
-            if use_injection and injector_path and skin_server_url:
-                self.log(f"Applying authlib-injector: {injector_path}={skin_server_url}")
-                jvm_args.append(f"-javaagent:{injector_path}={skin_server_url}")
-                # Ensure we pass the prefab UUID/Token so authlib trusts it if we can
-                # For offline local server, token can be anything usually, but validation might fail if not careful.
-                # Authlib Injector usually disables signature checks.
-
-            # --- MODPACK SWAP ---
-            try:
-                if inst_id:
-                     pack = next((p for p in self.modpacks if p.get('linked_installation_id') == inst_id), None)
-                     if pack:
-                         self.log(f"Loading Modpack: {pack['name']}")
-                         mods_dir = os.path.join(self.minecraft_dir, "mods")
-                         pack_mods_dir = os.path.join(self.get_modpack_dir(pack['id']), "mods")
-                         
-                         # Only swap if pack has mods folder
-                         if os.path.exists(pack_mods_dir):
-                             timestamp = int(time.time())
-                             mods_backup_path = os.path.join(self.minecraft_dir, f"mods_backup_{timestamp}")
-                             
-                             if os.path.exists(mods_dir):
-                                 # Rename current to backup
-                                 os.rename(mods_dir, mods_backup_path)
-                             
-                             # Copy pack mods to live folder
-                             # Using copytree can be slow. Symlink if possible?
-                             # Windows requires Admin for symlinks usually. Copy is safer.
-                             shutil.copytree(pack_mods_dir, mods_dir)
-                             self.log("Swapped mods folder for modpack.")
-            except Exception as e:
-                self.log(f"Modpack swap error: {e}")
-
-            options = {
-                "username": username, 
-                "uuid": launch_uuid, 
-                "token": launch_token,
-                "jvmArguments": jvm_args,
-                "launcherName": "MinecraftLauncher",
-                "gameDirectory": self.minecraft_dir
-            }
-            
-            self.log(f"Generating command for: {launch_id}")
-            command = minecraft_launcher_lib.command.get_minecraft_command(launch_id, self.minecraft_dir, options) # type: ignore
+            command, metrics["command_cache"] = self._build_launch_command(ctx, inst_id or launch_id, force_update, timer)
             
             self.root.after(0, self.root.withdraw)
             
@@ -10501,21 +11199,29 @@ How to use:
             if sys.platform == "win32":
                 creationflags = subprocess.CREATE_NO_WINDOW
 
-            process = subprocess.Popen(
-                command, 
-                cwd=self.minecraft_dir,
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.STDOUT, 
-                text=True, 
-                encoding='utf-8',
-                errors='replace',
-                creationflags=creationflags
-            )
+            with timer.phase("popen"):
+                process = subprocess.Popen(
+                    command, 
+                    cwd=game_dir,
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.STDOUT, 
+                    text=True, 
+                    encoding='utf-8',
+                    errors='replace',
+                    creationflags=creationflags
+                )
+            metrics["success"] = True
             
             if process.stdout:
-                for line in process.stdout:
+                # Runs on the reader thread: file logging, launch milestones + RPC server detection
+                def on_game_line(line):
                     line_stripped = line.strip()
-                    self.root.after(0, lambda l=line_stripped: self.log(f"[GAME] {l}"))
+                    logging.info(f"[GAME] {line_stripped}")
+                    timer.mark("first_output")
+                    for marker, mark_name in GAME_OUTPUT_MARKERS.items():
+                        if marker in line_stripped and timer.mark(mark_name):
+                            self.log(f"Reached {mark_name.replace('_', ' ')} in {timer.marks[mark_name]:.2f}s")
+                            self.launch_history.save(timer.to_record(**metrics))
                     
                     if "Connecting to" in line_stripped and "," in line_stripped:
                          if getattr(self, 'rpc_show_server', True):
@@ -10526,7 +11232,12 @@ How to use:
                                     self.root.after(0, lambda s=server_addr: self.update_rpc("In Game", f"Playing on {s}", start=time.time()))
                             except: pass
 
-            process.wait()
+                pump = GameOutputPump(self.root, process.stdout, self._append_game_output,
+                                      on_line=on_game_line, max_lines=getattr(self, 'console_max_lines', 5000))
+                pump.start()
+                pump.join()
+
+            metrics["exit_code"] = process.wait()
             self.root.after(0, self.root.deiconify)
             self.root.after(0, lambda: self.update_rpc("Idle", "In Launcher"))
         except Exception as e:
@@ -10538,23 +11249,17 @@ How to use:
             
             self.root.after(0, lambda: custom_showerror("Launch Error", err_msg))
             self.root.after(0, lambda: self.update_rpc("Idle", "In Launcher"))
+            metrics["error"] = str(e)
         finally:
-            if mods_backup_path and os.path.exists(mods_backup_path):
-                try:
-                    current_mods = os.path.join(self.minecraft_dir, "mods")
-                    if os.path.exists(current_mods):
-                        shutil.rmtree(current_mods) 
-                    os.rename(mods_backup_path, current_mods)
-                    self.log("Restored original mods folder.")
-                except Exception as e:
-                    self.log(f"Error restoring mods: {e}")
-
+            self.launch_history.save(timer.to_record(**metrics))
+            self.root.after(0, self.refresh_launch_metrics_view)
             if local_skin_server:
                 self.log("Stopping local skin server...")
                 try: local_skin_server.stop()
                 except: pass
                 
             def reset_ui():
+                self._launch_active = False
                 self.launch_btn.config(state="normal", text="PLAY")
                 self.launch_opts_btn.config(state="normal")
                 self.update_skin_indicator()
@@ -10562,7 +11267,201 @@ How to use:
                 
             self.root.after(0, reset_ui)
 
-if __name__ == "__main__":
+class HeadlessLauncher(MinecraftLauncher):
+    """
+    Launches an installation straight from launcher_config.json without creating
+    any widgets. Runs the same preparation pipeline and command cache as PLAY.
+    """
+    def __init__(self):
+        self.root = None
+        self.config_file, self.config_dir = resolve_config_file()
+        self.setup_logging()
+        self.minecraft_dir = get_minecraft_dir()
+
+        self.java_index = JavaRuntimeIndex(os.path.join(self.config_dir, "java_runtimes.json"))
+        self.version_index = InstalledVersionIndex()
+        self.command_cache = LaunchCommandCache(os.path.join(self.config_dir, "launch_commands.json"))
+        self.launch_history = LaunchHistory(os.path.join(self.config_dir, "metrics"))
+        self.http = get_client()
+        self.limiter = get_limiter()
+
+        self.ms_auth = MicrosoftAuth(MSA_CLIENT_ID, http=self.http)
+        self._ms_refresh_lock = threading.Lock()
+
+        self._config_data: dict[str, Any] = {}
+        self.profiles = []
+        self.installations = []
+        self.current_profile_index = 0
+        self.skin_path = ""
+        self.auto_download_mod = False
+        self.ram_allocation = DEFAULT_RAM
+        self.java_args = ""
+        self.current_wallpaper = None
+        self.load_from_config()
+        self.load_modpacks()
+
+    def load_from_config(self):
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, "r", encoding="utf-8") as f:
+                    self._config_data = json.load(f)
+            except Exception as e:
+                print(f"Error loading config: {e}")
+        data = self._config_data
+
+        self.profiles = data.get("profiles", [])
+        self.installations = data.get("installations", [])
+        idx = data.get("current_profile_index", 0)
+        self.current_profile_index = idx if 0 <= idx < len(self.profiles) else 0
+        self.auto_download_mod = data.get("auto_download_mod", False)
+        self.ram_allocation = data.get("ram_allocation", DEFAULT_RAM)
+        self.java_args = data.get("java_args", "")
+        self.limit_download_speed_enabled = data.get("limit_download_speed_enabled", False)
+        self.max_download_speed = data.get("max_download_speed", 2048)
+        self.max_download_speed_per_host = data.get("max_download_speed_per_host", 0)
+        self._apply_bandwidth_limit()
+
+        custom_dir = data.get("minecraft_dir", "")
+        if custom_dir and os.path.isdir(custom_dir):
+            self.minecraft_dir = custom_dir
+
+        wp = data.get("current_wallpaper")
+        self.current_wallpaper = wp if wp and os.path.exists(wp) else None
+        if self.profiles:
+            self.skin_path = self.profiles[self.current_profile_index].get("skin_path", "")
+
+    def save_config(self, *args, sync_ui=True, immediate=False):
+        # Only refreshed account tokens change here; keep every other setting as it is on disk
+        data = dict(self._config_data)
+        data["profiles"] = self.profiles
+        self._write_config_payload(data)
+
+    def find_installation(self, name):
+        """Match by exact name, then case-insensitive name, then id."""
+        for match in (lambda i: i.get("name") == name,
+                      lambda i: str(i.get("name", "")).lower() == name.lower(),
+                      lambda i: i.get("id") == name):
+            inst = next((i for i in self.installations if match(i)), None)
+            if inst:
+                return inst
+        return None
+
+    def find_profile(self, profile):
+        """Account by list index or by name; None selects the launcher's current account."""
+        if profile is None:
+            return self.current_profile_index if self.profiles else None
+        if str(profile).isdigit():
+            idx = int(profile)
+            return idx if 0 <= idx < len(self.profiles) else None
+        return next((i for i, p in enumerate(self.profiles) if p.get("name") == profile), None)
+
+    @staticmethod
+    def format_command(command, token=""):
+        shown = ["<access token>" if token and arg == token else arg for arg in command]
+        if sys.platform == "win32":
+            return subprocess.list2cmdline(shown)
+        return shlex.join(shown)
+
+    def launch(self, name, profile=None, dry_run=False):
+        """Returns a process exit code."""
+        timer = LaunchTimer()
+        inst = self.find_installation(name)
+        if not inst:
+            print(f"Installation not found: {name}")
+            names = ", ".join(f'"{i.get("name")}"' for i in self.installations)
+            print(f"Available installations: {names or '(none)'}")
+            return 2
+
+        profile_idx = self.find_profile(profile)
+        if profile_idx is None:
+            current_profile = {"type": "offline", "skin_path": "", "uuid": "", "name": DEFAULT_USERNAME}
+            if profile is not None:
+                print(f"Account not found: {profile}")
+                return 2
+        else:
+            current_profile = self.profiles[profile_idx]
+            self.skin_path = current_profile.get("skin_path", "")
+        username = current_profile.get("name") or DEFAULT_USERNAME
+
+        version = inst.get("version")
+        loader = inst.get("loader", "Vanilla")
+        inst_id = inst.get("id")
+        metrics = {
+            "installation": inst.get("name", ""),
+            "version": version,
+            "loader": loader,
+            "headless": True,
+            "dry_run": dry_run,
+            "success": False,
+        }
+        callback = cast(Any, {
+            "setStatus": lambda t: self.log(f"Status: {t}"),
+            "setProgress": lambda v: None,
+            "setMax": lambda m: None
+        })
+        local_skin_server = None
+        try:
+            if not version or version == "latest-release":
+                version = minecraft_launcher_lib.utils.get_latest_version()["release"]
+                metrics["version"] = version
+
+            ctx = self._prepare_launch(version, loader, username, inst_id, current_profile, False, callback, timer)
+            local_skin_server = ctx["skin_server"]
+            metrics["launch_id"] = ctx["launch_id"]
+            metrics["account_type"] = ctx["acct_type"]
+            command, metrics["command_cache"] = self._build_launch_command(ctx, inst_id or ctx["launch_id"], False, timer)
+
+            print("")
+            for key, label in LAUNCH_PHASES:
+                if key in timer.phases:
+                    print(f"  {label:<22}{timer.phases[key] * 1000:>8.0f} ms")
+            print(f"  {'Launcher overhead':<22}{(time.monotonic() - timer.t0) * 1000:>8.0f} ms")
+            print("")
+            print(self.format_command(command, ctx["token"]))
+
+            if dry_run:
+                metrics["success"] = True
+                return 0
+
+            with timer.phase("popen"):
+                process = subprocess.Popen(command, cwd=ctx["game_dir"])
+            metrics["success"] = True
+            self.log(f"Started {ctx['launch_id']} (pid {process.pid})")
+
+            if local_skin_server:
+                # The skin server lives in this process; keep it up until the game exits
+                self.log("Waiting for the game to exit (local skin server running)...")
+                metrics["exit_code"] = process.wait()
+            return 0
+        except Exception as e:
+            self.log(f"Error: {e}")
+            metrics["error"] = str(e)
+            return 1
+        finally:
+            self.launch_history.save(timer.to_record(**metrics))
+            if local_skin_server:
+                try: local_skin_server.stop()
+                except: pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NLC | New launcher")
+    parser.add_argument("--launch", metavar="NAME",
+                        help="launch an installation by name without opening the launcher window")
+    parser.add_argument("--profile", metavar="N",
+                        help="account index or name to launch with (default: the selected account)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="prepare everything and print the launch command without starting the game")
+    # Unknown arguments are ignored (the updater restarts us with the original argv)
+    args, _ = parser.parse_known_args(argv)
+
+    if args.launch:
+        sys.exit(HeadlessLauncher().launch(args.launch, profile=args.profile, dry_run=args.dry_run))
+
     root = tk.Tk()
     app = MinecraftLauncher(root)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ import urllib.request
 import urllib.error
 import time
 
+import requests
+
+from http_client import USER_AGENT, get_client
+
 class ElyByAuth:
     AUTH_URL = "https://authserver.ely.by/auth/authenticate"
     
@@ -43,7 +47,7 @@ class ElyByAuth:
                     data=data, 
                     headers={
                         'Content-Type': 'application/json',
-                        'User-Agent': 'NewLauncher/1.8.2'
+                        'User-Agent': USER_AGENT
                     }
                 )
                 
@@ -91,3 +95,122 @@ class ElyByAuth:
         if last_error:
             last_error["error"] = f"{last_error['error']} (after {max_retries} attempts)"
         return last_error or {"error": "Authentication failed after multiple attempts"}
+
+
+class MicrosoftAuth:
+    """
+    Microsoft -> Xbox Live -> XSTS -> Minecraft token chain.
+    Endpoints are class attributes (or per-instance overrides) so the chain can be
+    pointed at a local stand-in server. Requests go through the launcher's shared
+    HttpClient (pooled connections, retries and User-Agent) unless `http` is given.
+    """
+    TOKEN_URL = "https://login.microsoftonline.com/consumers/oauth2/v2.0/token"
+    XBL_URL = "https://user.auth.xboxlive.com/user/authenticate"
+    XSTS_URL = "https://xsts.auth.xboxlive.com/xsts/authorize"
+    MC_LOGIN_URL = "https://api.minecraftservices.com/authentication/login_with_xbox"
+    PROFILE_URL = "https://api.minecraftservices.com/minecraft/profile"
+
+    SCOPE = "XboxLive.signin offline_access"
+    EXPIRY_MARGIN = 300  # Treat tokens as expired 5 minutes early
+    PREREFRESH_WINDOW = 900  # Background refresh starts 15 minutes before expiry
+
+    def __init__(self, client_id, endpoints=None, timeout=10, http=None):
+        self.client_id = client_id
+        self.timeout = timeout
+        self.http = http or get_client()
+        for name, url in (endpoints or {}).items():
+            setattr(self, name, url)
+
+    @staticmethod
+    def is_token_valid(profile, margin=None):
+        """True if the stored Minecraft access token is still usable for at least `margin` seconds."""
+        if margin is None:
+            margin = MicrosoftAuth.EXPIRY_MARGIN
+        expires_at = profile.get("expires_at")
+        if not profile.get("access_token") or not expires_at:
+            return False
+        try:
+            return float(expires_at) - margin > time.time()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def needs_prerefresh(profile):
+        return not MicrosoftAuth.is_token_valid(profile, margin=MicrosoftAuth.PREREFRESH_WINDOW)
+
+    def _request(self, url, data=None, headers=None, form=False):
+        hdrs = {'Accept': 'application/json'}
+        hdrs.update(headers or {})
+        if data is None:
+            r = self.http.get(url, headers=hdrs, timeout=self.timeout)
+        elif form:
+            r = self.http.post(url, data=data, headers=hdrs, timeout=self.timeout)
+        else:
+            r = self.http.post(url, json=data, headers=hdrs, timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def refresh(self, refresh_token):
+        """
+        Run the full refresh chain.
+
+        Returns:
+            dict: {"access_token", "refresh_token", "name", "id", "expires_at"} or {"error": ...}
+        """
+        if not refresh_token:
+            return {"error": "No refresh token"}
+        try:
+            ms = self._request(self.TOKEN_URL, {
+                "client_id": self.client_id,
+                "grant_type": "refresh_token",
+                "refresh_token": refresh_token,
+                "scope": self.SCOPE,
+            }, form=True)
+            if "access_token" not in ms:
+                return {"error": ms.get("error_description") or ms.get("error") or "Token refresh failed"}
+
+            xbl = self._request(self.XBL_URL, {
+                "Properties": {
+                    "AuthMethod": "RPS",
+                    "SiteName": "user.auth.xboxlive.com",
+                    "RpsTicket": f"d={ms['access_token']}"
+                },
+                "RelyingParty": "http://auth.xboxlive.com",
+                "TokenType": "JWT"
+            })
+            uhs = xbl["DisplayClaims"]["xui"][0]["uhs"]
+
+            xsts = self._request(self.XSTS_URL, {
+                "Properties": {
+                    "SandboxId": "RETAIL",
+                    "UserTokens": [xbl["Token"]]
+                },
+                "RelyingParty": "rp://api.minecraftservices.com/",
+                "TokenType": "JWT"
+            })
+
+            mc = self._request(self.MC_LOGIN_URL, {"identityToken": f"XBL3.0 x={uhs};{xsts['Token']}"})
+            profile = self._request(self.PROFILE_URL, headers={"Authorization": f"Bearer {mc['access_token']}"})
+
+            return {
+                "access_token": mc["access_token"],
+                "refresh_token": ms.get("refresh_token", refresh_token),
+                "name": profile["name"],
+                "id": profile["id"],
+                "expires_at": time.time() + float(mc.get("expires_in", 86400)),
+            }
+        except requests.HTTPError as e:
+            response = e.response
+            try:
+                body = response.json()
+                msg = body.get("error_description") or body.get("errorMessage") or body.get("error") or response.reason
+            except Exception:
+                msg = response.reason
+            return {"error": f"{response.status_code} {msg}"}
+        except (KeyError, IndexError, ValueError) as e:
+            # Before RequestException: requests' JSONDecodeError is both
+            return {"error": f"Invalid response from auth server: {e}"}
+        except requests.RequestException as e:
+            return {"error": f"Network error: {e}"}
+        except Exception as e:
+            return {"error": f"Unexpected error: {str(e)}"}
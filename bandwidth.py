@@ -0,0 +1,119 @@
+import time
+import threading
+import collections
+import urllib.parse
+
+# Longest single sleep while waiting for bandwidth, so cancellation is noticed quickly
+SLEEP_SLICE = 0.1
+
+
+class TokenBucket:
+    """
+    Reservation-style token bucket. Each caller reserves its bytes up front and
+    sleeps off the resulting debt, so concurrent streams are served in the
+    order they asked and each gets an equal share of the rate.
+    """
+    def __init__(self, rate=0, burst=None):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst=None):
+        with self._lock:
+            self.rate = max(0, int(rate or 0))
+            # Allow roughly a quarter second of burst so small chunks don't stall
+            self.burst = burst if burst is not None else max(64 * 1024, self.rate // 4)
+            self.tokens = float(self.burst)
+            self.updated = time.monotonic()
+
+    def reserve(self, n):
+        """Take `n` tokens; returns how long the caller has to wait before using them."""
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class BandwidthLimiter:
+    """
+    Process-wide download bandwidth limit shared by every download path, with an
+    optional per-host cap, plus the measured aggregate throughput.
+    Rates are in bytes/s; 0 means unlimited.
+    """
+    def __init__(self, rate=0, per_host_rate=0, window=3.0):
+        self._lock = threading.Lock()
+        self.total = TokenBucket(rate)
+        self.per_host_rate = max(0, int(per_host_rate or 0))
+        self._hosts: dict[str, TokenBucket] = {}
+        self.window = window
+        self._samples = collections.deque()  # (monotonic time, bytes)
+
+    def configure(self, rate=0, per_host_rate=0):
+        self.total.configure(rate)
+        with self._lock:
+            self.per_host_rate = max(0, int(per_host_rate or 0))
+            for bucket in self._hosts.values():
+                bucket.configure(self.per_host_rate)
+
+    @property
+    def limited(self):
+        return self.total.rate > 0 or self.per_host_rate > 0
+
+    def _host_bucket(self, url):
+        host = urllib.parse.urlsplit(url).netloc.lower() if url else ""
+        with self._lock:
+            bucket = self._hosts.get(host)
+            if bucket is None:
+                bucket = self._hosts[host] = TokenBucket(self.per_host_rate)
+            return bucket
+
+    def consume(self, n, url=None, should_cancel=None):
+        """
+        Account for `n` received bytes and block until they fit within the limits.
+        The wait is slept in short slices: returns False as soon as `should_cancel()`
+        is true (so pause/cancel don't hang at low limits), True otherwise.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, n))
+            while self._samples and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+        wait = self.total.reserve(n)
+        if self.per_host_rate > 0:
+            wait = max(wait, self._host_bucket(url).reserve(n))
+        deadline = now + wait
+        while wait > 0:
+            if should_cancel and should_cancel():
+                return False
+            if not self.limited:
+                break # Limit lifted while waiting
+            time.sleep(min(wait, SLEEP_SLICE))
+            wait = deadline - time.monotonic()
+        return True
+
+    def throughput(self):
+        """Aggregate bytes/s over the last `window` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            while self._samples and now - self._samples[0][0] > self.window:
+                self._samples.popleft()
+            if not self._samples:
+                return 0.0
+            span = min(self.window, max(now - self._samples[0][0], 0.5))
+            return sum(n for _, n in self._samples) / span
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Process-wide shared BandwidthLimiter (unlimited until configured)."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = BandwidthLimiter()
+        return _limiter
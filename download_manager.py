@@ -0,0 +1,397 @@
+import os
+import json
+import time
+import threading
+import itertools
+import collections
+from typing import Any, Callable, Optional
+
+PRIORITY_LAUNCH = 0     # Blocks a launch the user is waiting on
+PRIORITY_PACK = 10      # Modpack installs
+PRIORITY_MOD = 20       # Background single-mod installs
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_PAUSED = "paused"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+
+
+class TaskFailed(Exception):
+    """Raised by a handler for errors that retrying won't fix (no compatible version, bad pack...)."""
+
+
+class ProgressBoard:
+    """
+    Thread-safe progress counters for the download queue. Workers write here as
+    often as they like (every chunk, if they want); the UI reads the rows that
+    changed on its own timer, so the number of Tk updates no longer grows with
+    chunk count or the number of running downloads.
+    """
+    def __init__(self, window=3.0, sample_interval=0.05):
+        self.window = window
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._rows: dict[str, dict] = {}
+        self._dirty: set[str] = set()
+
+    def update(self, task_id, progress=None, detail=None, done=None, total=None):
+        """Record a task's state. `done`/`total` are bytes and feed the speed and ETA."""
+        now = time.monotonic()
+        with self._lock:
+            row = self._rows.get(task_id)
+            if row is None:
+                row = self._rows[task_id] = {"progress": None, "detail": None, "done": 0, "total": 0,
+                                             "samples": collections.deque()}
+            if progress is not None:
+                row["progress"] = progress
+            if detail is not None:
+                row["detail"] = detail
+            if total is not None:
+                row["total"] = total
+            if done is not None:
+                samples = row["samples"]
+                if done < row["done"]:
+                    # A new file/stage started counting from zero
+                    samples.clear()
+                row["done"] = done
+                if samples and now - samples[-1][0] < self.sample_interval:
+                    samples[-1] = (samples[-1][0], done)
+                else:
+                    samples.append((now, done))
+                if progress is None and row["total"]:
+                    row["progress"] = min(100.0, done / row["total"] * 100)
+            self._dirty.add(task_id)
+
+    def discard(self, task_id):
+        with self._lock:
+            self._rows.pop(task_id, None)
+            self._dirty.discard(task_id)
+
+    def _rate(self, row, now):
+        samples = row["samples"]
+        while len(samples) > 1 and now - samples[0][0] > self.window:
+            samples.popleft()
+        if not samples or now - samples[-1][0] > self.window:
+            return 0.0
+        span = now - samples[0][0]
+        if span < 0.2:
+            return 0.0
+        return max(0.0, (samples[-1][1] - samples[0][1]) / span)
+
+    def collect(self):
+        """
+        Rows changed since the last call, plus every row still receiving bytes
+        (its speed/ETA moves even without new data): `{task_id: {progress,
+        detail, rate, eta}}`. `eta` is seconds, or None when unknown.
+        """
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for task_id, row in self._rows.items():
+                moving = bool(row["samples"]) and now - row["samples"][-1][0] <= self.window
+                if task_id not in self._dirty and not moving:
+                    continue
+                rate = self._rate(row, now)
+                eta = None
+                if rate > 0 and row["total"] > row["done"]:
+                    eta = (row["total"] - row["done"]) / rate
+                out[task_id] = {"progress": row["progress"], "detail": row["detail"], "rate": rate, "eta": eta}
+            self._dirty.clear()
+        return out
+
+
+class DownloadTask:
+    def __init__(self, task_id, kind, name, payload, priority, seq, cancel_event=None):
+        self.id = task_id
+        self.kind = kind
+        self.name = name
+        self.payload = payload
+        self.priority = priority
+        self.seq = seq
+        self.state = STATE_QUEUED
+        self.attempts = 0
+        self.not_before = 0.0
+        self.error: Optional[BaseException] = None
+        self.on_finish: Optional[Callable[["DownloadTask"], None]] = None
+        self.cancel_event = cancel_event or threading.Event()
+        self.pause_event = threading.Event()
+        # Set on cancel *or* pause; handlers pass it to their downloads as the stop signal
+        self.interrupt = threading.Event()
+
+    def should_stop(self):
+        return self.interrupt.is_set()
+
+    def to_record(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "payload": self.payload,
+            "priority": self.priority,
+            "attempts": self.attempts,
+            "paused": self.state == STATE_PAUSED,
+        }
+
+
+class DownloadManager:
+    """
+    Download scheduler with a fixed worker pool.
+
+    Tasks are `(kind, payload)` pairs run by a handler registered for the kind,
+    so the queue can be written to disk and picked up again after a restart.
+    Workers take the highest-priority queued task whose kind is below its
+    concurrency limit (read from the app settings on every pick; call
+    `limits_changed` when a setting changes). Failed tasks are retried with
+    exponential backoff unless the handler raises TaskFailed.
+    Pausing interrupts a running task; resumable downloads continue from their
+    .part files when it is resumed. Status text and byte counts go through
+    `progress` (a ProgressBoard) for the UI to pick up.
+
+    Downloads a launch is blocked on go through `run_now` instead of the queue:
+    they run immediately on the caller's thread at PRIORITY_LAUNCH, and no
+    lower-priority task is started until they finish.
+    """
+    def __init__(self, app, queue_file=None, workers=8, max_retries=3, backoff=2.0):
+        self.app = app
+        self.queue_file = queue_file
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._handlers: dict[str, tuple[Callable[[DownloadTask], Any], str, int, str, Optional[Callable]]] = {}
+        self._tasks: dict[str, DownloadTask] = {}
+        self._active: dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._launch_blocking = 0  # run_now calls in progress
+        self.progress = ProgressBoard()
+
+    def register(self, kind, handler, limit_attr, default_limit=1, type_str="file", on_finish=None):
+        """
+        `handler(task)` does the work and raises on failure; `limit_attr` names the
+        app's concurrency setting. `on_finish` is used for tasks submitted without
+        their own callback (e.g. restored from disk).
+        """
+        self._handlers[kind] = (handler, limit_attr, default_limit, type_str, on_finish)
+
+    # --- Public API (any thread) ---
+    def submit(self, kind, name, payload, priority=PRIORITY_MOD, task_id=None, on_finish=None, paused=False):
+        if kind not in self._handlers:
+            raise ValueError(f"No download handler registered for '{kind}'")
+        ui = self.app.download_tasks.get(task_id, {}) if task_id else {}
+        task = DownloadTask(task_id or str(next(self._seq)), kind, name, payload, priority,
+                            next(self._seq), cancel_event=ui.get("cancel_event"))
+        task.on_finish = on_finish or self._handlers[kind][4]
+        if paused:
+            task.state = STATE_PAUSED
+            task.pause_event.set()
+            task.interrupt.set()
+        with self._cond:
+            self._tasks[task.id] = task
+            self._ensure_workers()
+            self._persist()
+            self._cond.notify_all()
+        self._ui(task.id, detail="Paused" if paused else "Queued...")
+        return task
+
+    def run_now(self, fn):
+        """
+        Run `fn()` (a download the user is waiting on, e.g. a launch's game files)
+        on the calling thread without waiting for a worker. Until it returns,
+        queued tasks below PRIORITY_LAUNCH are held back; running ones continue.
+        Returns fn's result; exceptions propagate.
+        """
+        with self._cond:
+            self._launch_blocking += 1
+        try:
+            return fn()
+        finally:
+            with self._cond:
+                self._launch_blocking -= 1
+                self._cond.notify_all()
+
+    def limits_changed(self):
+        """Call after a concurrency setting changed, so idle workers pick up tasks a raised limit now admits."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def pause(self, task_id):
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if not task or task.state not in (STATE_QUEUED, STATE_RUNNING):
+                return False
+            task.pause_event.set()
+            task.interrupt.set()
+            if task.state == STATE_QUEUED:
+                task.state = STATE_PAUSED
+            self._persist()
+        self._ui(task_id, detail="Pausing..." if task.state == STATE_RUNNING else "Paused")
+        return True
+
+    def resume(self, task_id):
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if not task or task.state != STATE_PAUSED:
+                return False
+            task.pause_event.clear()
+            task.interrupt.clear()
+            task.state = STATE_QUEUED
+            task.not_before = 0.0
+            self._persist()
+            self._cond.notify_all()
+        self._ui(task_id, detail="Queued...")
+        return True
+
+    def cancel(self, task_id):
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if not task:
+                return False
+            task.cancel_event.set()
+            task.interrupt.set()
+            if task.state != STATE_RUNNING:
+                # Not on a worker: finish it right here
+                task.state = STATE_CANCELLED
+                del self._tasks[task_id]
+                self._persist()
+                finished = task
+            else:
+                finished = None
+            self._cond.notify_all()
+        if finished:
+            self._finish(finished)
+        return True
+
+    def is_paused(self, task_id):
+        task = self._tasks.get(task_id)
+        return bool(task and task.state == STATE_PAUSED)
+
+    def restore(self, make_ui_task: Callable[[str, str], str]):
+        """Re-queue tasks saved by a previous session; `make_ui_task(name, type_str)` returns the new task id."""
+        if not self.queue_file or not os.path.exists(self.queue_file):
+            return 0
+        try:
+            with open(self.queue_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except Exception as e:
+            print(f"Failed to read download queue: {e}")
+            return 0
+        restored = 0
+        for rec in records:
+            kind = rec.get("kind")
+            if kind not in self._handlers:
+                continue
+            type_str = self._handlers[kind][3]
+            task_id = make_ui_task(rec.get("name", "Download"), type_str)
+            task = self.submit(kind, rec.get("name", ""), rec.get("payload", {}), rec.get("priority", PRIORITY_MOD),
+                               task_id=task_id, paused=rec.get("paused", False))
+            task.attempts = rec.get("attempts", 0)
+            restored += 1
+        return restored
+
+    # --- Internals ---
+    def _ui(self, task_id, **kwargs):
+        self.progress.update(task_id, **kwargs)
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._worker, name=f"DownloadWorker-{len(self._threads)}", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _limit(self, kind):
+        _, attr, default, _, _ = self._handlers[kind]
+        try:
+            return max(1, int(getattr(self.app, attr, default)))
+        except (TypeError, ValueError):
+            return default
+
+    def _pick(self):
+        """Next runnable task, or (None, seconds until a backed-off task becomes due)."""
+        now = time.monotonic()
+        best = None
+        wake = None
+        for task in self._tasks.values():
+            if task.state != STATE_QUEUED:
+                continue
+            if task.not_before > now:
+                wake = min(wake or 1e9, task.not_before - now)
+                continue
+            if self._active.get(task.kind, 0) >= self._limit(task.kind):
+                continue
+            if self._launch_blocking and task.priority > PRIORITY_LAUNCH:
+                continue
+            if best is None or (task.priority, task.seq) < (best.priority, best.seq):
+                best = task
+        return best, wake
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                task, wake = self._pick()
+                while task is None:
+                    self._cond.wait(timeout=wake)
+                    task, wake = self._pick()
+                task.state = STATE_RUNNING
+                self._active[task.kind] = self._active.get(task.kind, 0) + 1
+            self._run(task)
+
+    def _run(self, task):
+        self._ui(task.id, detail="Starting...")
+        handler = self._handlers[task.kind][0]
+        error = None
+        try:
+            handler(task)
+        except BaseException as e:
+            error = e
+
+        retry_in = None
+        with self._cond:
+            self._active[task.kind] -= 1
+            if error is None:
+                task.state = STATE_DONE
+            elif task.cancel_event.is_set():
+                task.state = STATE_CANCELLED
+            elif task.pause_event.is_set():
+                task.state = STATE_PAUSED
+            elif isinstance(error, TaskFailed) or task.attempts >= self.max_retries:
+                task.state = STATE_FAILED
+                task.error = error
+            else:
+                task.attempts += 1
+                retry_in = self.backoff * (2 ** (task.attempts - 1))
+                task.not_before = time.monotonic() + retry_in
+                task.state = STATE_QUEUED
+            if task.state in (STATE_DONE, STATE_FAILED, STATE_CANCELLED):
+                self._tasks.pop(task.id, None)
+            self._persist()
+            self._cond.notify_all()
+
+        if task.state == STATE_PAUSED:
+            self._ui(task.id, detail="Paused")
+        elif retry_in is not None:
+            print(f"Download '{task.name}' failed ({error}), retrying in {retry_in:.0f}s")
+            self._ui(task.id, detail=f"Retrying in {retry_in:.0f}s ({task.attempts}/{self.max_retries})...")
+        elif task.state != STATE_QUEUED:
+            self._finish(task)
+
+    def _finish(self, task):
+        if task.on_finish:
+            try:
+                task.on_finish(task)
+            except Exception as e:
+                print(f"Download finish callback failed: {e}")
+
+    def _persist(self):
+        """Write the unfinished tasks (caller holds the lock)."""
+        if not self.queue_file:
+            return
+        records = [t.to_record() for t in sorted(self._tasks.values(), key=lambda t: (t.priority, t.seq))]
+        tmp_path = f"{self.queue_file}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=4)
+            os.replace(tmp_path, self.queue_file)
+        except Exception as e:
+            print(f"Failed to save download queue: {e}")
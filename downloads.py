@@ -0,0 +1,416 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from typing import Callable, Optional
+
+from bandwidth import get_limiter
+
+CHUNK_SIZE = 64 * 1024
+# Strongest hash first; mrpack indexes carry both
+HASH_PREFERENCE = ("sha512", "sha1")
+
+
+class DownloadCancelled(Exception):
+    def __init__(self, message="Cancelled"):
+        super().__init__(message)
+
+
+class HashMismatch(Exception):
+    pass
+
+
+class IncompleteDownload(OSError):
+    """The server closed the stream early; treated like any other network error and resumed."""
+
+
+# Statuses worth retrying; anything else >= 400 fails the download immediately
+RETRYABLE_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+
+def pick_hash(hashes):
+    """(algorithm, expected hex digest) for the strongest hash available, or (None, None)."""
+    for algo in HASH_PREFERENCE:
+        value = (hashes or {}).get(algo)
+        if value:
+            return algo, value.lower()
+    return None, None
+
+
+def _hash_file(path, algo):
+    h = hashlib.new(algo)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h
+
+
+def file_matches(path, hashes=None, size=None):
+    """True if `path` exists and matches the expected size/hash (whatever is known)."""
+    try:
+        if not os.path.isfile(path):
+            return False
+        if size is not None and os.path.getsize(path) != size:
+            return False
+        algo, expected = pick_hash(hashes)
+        if not algo:
+            return size is not None
+        return _hash_file(path, algo).hexdigest() == expected
+    except OSError:
+        return False
+
+
+def _load_part_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_part_meta(meta_path, meta):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _remove_quietly(*paths):
+    for path in paths:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def _content_range(response):
+    """(start, total) from a 206 Content-Range header, or (None, None)."""
+    m = re.match(r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", ""))
+    if not m:
+        return None, None
+    return int(m.group(1)), (int(m.group(2)) if m.group(2) != "*" else None)
+
+
+def resumable_download(http, url, dest, size=None, hashes=None, should_cancel=None,
+                       on_progress=None, attempts=5, chunk_size=CHUNK_SIZE, timeout=None, limiter=None):
+    """
+    Download `url` to `dest` through `<dest>.part`, resuming with HTTP Range requests.
+
+    A sidecar `<dest>.part.json` records the URL, the expected size/hashes and the
+    server's ETag/Last-Modified, so an interrupted download continues where it
+    stopped, both after a dropped connection (retried here up to `attempts` times)
+    and on a later run. The part is only resumed while the server still serves the
+    same content (If-Range); otherwise the download restarts from zero.
+    Cancelling keeps the part for next time; a size/hash mismatch discards it.
+    The hash is computed while writing (an existing part is hashed once when
+    resumed), so the finished file is never read back.
+
+    Every chunk is drawn from the process-wide bandwidth limiter (or `limiter`).
+    `on_progress(delta, have, total)` is called for every chunk written.
+    """
+    limiter = limiter or get_limiter()
+    part_path = dest + ".part"
+    meta_path = part_path + ".json"
+    hashes = hashes or {}
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+
+    # Same content if the hashes match (mirror URLs may differ), otherwise same URL
+    meta = _load_part_meta(meta_path)
+    if meta and (meta.get("hashes") or {}) == hashes and meta.get("size") == size \
+            and (hashes or meta.get("url") == url):
+        pass
+    else:
+        meta = {}
+        _remove_quietly(part_path, meta_path)
+
+    algo, expected = pick_hash(hashes)
+    hasher, hashed = None, 0  # running hash of the first `hashed` bytes of the part
+    use_range = True
+    failures = 0
+    while True:
+        if should_cancel and should_cancel():
+            raise DownloadCancelled()
+        have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if size is not None and have > size:
+            _remove_quietly(part_path)
+            have = 0
+
+        headers = {}
+        if have and use_range:
+            headers["Range"] = f"bytes={have}-"
+            etag = meta.get("etag") or ""
+            validator = etag if etag and not etag.startswith("W/") else meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+        kwargs = {"timeout": timeout} if timeout else {}
+
+        try:
+            with http.get(url, stream=True, headers=headers, **kwargs) as r:
+                if r.status_code == 416 and have:
+                    # Nothing left to send; the size/hash check below decides if the part is good
+                    break
+                if r.status_code >= 400:
+                    if r.status_code in RETRYABLE_STATUSES:
+                        raise IncompleteDownload(f"HTTP {r.status_code}")
+                    raise Exception(f"HTTP {r.status_code} for {url}")
+
+                start, total = _content_range(r) if r.status_code == 206 else (None, None)
+                if r.status_code == 206 and (not headers.get("Range") or start != have):
+                    # A partial body that doesn't continue the part: the range request failed
+                    if not headers.get("Range"):
+                        raise Exception(f"Unexpected partial response for {url}")
+                    print(f"Server answered the wrong range for {os.path.basename(dest)}, restarting it")
+                    use_range = False
+                    continue
+                if have and r.status_code == 206:
+                    mode = "ab"
+                    if algo and (hasher is None or hashed != have):
+                        hasher, hashed = _hash_file(part_path, algo), have
+                else:
+                    # Server ignored the range or the content changed: start over
+                    have = 0
+                    mode = "wb"
+                    hasher, hashed = (hashlib.new(algo) if algo else None), 0
+                    length = r.headers.get("Content-Length")
+                    total = int(length) if length and length.isdigit() else None
+                total = size if size is not None else total
+
+                meta = {
+                    "url": url,
+                    "size": size,
+                    "hashes": hashes,
+                    "total": total,
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                }
+                _save_part_meta(meta_path, meta)
+
+                with open(part_path, mode) as f:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        if should_cancel and should_cancel():
+                            raise DownloadCancelled()
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        have += len(chunk)
+                        if hasher:
+                            hasher.update(chunk)
+                            hashed = have
+                        if not limiter.consume(len(chunk), url, should_cancel):
+                            raise DownloadCancelled()
+                        if on_progress:
+                            on_progress(len(chunk), have, total)
+
+            if total is not None and have < total:
+                raise IncompleteDownload(f"connection closed at {have}/{total} bytes")
+            break
+        except OSError as e:
+            # requests' connection/chunked-encoding errors are OSErrors too
+            failures += 1
+            if failures >= attempts:
+                raise
+            print(f"Download interrupted ({e}), resuming {os.path.basename(dest)} from {have} bytes")
+            time.sleep(min(8.0, 0.5 * (2 ** failures)))
+
+    have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if algo and os.path.exists(part_path) and (hasher is None or hashed != have):
+        # Nothing was streamed in this call (416 on a complete part)
+        hasher, hashed = _hash_file(part_path, algo), have
+    if (size is not None and have != size) or (algo and (hasher is None or hasher.hexdigest() != expected)):
+        _remove_quietly(part_path, meta_path)
+        raise HashMismatch(f"{os.path.basename(dest)}: downloaded file does not match the expected size/hash")
+    os.replace(part_path, dest)
+    _remove_quietly(meta_path)
+    return dest
+
+
+def format_rate(bytes_per_sec):
+    if bytes_per_sec >= 1024 * 1024:
+        return f"{bytes_per_sec / (1024 * 1024):.1f} MB/s"
+    return f"{bytes_per_sec / 1024:.0f} KB/s"
+
+
+def format_eta(seconds):
+    seconds = int(seconds + 0.5)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class DownloadEntry:
+    def __init__(self, urls, dest, hashes=None, size=None, name=None):
+        self.urls = [u for u in urls if u]
+        self.dest = dest
+        self.hashes = hashes or {}
+        self.size = size
+        self.name = name or os.path.basename(dest)
+
+
+class ParallelDownloader:
+    """
+    Downloads a batch of files on a bounded worker pool.
+    Each file goes through `resumable_download` and is only moved into place
+    once it matches the expected sha512/sha1. On a failure or a hash mismatch
+    the entry's next mirror URL is tried. The first file that fails on
+    every URL stops the batch and its error is raised from `run()`.
+
+    With an ObjectStore, files whose sha512 is already cached are linked in from
+    the store instead of downloaded, and new downloads are added to it.
+
+    `on_progress(state)` is called from worker threads (at most every
+    `progress_interval` seconds, plus once per finished file).
+    """
+    def __init__(self, http, workers=3, cancel_event: Optional[threading.Event] = None,
+                 on_progress: Optional[Callable[[dict], None]] = None, progress_interval=0.25,
+                 store=None):
+        self.http = http
+        self.store = store
+        self.workers = max(1, int(workers))
+        self.cancel_event = cancel_event
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+        self._window = collections.deque()  # (monotonic time, bytes) over the last few seconds
+        self._last_report = 0.0
+        self.files_total = 0
+        self.files_done = 0
+        self.files_skipped = 0
+        self.files_cached = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.started = 0.0
+
+    def _cancelled(self):
+        return self._abort.is_set() or (self.cancel_event is not None and self.cancel_event.is_set())
+
+    def rate(self, window=3.0):
+        """Aggregate bytes/s over the last `window` seconds across all workers."""
+        now = time.monotonic()
+        with self._lock:
+            while self._window and now - self._window[0][0] > window:
+                self._window.popleft()
+            if not self._window:
+                return 0.0
+            span = max(now - self._window[0][0], min(window, now - self.started), 0.001)
+            return sum(n for _, n in self._window) / span
+
+    def state(self):
+        return {
+            "files_done": self.files_done,
+            "files_total": self.files_total,
+            "files_skipped": self.files_skipped,
+            "files_cached": self.files_cached,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "rate": self.rate(),
+        }
+
+    def _report(self, force=False):
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < self.progress_interval:
+                return
+            self._last_report = now
+        try:
+            self.on_progress(self.state())
+        except Exception:
+            pass
+
+    def _add_bytes(self, n):
+        with self._lock:
+            self.bytes_done += n
+            self._window.append((time.monotonic(), n))
+
+    def run(self, entries):
+        """Download every entry; returns the list of entries (skipped ones included)."""
+        entries = list(entries)
+        self.files_total = len(entries)
+        self.bytes_total = sum(e.size or 0 for e in entries)
+        self.started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Download") as pool:
+            futures = [pool.submit(self._download, e) for e in entries]
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            if pending:
+                # Something failed: stop the running workers and drop the queued ones
+                self._abort.set()
+                for fut in pending:
+                    fut.cancel()
+            wait(futures)
+
+        self._report(force=True)
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise DownloadCancelled()
+        errors = [f.exception() for f in futures if not f.cancelled() and f.exception() is not None]
+        real_errors = [e for e in errors if not isinstance(e, DownloadCancelled)]
+        if real_errors or errors:
+            raise (real_errors or errors)[0]
+        return entries
+
+    def _download(self, entry):
+        if self._cancelled():
+            raise DownloadCancelled()
+        os.makedirs(os.path.dirname(entry.dest) or ".", exist_ok=True)
+
+        sha512 = entry.hashes.get("sha512")
+        if file_matches(entry.dest, entry.hashes, entry.size):
+            if self.store and sha512:
+                self.store.adopt(entry.dest, sha512)
+            with self._lock:
+                self.files_done += 1
+                self.files_skipped += 1
+                self.bytes_done += entry.size or 0
+            self._report(force=True)
+            return entry
+
+        if self.store and sha512 and self.store.materialize(sha512, entry.dest):
+            with self._lock:
+                self.files_done += 1
+                self.files_cached += 1
+                self.bytes_done += entry.size or 0
+            self._report(force=True)
+            return entry
+
+        errors = []
+        for url in entry.urls:
+            try:
+                self._fetch(url, entry)
+                if self.store and sha512:
+                    self.store.adopt(entry.dest, sha512)
+                with self._lock:
+                    self.files_done += 1
+                self._report(force=True)
+                return entry
+            except DownloadCancelled:
+                raise
+            except Exception as e:
+                errors.append(f"{url}: {e}")
+        if not entry.urls:
+            errors.append("no download URL")
+        raise Exception(f"Failed to download {entry.name} ({'; '.join(errors)})")
+
+    def _fetch(self, url, entry):
+        received = 0
+
+        def on_progress(delta, have, total):
+            nonlocal received
+            received += delta
+            self._add_bytes(delta)
+            self._report()
+
+        try:
+            resumable_download(self.http, url, entry.dest, size=entry.size, hashes=entry.hashes,
+                               should_cancel=self._cancelled, on_progress=on_progress)
+        except BaseException:
+            # Don't count bytes of a rejected attempt towards the batch total
+            with self._lock:
+                self.bytes_done -= received
+            raise
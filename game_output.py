@@ -0,0 +1,76 @@
+import threading
+import collections
+from typing import Callable, Optional
+
+
+class GameOutputPump:
+    """
+    Moves game stdout to the UI without flooding the Tk event queue.
+    A reader thread fills a bounded ring buffer; the Tk thread drains it once per
+    frame and hands the whole batch to `sink` in a single call.
+    """
+    def __init__(self, root, stream, sink: Callable[[list, int], None],
+                 on_line: Optional[Callable[[str], None]] = None,
+                 max_lines=5000, interval_ms=50):
+        self.root = root
+        self.stream = stream
+        self.sink = sink
+        self.on_line = on_line
+        self.interval_ms = max(16, int(interval_ms))
+        self._buffer = collections.deque(maxlen=max(1, int(max_lines)))
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._eof = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self.total_lines = 0
+
+    def start(self):
+        self._reader = threading.Thread(target=self._read_loop, name="GameOutputReader", daemon=True)
+        self._reader.start()
+        self.root.after(self.interval_ms, self._tick)
+
+    def join(self, timeout=None):
+        """Wait until the stream hit EOF (the UI drain finishes on its own)."""
+        if self._reader:
+            self._reader.join(timeout)
+
+    def _read_loop(self):
+        try:
+            for line in self.stream:
+                line = line.rstrip("\r\n")
+                self.total_lines += 1
+                if self.on_line:
+                    try:
+                        self.on_line(line)
+                    except Exception:
+                        pass
+                with self._lock:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self._dropped += 1
+                    self._buffer.append(line)
+        except (OSError, ValueError):
+            pass  # Stream closed under us
+        finally:
+            self._eof.set()
+
+    def _drain(self):
+        with self._lock:
+            if not self._buffer and not self._dropped:
+                return
+            lines = list(self._buffer)
+            self._buffer.clear()
+            dropped, self._dropped = self._dropped, 0
+        try:
+            self.sink(lines, dropped)
+        except Exception:
+            pass
+
+    def _tick(self):
+        self._drain()
+        if self._eof.is_set():
+            self._drain()
+            return
+        try:
+            self.root.after(self.interval_ms, self._tick)
+        except Exception:
+            pass  # Root destroyed
@@ -0,0 +1,144 @@
+import threading
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from config import CURRENT_VERSION
+
+USER_AGENT = f"AmneDev/NewLauncher/{CURRENT_VERSION}"
+# (connect, read) seconds; read applies between bytes, so large streamed downloads are fine
+DEFAULT_TIMEOUT = (8, 30)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_counter_lock = threading.Lock()
+_connections_opened = 0
+
+
+def _count_new_connection():
+    global _connections_opened
+    with _counter_lock:
+        _connections_opened += 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report every new TCP/TLS connection."""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """
+    Launcher-wide HTTP client. Keeps one pooled requests.Session per host so
+    repeated downloads from the same CDN reuse their TCP/TLS connections, and
+    applies a default timeout, retry with backoff and a common User-Agent.
+
+    Idempotent requests (GET/HEAD) are retried on connection errors and on
+    429/5xx responses; POSTs are only retried when the connection failed.
+    """
+    def __init__(self, user_agent=USER_AGENT, timeout=DEFAULT_TIMEOUT, retries=3, backoff=0.5, pool_size=16):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    def _make_retry(self):
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+    def session(self, url):
+        """Pooled session for the URL's host (created on first use)."""
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                sess = requests.Session()
+                sess.headers.update({"User-Agent": self.user_agent})
+                adapter = _PooledAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                         max_retries=self._make_retry())
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                self._sessions[host] = sess
+            return sess
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self.requests_sent += 1
+        return self.session(url).request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """Requests sent vs. connections opened; the difference went over a reused connection."""
+        with _counter_lock:
+            opened = _connections_opened
+        with self._lock:
+            sent = self.requests_sent
+            hosts = len(self._sessions)
+        return {
+            "requests": sent,
+            "connections": opened,
+            "reused": max(0, sent - opened),
+            "hosts": hosts,
+        }
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+        for sess in sessions:
+            try:
+                sess.close()
+            except Exception:
+                pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared HttpClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
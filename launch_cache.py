@@ -0,0 +1,426 @@
+import os
+import sys
+import json
+import hashlib
+import platform
+import threading
+from typing import Any, Optional
+
+JAVA_BINARIES = ("java.exe", "java") if sys.platform == "win32" else ("java",)
+
+# Mojang runtime component -> Java major version (used when no `release` file exists)
+COMPONENT_MAJOR_VERSIONS = {
+    "jre-legacy": 8,
+    "java-runtime-alpha": 16,
+    "java-runtime-beta": 17,
+    "java-runtime-gamma": 17,
+    "java-runtime-gamma-snapshot": 17,
+    "java-runtime-delta": 21,
+}
+
+
+def _host_arch():
+    machine = platform.machine().lower()
+    if machine in ("amd64", "x86_64", "x64"):
+        return "x86_64"
+    if machine in ("arm64", "aarch64"):
+        return "aarch64"
+    if machine in ("i386", "i686", "x86"):
+        return "x86"
+    return machine
+
+
+def _parse_release_file(java_home):
+    """Read JAVA_VERSION / OS_ARCH from a JDK/JRE `release` file."""
+    info = {}
+    path = os.path.join(java_home, "release")
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                info[key.strip()] = value.strip().strip('"')
+    except OSError:
+        pass
+    return info
+
+
+def _major_from_version(version_str):
+    if not version_str:
+        return None
+    parts = version_str.split(".")
+    try:
+        if parts[0] == "1" and len(parts) > 1:
+            return int(parts[1])  # 1.8.0_51 -> 8
+        return int(parts[0].split("_")[0].split("+")[0].split("-")[0])
+    except ValueError:
+        return None
+
+
+class JavaRuntimeIndex:
+    """
+    Persistent index of Java executables found under `<minecraft_dir>/runtime`.
+    The tree is only walked again when the runtime directory (or one of its
+    component folders) changes, so PLAY never pays for an os.walk on a warm index.
+    """
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = {}
+        self._loaded = False
+        self.scans = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._data = data
+        except Exception as e:
+            print(f"Failed to read Java runtime index: {e}")
+            self._data = {}
+
+    def _save(self):
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"Failed to write Java runtime index: {e}")
+
+    @staticmethod
+    def _signature(runtime_dir):
+        """mtime of the runtime dir and of each component folder directly below it."""
+        try:
+            sig = [["", os.stat(runtime_dir).st_mtime]]
+            with os.scandir(runtime_dir) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        sig.append([entry.name, entry.stat().st_mtime])
+            sig.sort()
+            return sig
+        except OSError:
+            return None
+
+    @staticmethod
+    def _describe(java_path, runtime_dir):
+        bin_dir = os.path.dirname(java_path)
+        java_home = os.path.dirname(bin_dir)
+        release = _parse_release_file(java_home)
+        major = _major_from_version(release.get("JAVA_VERSION", ""))
+        rel = os.path.relpath(java_path, runtime_dir)
+        component = rel.split(os.sep)[0]
+        if major is None:
+            major = COMPONENT_MAJOR_VERSIONS.get(component)
+        arch = release.get("OS_ARCH") or _host_arch()
+        if arch == "amd64":
+            arch = "x86_64"
+        try:
+            mtime = os.path.getmtime(java_path)
+        except OSError:
+            mtime = 0
+        return {
+            "path": java_path,
+            "component": component,
+            "major": major,
+            "arch": arch,
+            "mtime": mtime,
+        }
+
+    def _scan(self, runtime_dir):
+        self.scans += 1
+        found = []
+        for root, dirs, files in os.walk(runtime_dir):
+            for name in JAVA_BINARIES:
+                if name in files and os.path.basename(root) == "bin":
+                    found.append(self._describe(os.path.join(root, name), runtime_dir))
+                    break
+        return found
+
+    def get_runtimes(self, runtime_dir):
+        """Return every indexed runtime for `runtime_dir`, rescanning only if it changed."""
+        runtime_dir = os.path.abspath(runtime_dir)
+        if not os.path.isdir(runtime_dir):
+            return []
+
+        with self._lock:
+            self._load()
+            sig = self._signature(runtime_dir)
+            entry = self._data.get(runtime_dir)
+            if entry and entry.get("signature") == sig:
+                runtimes = entry.get("runtimes", [])
+                if all(os.path.exists(r.get("path", "")) for r in runtimes):
+                    return runtimes
+
+            runtimes = self._scan(runtime_dir)
+            self._data[runtime_dir] = {"signature": sig, "runtimes": runtimes}
+            self._save()
+            return runtimes
+
+    def find_java(self, runtime_dir, major: Optional[int] = None):
+        """
+        Pick the best Java executable: exact major version match if requested,
+        otherwise the newest runtime. Runtimes matching the host arch win ties.
+        """
+        runtimes = self.get_runtimes(runtime_dir)
+        if not runtimes:
+            return None
+
+        host = _host_arch()
+        def rank(r):
+            return (r.get("arch") == host, r.get("major") or 0)
+
+        if major is not None:
+            matching = [r for r in runtimes if r.get("major") == major]
+            if matching:
+                return max(matching, key=rank)["path"]
+        return max(runtimes, key=rank)["path"]
+
+    def invalidate(self, runtime_dir=None):
+        with self._lock:
+            self._load()
+            if runtime_dir is None:
+                self._data = {}
+            else:
+                self._data.pop(os.path.abspath(runtime_dir), None)
+            self._save()
+
+
+def _detect_loader(version_id, data):
+    """Best-effort loader kind for a version JSON: fabric, quilt, neoforge, forge, vanilla or other."""
+    vid = version_id.lower()
+    main_class = str(data.get("mainClass", "")).lower()
+    if "quilt" in vid or "org.quiltmc" in main_class:
+        return "quilt"
+    if "fabric" in vid or "net.fabricmc" in main_class:
+        return "fabric"
+    if "neoforge" in vid or "neoforged" in main_class:
+        return "neoforge"
+    if "forge" in vid or "cpw.mods" in main_class or "net.minecraftforge" in main_class:
+        return "forge"
+    if data.get("inheritsFrom"):
+        return "other"
+    return "vanilla"
+
+
+class InstalledVersionIndex:
+    """
+    In-memory index of `<minecraft_dir>/versions`. The directory listing is only
+    re-read when the `versions/` mtime changes, and each version JSON is only
+    re-parsed when its own mtime changes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs: dict[str, Any] = {}  # versions_dir -> {"mtime", "ids", "entries"}
+        self.parses = 0
+
+    def _parse(self, version_id, json_path, json_mtime):
+        self.parses += 1
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        lib_names = sorted(str(lib.get("name", "")) for lib in data.get("libraries", []) if isinstance(lib, dict))
+        return {
+            "id": data.get("id", version_id),
+            "type": data.get("type", "release"),
+            "releaseTime": data.get("releaseTime", ""),
+            "inheritsFrom": data.get("inheritsFrom"),
+            "loader": _detect_loader(version_id, data),
+            "mtime": json_mtime,
+            "libraries": hashlib.sha1("\n".join(lib_names).encode("utf-8")).hexdigest(),
+        }
+
+    def get_versions(self, minecraft_dir):
+        """List of {id, type, releaseTime, inheritsFrom, loader} for every installed version."""
+        versions_dir = os.path.abspath(os.path.join(minecraft_dir, "versions"))
+        try:
+            dir_mtime = os.stat(versions_dir).st_mtime
+        except OSError:
+            return []
+
+        with self._lock:
+            state = self._dirs.get(versions_dir)
+            if state is None or state["mtime"] != dir_mtime:
+                try:
+                    ids = sorted(e.name for e in os.scandir(versions_dir) if e.is_dir())
+                except OSError:
+                    ids = []
+                old_entries = state["entries"] if state else {}
+                state = {"mtime": dir_mtime, "ids": ids, "entries": {k: v for k, v in old_entries.items() if k in ids}}
+                self._dirs[versions_dir] = state
+
+            result = []
+            for vid in state["ids"]:
+                json_path = os.path.join(versions_dir, vid, f"{vid}.json")
+                try:
+                    json_mtime = os.stat(json_path).st_mtime
+                except OSError:
+                    state["entries"].pop(vid, None)
+                    continue
+                cached = state["entries"].get(vid)
+                if cached is None or cached[0] != json_mtime:
+                    try:
+                        cached = (json_mtime, self._parse(vid, json_path, json_mtime))
+                    except Exception:
+                        state["entries"].pop(vid, None)
+                        continue
+                    state["entries"][vid] = cached
+                result.append(dict(cached[1]))
+            return result
+
+    def get_ids(self, minecraft_dir):
+        return [v["id"] for v in self.get_versions(minecraft_dir)]
+
+    def get_chain(self, minecraft_dir, version_id):
+        """
+        The inheritsFrom chain for `version_id` as [[id, json mtime, libraries hash], ...].
+        Returns [] if any link is missing (i.e. the version is not fully installed).
+        """
+        by_id = {v["id"]: v for v in self.get_versions(minecraft_dir)}
+        chain = []
+        current = version_id
+        while current:
+            v = by_id.get(current)
+            if v is None or any(link[0] == current for link in chain):
+                return []
+            chain.append([current, v["mtime"], v["libraries"]])
+            current = v.get("inheritsFrom")
+        return chain
+
+    def find_loader_version(self, minecraft_dir, loader, mc_version):
+        """
+        Installed version id for `loader` ("fabric"/"forge"/...) on top of `mc_version`.
+        Prefers an exact inheritsFrom match and falls back to the id naming heuristic.
+        """
+        loader = loader.lower()
+        versions = self.get_versions(minecraft_dir)
+        for v in versions:
+            if v["loader"] == loader and v.get("inheritsFrom") == mc_version:
+                return v["id"]
+        for v in versions:
+            if loader in v["id"].lower() and mc_version in v["id"]:
+                return v["id"]
+        return None
+
+    def invalidate(self, minecraft_dir=None):
+        with self._lock:
+            if minecraft_dir is None:
+                self._dirs = {}
+            else:
+                self._dirs.pop(os.path.abspath(os.path.join(minecraft_dir, "versions")), None)
+
+
+# Sentinels substituted into a cached command on every launch
+CMD_USERNAME = "${nlc_username}"
+CMD_UUID = "${nlc_uuid}"
+CMD_TOKEN = "${nlc_token}"
+CMD_JAVAAGENT = "${nlc_javaagent}"
+
+
+class LaunchCommandCache:
+    """
+    Persistent cache of generated launch commands, one slot per installation.
+    Commands are generated with placeholder username/uuid/token (and javaagent)
+    values, so a cached vector only needs those fields substituted per launch.
+    """
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = {}
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._data = data
+        except Exception as e:
+            print(f"Failed to read launch command cache: {e}")
+            self._data = {}
+
+    def _save(self):
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"Failed to write launch command cache: {e}")
+
+    @staticmethod
+    def make_key(chain, jvm_args, account_type, game_dir, injected=False):
+        raw = json.dumps({
+            "chain": chain,
+            "jvm": list(jvm_args),
+            "account": account_type,
+            "game_dir": os.path.abspath(game_dir),
+            "injected": bool(injected),
+        }, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def template_options(options, injected=False):
+        """Copy of launch `options` with per-launch fields replaced by placeholders."""
+        templ = dict(options)
+        templ["username"] = CMD_USERNAME
+        templ["uuid"] = CMD_UUID
+        templ["token"] = CMD_TOKEN
+        jvm = list(templ.get("jvmArguments", []))
+        if injected:
+            jvm.append(CMD_JAVAAGENT)
+        templ["jvmArguments"] = jvm
+        return templ
+
+    @staticmethod
+    def render(argv, username, uuid_, token, javaagent_arg=None):
+        out = []
+        for arg in argv:
+            if arg == CMD_JAVAAGENT:
+                if javaagent_arg:
+                    out.append(javaagent_arg)
+                continue
+            out.append(arg.replace(CMD_USERNAME, username).replace(CMD_UUID, uuid_).replace(CMD_TOKEN, token))
+        return out
+
+    def get(self, slot, key):
+        with self._lock:
+            self._load()
+            entry = self._data.get(slot)
+            argv = entry.get("argv") if entry and entry.get("key") == key else None
+            # The java executable can disappear (runtime reinstall) without the JSONs changing
+            if argv and (os.path.isabs(argv[0]) and not os.path.exists(argv[0])):
+                argv = None
+            if argv:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return list(argv) if argv else None
+
+    def put(self, slot, key, argv):
+        with self._lock:
+            self._load()
+            self._data[slot] = {"key": key, "argv": list(argv)}
+            self._save()
+
+    def invalidate(self, slot=None):
+        with self._lock:
+            self._load()
+            if slot is None:
+                self._data = {}
+            else:
+                self._data.pop(slot, None)
+            self._save()
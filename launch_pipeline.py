@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional
+
+STAGE_PENDING = "pending"
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+STAGE_SKIPPED = "skipped"
+
+
+class LaunchStage:
+    def __init__(self, name, func, deps=(), label=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.label = label or name.replace("_", " ").title()
+        self.state = STAGE_PENDING
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.started = 0.0
+        self.finished = 0.0
+
+    @property
+    def duration(self):
+        if self.started and self.finished:
+            return self.finished - self.started
+        return 0.0
+
+
+class LaunchPipeline:
+    """
+    Runs launch preparation stages on a worker pool. A stage starts as soon as
+    all of its dependencies are done, so the total time is the longest chain of
+    dependent stages rather than the sum of all of them.
+
+    Each stage function receives the dict of results gathered so far.
+    """
+    def __init__(self, max_workers=4, on_status: Optional[Callable[[list], None]] = None):
+        self.max_workers = max_workers
+        self.on_status = on_status
+        self.stages: dict[str, LaunchStage] = {}
+        self.results: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, func, deps=(), label=None):
+        self.stages[name] = LaunchStage(name, func, deps, label)
+        return self
+
+    def _notify(self):
+        if self.on_status:
+            try:
+                self.on_status(list(self.stages.values()))
+            except Exception:
+                pass
+
+    def _run_stage(self, stage):
+        stage.started = time.monotonic()
+        with self._lock:
+            stage.state = STAGE_RUNNING
+        self._notify()
+        try:
+            with self._lock:
+                snapshot = dict(self.results)
+            return stage.func(snapshot)
+        finally:
+            stage.finished = time.monotonic()
+
+    def run(self):
+        """Run every stage; raises the first stage error once all running stages have settled."""
+        for stage in self.stages.values():
+            missing = [d for d in stage.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {', '.join(missing)}")
+
+        self._notify()
+        first_error: Optional[BaseException] = None
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="LaunchStage") as pool:
+            while True:
+                with self._lock:
+                    for stage in self.stages.values():
+                        if stage.state != STAGE_PENDING:
+                            continue
+                        dep_states = [self.stages[d].state for d in stage.deps]
+                        if any(s in (STAGE_FAILED, STAGE_SKIPPED) for s in dep_states):
+                            stage.state = STAGE_SKIPPED
+                        elif all(s == STAGE_DONE for s in dep_states):
+                            stage.state = STAGE_RUNNING
+                            running[pool.submit(self._run_stage, stage)] = stage
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    stage = running.pop(fut)
+                    err = fut.exception()
+                    with self._lock:
+                        if err is None:
+                            stage.result = fut.result()
+                            self.results[stage.name] = stage.result
+                            stage.state = STAGE_DONE
+                        else:
+                            stage.error = err
+                            stage.state = STAGE_FAILED
+                            if first_error is None:
+                                first_error = err
+                self._notify()
+
+        self._notify()
+        if first_error is not None:
+            raise first_error
+        return self.results
+
+    def timings(self):
+        """Per-stage wall time in seconds."""
+        return {name: stage.duration for name, stage in self.stages.items()}
+
+    @staticmethod
+    def format_status(stages):
+        marks = {
+            STAGE_PENDING: "·",
+            STAGE_RUNNING: "…",
+            STAGE_DONE: "✓",
+            STAGE_FAILED: "✗",
+            STAGE_SKIPPED: "–",
+        }
+        return "   ".join(f"{marks.get(s.state, '?')} {s.label}" for s in stages)
+
+
+# Launch phases shown in the metrics view, in launch order
+LAUNCH_PHASES = [
+    ("java", "Java"),
+    ("version_check", "Version check"),
+    ("loader_install", "Loader install"),
+    ("auth", "Auth"),
+    ("injector", "Injector"),
+    ("game_dir", "Modpack / game dir"),
+    ("prepare", "Preparation (total)"),
+    ("command", "Command"),
+    ("popen", "Process spawn"),
+]
+# Milestones measured from the PLAY click
+LAUNCH_MARKS = [
+    ("first_output", "First output"),
+    ("main_menu", "Main menu"),
+]
+# Game output line -> milestone
+GAME_OUTPUT_MARKERS = {
+    "Sound engine started": "main_menu",
+}
+
+
+class LaunchTimer:
+    """Monotonic phase durations and milestones for a single launch (thread-safe)."""
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.started_at = datetime.now()
+        self.phases: dict[str, float] = {}
+        self.marks: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def mark(self, name):
+        """Record a milestone (seconds since PLAY); only the first occurrence counts."""
+        with self._lock:
+            if name not in self.marks:
+                self.marks[name] = time.monotonic() - self.t0
+                return True
+            return False
+
+    def to_record(self, **meta):
+        with self._lock:
+            record = {
+                "started_at": self.started_at.isoformat(timespec="milliseconds"),
+                "phases": {k: round(v, 4) for k, v in self.phases.items()},
+                "marks": {k: round(v, 4) for k, v in self.marks.items()},
+            }
+        record.update(meta)
+        return record
+
+
+class LaunchHistory:
+    """One JSON record per launch under `<config_dir>/metrics/`."""
+    def __init__(self, metrics_dir, keep=200):
+        self.metrics_dir = metrics_dir
+        self.keep = keep
+
+    def save(self, record):
+        """Write (or overwrite) the record for one launch, keyed by its start time."""
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            stamp = record.get("started_at", datetime.now().isoformat(timespec="milliseconds"))
+            # Milliseconds plus the pid keep launches started in the same instant (e.g. two --dry-run processes) apart
+            fname = f"launch_{stamp.replace(':', '-')}_{os.getpid()}.json"
+            path = os.path.join(self.metrics_dir, fname)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=4)
+            os.replace(tmp_path, path)
+            self._prune()
+        except Exception as e:
+            print(f"Failed to save launch metrics: {e}")
+
+    def _prune(self):
+        files = sorted(f for f in os.listdir(self.metrics_dir) if f.startswith("launch_") and f.endswith(".json"))
+        for f in files[:-self.keep]:
+            try: os.remove(os.path.join(self.metrics_dir, f))
+            except OSError: pass
+
+    def load_recent(self, n=20):
+        """Newest first."""
+        if not os.path.isdir(self.metrics_dir):
+            return []
+        files = sorted((f for f in os.listdir(self.metrics_dir) if f.startswith("launch_") and f.endswith(".json")), reverse=True)
+        records = []
+        for f in files[:n]:
+            try:
+                with open(os.path.join(self.metrics_dir, f), "r", encoding="utf-8") as fh:
+                    records.append(json.load(fh))
+            except Exception:
+                continue
+        return records
+
+    @staticmethod
+    def _percentile(values, pct):
+        ordered = sorted(values)
+        if not ordered:
+            return None
+        rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.4999)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    @staticmethod
+    def summarize(records):
+        """{name: (p50, p95, samples)} over phases and milestones."""
+        buckets: dict[str, list] = {}
+        for rec in records:
+            for group in ("phases", "marks"):
+                for name, secs in rec.get(group, {}).items():
+                    buckets.setdefault(name, []).append(secs)
+        return {name: (LaunchHistory._percentile(v, 50), LaunchHistory._percentile(v, 95), len(v))
+                for name, v in buckets.items()}
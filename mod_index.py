@@ -0,0 +1,297 @@
+import io
+import os
+import re
+import json
+import time
+import hashlib
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+ICON_SIZE = 64
+# Bumped when the extracted fields change, so older index entries are re-read
+INDEX_VERSION = 1
+
+
+def _read_json(zf, name):
+    # Mod metadata often contains raw newlines/tabs inside strings
+    return json.loads(zf.read(name).decode("utf-8", errors="replace"), strict=False)
+
+
+def _manifest_version(zf):
+    try:
+        manifest = zf.read("META-INF/MANIFEST.MF").decode("utf-8", errors="replace")
+    except KeyError:
+        return None
+    m = re.search(r"^Implementation-Version:\s*(.+)$", manifest, re.MULTILINE)
+    return m.group(1).strip() if m else None
+
+
+def _parse_toml(text):
+    if tomllib is not None:
+        try:
+            return tomllib.loads(text)
+        except Exception:
+            pass
+    # Minimal fallback: the first [[mods]] table's simple key = "value" lines
+    mods, current = [], None
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line == "[[mods]]":
+            current = {}
+            mods.append(current)
+        elif line.startswith("["):
+            current = None
+        elif current is not None and "=" in line:
+            key, _, value = line.partition("=")
+            current[key.strip()] = value.strip().strip("\"'")
+    return {"mods": mods}
+
+
+def _fabric(zf):
+    data = _read_json(zf, "fabric.mod.json")
+    icon = data.get("icon")
+    if isinstance(icon, dict) and icon:
+        # Sizes map to paths; take the smallest one we can scale down from
+        size = lambda k: int(k) if str(k).isdigit() else 0
+        icon = icon[min(icon, key=lambda k: (size(k) < ICON_SIZE, abs(size(k) - ICON_SIZE)))]
+    depends = data.get("depends") or {}
+    return {
+        "loader": "fabric",
+        "id": data.get("id"),
+        "name": data.get("name") or data.get("id"),
+        "version": data.get("version"),
+        "depends": sorted(d for d in depends if d not in ("minecraft", "java", "fabricloader")),
+        "icon_path": icon if isinstance(icon, str) else None,
+    }
+
+
+def _quilt(zf):
+    loader = _read_json(zf, "quilt.mod.json").get("quilt_loader", {})
+    meta = loader.get("metadata", {})
+    icon = meta.get("icon")
+    if isinstance(icon, dict) and icon:
+        icon = next(iter(icon.values()))
+    depends = []
+    for dep in loader.get("depends", []):
+        dep_id = dep if isinstance(dep, str) else dep.get("id")
+        if dep_id and dep_id not in ("minecraft", "java", "quilt_loader"):
+            depends.append(dep_id)
+    return {
+        "loader": "quilt",
+        "id": loader.get("id"),
+        "name": meta.get("name") or loader.get("id"),
+        "version": loader.get("version"),
+        "depends": sorted(set(depends)),
+        "icon_path": icon if isinstance(icon, str) else None,
+    }
+
+
+def _forge(zf, name):
+    data = _parse_toml(zf.read(name).decode("utf-8", errors="replace"))
+    mods = data.get("mods") or [{}]
+    mod = mods[0]
+    version = mod.get("version")
+    if not version or "${" in version:
+        version = _manifest_version(zf) or version
+    mod_id = mod.get("modId")
+    depends = []
+    deps = data.get("dependencies", {})
+    for dep in deps.get(mod_id, []) if isinstance(deps, dict) else []:
+        required = dep.get("mandatory", str(dep.get("type", "required")).lower() == "required")
+        dep_id = dep.get("modId")
+        if required is True and dep_id not in (None, "minecraft", "forge", "neoforge"):
+            depends.append(dep_id)
+    return {
+        "loader": "neoforge" if "neoforge" in name else "forge",
+        "id": mod_id,
+        "name": mod.get("displayName") or mod_id,
+        "version": version,
+        "depends": sorted(set(depends)),
+        "icon_path": mod.get("logoFile") or data.get("logoFile"),
+    }
+
+
+def _mcmod(zf):
+    data = _read_json(zf, "mcmod.info")
+    if isinstance(data, dict):
+        data = data.get("modList") or data.get("modlist") or []
+    mod = data[0] if data else {}
+    depends = [d.split("@", 1)[0] for d in mod.get("requiredMods", []) + mod.get("dependencies", [])
+               if isinstance(d, str)]
+    return {
+        "loader": "forge",
+        "id": mod.get("modid"),
+        "name": mod.get("name") or mod.get("modid"),
+        "version": mod.get("version"),
+        "depends": sorted(set(d for d in depends if d not in ("Forge", "forge", "minecraft"))),
+        "icon_path": mod.get("logoFile"),
+    }
+
+
+def read_jar_metadata(path):
+    """Mod id/name/version/dependencies from a jar, plus the icon's path inside it. None if unknown."""
+    with zipfile.ZipFile(path, "r") as zf:
+        names = set(zf.namelist())
+        if "fabric.mod.json" in names:
+            meta = _fabric(zf)
+        elif "quilt.mod.json" in names:
+            meta = _quilt(zf)
+        elif "META-INF/neoforge.mods.toml" in names:
+            meta = _forge(zf, "META-INF/neoforge.mods.toml")
+        elif "META-INF/mods.toml" in names:
+            meta = _forge(zf, "META-INF/mods.toml")
+        elif "mcmod.info" in names:
+            meta = _mcmod(zf)
+        else:
+            return None
+        icon_path = (meta.pop("icon_path") or "").lstrip("/")
+        meta["icon_bytes"] = zf.read(icon_path) if icon_path in names else None
+    return meta
+
+
+class ModIndex:
+    """
+    Metadata of the jars in mods folders, read once per file and cached by
+    (path, size, mtime) in a small JSON index. Icons are scaled down to
+    ICON_SIZE and stored as PNGs next to the index, so views never have to
+    reopen a jar to draw a card.
+    """
+    def __init__(self, index_file, icon_dir):
+        self.index_file = index_file
+        self.icon_dir = icon_dir
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == INDEX_VERSION:
+                self._entries = data.get("entries", {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to load mod index: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": INDEX_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+        tmp_path = f"{self.index_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.index_file)
+        except Exception as e:
+            print(f"Failed to save mod index: {e}")
+
+    def get(self, path):
+        """Cached metadata for `path` if the file hasn't changed since it was indexed (never opens the jar)."""
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            return entry["meta"]
+        return None
+
+    def _store_icon(self, key, data):
+        try:
+            img = Image.open(io.BytesIO(data)).convert("RGBA")
+            img.thumbnail((ICON_SIZE, ICON_SIZE), getattr(Image, "Resampling", Image).LANCZOS)
+            os.makedirs(self.icon_dir, exist_ok=True)
+            icon_file = os.path.join(self.icon_dir, f"{key}.png")
+            img.save(icon_file, "PNG")
+            return icon_file
+        except Exception:
+            return None
+
+    def index(self, path):
+        """Metadata for `path`, reading the jar only when it isn't cached."""
+        cached = self.get(path)
+        if cached is not None:
+            return cached
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        try:
+            meta = read_jar_metadata(path) or {}
+        except Exception as e:
+            print(f"Could not read mod metadata from {os.path.basename(path)}: {e}")
+            meta = {}
+        icon_bytes = meta.pop("icon_bytes", None)
+        key = hashlib.sha1(f"{path}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8")).hexdigest()
+        meta["icon"] = self._store_icon(key, icon_bytes) if icon_bytes else None
+        with self._lock:
+            old = self._entries.get(path)
+            self._entries[path] = {"size": st.st_size, "mtime": st.st_mtime_ns, "meta": meta}
+            self._dirty = True
+        if old and old["meta"].get("icon") and old["meta"]["icon"] != meta["icon"]:
+            try: os.remove(old["meta"]["icon"])
+            except OSError: pass
+        return meta
+
+    def forget_missing(self):
+        """Drop entries whose jar is gone, and icons no entry refers to any more."""
+        with self._lock:
+            gone = [p for p in self._entries if not os.path.exists(p)]
+            for p in gone:
+                del self._entries[p]
+            if gone:
+                self._dirty = True
+            in_use = {e["meta"].get("icon") for e in self._entries.values()}
+        try:
+            names = os.listdir(self.icon_dir)
+        except OSError:
+            names = []
+        now = time.time()
+        for name in names:
+            icon_file = os.path.join(self.icon_dir, name)
+            if icon_file in in_use:
+                continue
+            try:
+                # A concurrent index() writes the icon before its entry; leave fresh files alone
+                if now - os.path.getmtime(icon_file) > 60:
+                    os.remove(icon_file)
+            except OSError:
+                pass
+        return len(gone)
+
+    def missing(self, paths):
+        return [p for p in paths if self.get(p) is None]
+
+    def index_many(self, paths, workers=4, on_batch=None, batch_size=16):
+        """
+        Index every path not cached yet on a worker pool. `on_batch(done)` is
+        called with each finished batch of paths (from the worker thread).
+        """
+        todo = self.missing(paths)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for i in range(0, len(todo), batch_size):
+                batch = todo[i:i + batch_size]
+                list(pool.map(self._index_quietly, batch))
+                if on_batch:
+                    on_batch(batch)
+        self.save()
+        return len(todo)
+
+    def _index_quietly(self, path):
+        try:
+            self.index(path)
+        except OSError:
+            pass
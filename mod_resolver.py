@@ -0,0 +1,223 @@
+import json
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+MODRINTH_API = "https://api.modrinth.com/v2"
+# Keeps the ids=[...] query string well under common URL length limits
+BATCH_SIZE = 100
+# Hashes go in a POST body, so these batches can be much larger
+HASH_BATCH_SIZE = 1000
+
+
+class ResolveError(Exception):
+    """A required mod or dependency has no usable version; retrying won't help."""
+
+
+class ResolvedMod:
+    def __init__(self, project, version, required_by=None):
+        self.project = project
+        self.version = version
+        self.required_by = required_by
+
+    @property
+    def project_id(self):
+        return self.project["id"]
+
+    @property
+    def slug(self):
+        return self.project.get("slug") or self.project["id"]
+
+    @property
+    def title(self):
+        return self.project.get("title") or self.slug
+
+    def primary_file(self):
+        files = self.version.get("files", [])
+        if not files:
+            return None
+        return next((f for f in files if f.get("primary", False)), files[0])
+
+
+class ModResolver:
+    """
+    Resolves a Modrinth project plus its required dependencies (transitively)
+    for one loader / game version.
+
+    Dependencies pinned to a version id are fetched in one `/versions?ids=`
+    call per level and project metadata in one `/projects?ids=` call; only
+    projects without a pinned version need their own compatible-version lookup,
+    and those run in parallel. Every lookup is memoized for the session.
+    """
+    def __init__(self, http, workers=6):
+        self.http = http
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._projects: dict[str, dict] = {}      # id and slug -> project
+        self._versions: dict[str, dict] = {}      # version id -> version
+        self._compatible: dict[tuple, dict] = {}  # (project id/slug, loader, game version) -> version or {}
+        self._by_hash: dict[str, str] = {}         # sha512 -> project id, or "" if Modrinth doesn't know the file
+        self.requests = 0
+
+    # --- HTTP ---
+    def _get_json(self, path, params=None):
+        url = f"{MODRINTH_API}{path}"
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        with self._lock:
+            self.requests += 1
+        r = self.http.get(url, timeout=10)
+        if r.status_code == 404:
+            return None
+        if r.status_code != 200:
+            raise Exception(f"Modrinth request failed ({r.status_code}): {path}")
+        return r.json()
+
+    def _batch(self, path, ids):
+        out = []
+        ids = list(ids)
+        for i in range(0, len(ids), BATCH_SIZE):
+            chunk = ids[i:i + BATCH_SIZE]
+            out.extend(self._get_json(path, {"ids": json.dumps(chunk)}) or [])
+        return out
+
+    # --- Memoized lookups ---
+    def projects(self, ids):
+        """Projects by id or slug (unknown ids are left out)."""
+        with self._lock:
+            missing = [i for i in dict.fromkeys(ids) if i not in self._projects]
+        if missing:
+            for project in self._batch("/projects", missing):
+                with self._lock:
+                    self._projects[project["id"]] = project
+                    if project.get("slug"):
+                        self._projects[project["slug"]] = project
+        with self._lock:
+            return {i: self._projects[i] for i in ids if i in self._projects}
+
+    def versions(self, ids):
+        with self._lock:
+            missing = [i for i in dict.fromkeys(ids) if i not in self._versions]
+        if missing:
+            for version in self._batch("/versions", missing):
+                with self._lock:
+                    self._versions[version["id"]] = version
+        with self._lock:
+            return {i: self._versions[i] for i in ids if i in self._versions}
+
+    def compatible_version(self, project, loader, game_version):
+        """Newest version of `project` (id or slug) for the loader and game version, or None."""
+        key = (project, loader, game_version)
+        with self._lock:
+            if key in self._compatible:
+                return self._compatible[key] or None
+        found = self._get_json(f"/project/{urllib.parse.quote(project)}/version", {
+            "loaders": json.dumps([loader]),
+            "game_versions": json.dumps([game_version]),
+        })
+        best = found[0] if found else None
+        with self._lock:
+            self._compatible[key] = best or {}
+            if best:
+                self._versions[best["id"]] = best
+        return best
+
+    def projects_for_hashes(self, sha512s):
+        """Project ids of the files with these sha512 hashes (one `/version_files` call for the unknown ones)."""
+        with self._lock:
+            missing = [h for h in dict.fromkeys(sha512s) if h not in self._by_hash]
+        for i in range(0, len(missing), HASH_BATCH_SIZE):
+            chunk = missing[i:i + HASH_BATCH_SIZE]
+            with self._lock:
+                self.requests += 1
+            r = self.http.post(f"{MODRINTH_API}/version_files", json={"hashes": chunk, "algorithm": "sha512"})
+            if r.status_code != 200:
+                raise Exception(f"Modrinth request failed ({r.status_code}): /version_files")
+            found = r.json()
+            with self._lock:
+                for h in chunk:
+                    version = found.get(h)
+                    self._by_hash[h] = version["project_id"] if version else ""
+                    if version:
+                        self._versions[version["id"]] = version
+        with self._lock:
+            return {self._by_hash[h] for h in sha512s if self._by_hash.get(h)}
+
+    @staticmethod
+    def _fits(version, loader, game_version):
+        return loader in version.get("loaders", []) and game_version in version.get("game_versions", [])
+
+    # --- Resolution ---
+    def resolve(self, project, loader, game_version, installed=()):
+        """
+        `project` plus every required dependency not already in `installed`
+        (project ids or slugs). Returns ResolvedMods, the requested project first.
+        """
+        installed = set(installed)
+        root_version = self.compatible_version(project, loader, game_version)
+        if root_version is None:
+            raise ResolveError("No compatible version found for this modpack.")
+        root_project = self.projects([root_version["project_id"]]).get(root_version["project_id"])
+        if root_project is None:
+            root_project = {"id": root_version["project_id"], "slug": project, "title": project}
+
+        closure = {root_project["id"]: ResolvedMod(root_project, root_version)}
+        level = [closure[root_project["id"]]]
+        while level:
+            # Required dependencies of this level that aren't resolved yet
+            pinned, unpinned = {}, {}
+            for mod in level:
+                for dep in mod.version.get("dependencies", []):
+                    if dep.get("dependency_type") != "required":
+                        continue
+                    if dep.get("version_id"):
+                        pinned.setdefault(dep["version_id"], (mod, dep.get("project_id")))
+                    elif dep.get("project_id"):
+                        unpinned.setdefault(dep["project_id"], mod)
+
+            dep_versions = self.versions(pinned)
+            # Pinned versions built for another loader/game version are looked up again by project
+            for version_id, (parent, project_id) in pinned.items():
+                version = dep_versions.get(version_id)
+                if version is None or not self._fits(version, loader, game_version):
+                    project_id = version["project_id"] if version else project_id
+                    if project_id:
+                        unpinned.setdefault(project_id, parent)
+                    continue
+                unpinned.pop(version["project_id"], None)
+
+            wanted = {v["project_id"] for v in dep_versions.values()} | set(unpinned)
+            projects = self.projects(wanted - set(closure))
+
+            def skip(project_id):
+                p = projects.get(project_id, {})
+                return project_id in closure or project_id in installed or p.get("slug") in installed
+
+            next_level = []
+            for version_id, (parent, _) in pinned.items():
+                version = dep_versions.get(version_id)
+                if version is None or not self._fits(version, loader, game_version):
+                    continue
+                pid = version["project_id"]
+                if skip(pid):
+                    continue
+                closure[pid] = ResolvedMod(projects.get(pid, {"id": pid}), version, parent.title)
+                next_level.append(closure[pid])
+
+            lookups = [pid for pid in unpinned if not skip(pid)]
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(lookups) or 1))) as pool:
+                found = dict(zip(lookups, pool.map(
+                    lambda pid: self.compatible_version(pid, loader, game_version), lookups)))
+            for pid in lookups:
+                parent = unpinned[pid]
+                name = projects.get(pid, {}).get("title", pid)
+                if found[pid] is None:
+                    raise ResolveError(f"'{parent.title}' requires '{name}', which has no version "
+                                       f"for {loader} {game_version}.")
+                if pid in closure:
+                    continue
+                closure[pid] = ResolvedMod(projects.get(pid, {"id": pid}), found[pid], parent.title)
+                next_level.append(closure[pid])
+            level = next_level
+
+        return list(closure.values())
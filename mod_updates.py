@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MODRINTH_API = "https://api.modrinth.com/v2"
+HASH_CHUNK = 1024 * 1024
+# Hashes per version_files/update request; a pack fits in one request in practice
+UPDATE_BATCH = 1000
+
+
+class FileHashCache:
+    """
+    sha512/sha1 of local files, remembered by (path, size, mtime) and persisted
+    to JSON so rechecking an unchanged mods folder needs no hashing at all.
+    """
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to load file hash cache: {e}")
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = dict(self._entries)
+            self._dirty = False
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"Failed to save file hash cache: {e}")
+
+    def hashes(self, path):
+        """`{"sha512": ..., "sha1": ...}` for `path`, hashing only when it changed."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime_ns:
+                self.hits += 1
+                return {"sha512": entry["sha512"], "sha1": entry["sha1"]}
+            self.misses += 1
+        sha512, sha1 = hashlib.sha512(), hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                sha512.update(chunk)
+                sha1.update(chunk)
+        result = {"sha512": sha512.hexdigest(), "sha1": sha1.hexdigest()}
+        with self._lock:
+            self._entries[path] = {"size": st.st_size, "mtime": st.st_mtime_ns, **result}
+            self._dirty = True
+        return result
+
+    def hash_many(self, paths, workers=4):
+        """Hash files on a worker pool; unreadable files are left out."""
+        def one(path):
+            try:
+                return path, self.hashes(path)
+            except OSError as e:
+                print(f"Could not hash {os.path.basename(path)}: {e}")
+                return path, None
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = dict(r for r in pool.map(one, paths) if r[1])
+        self.save()
+        return results
+
+
+class ModUpdate:
+    def __init__(self, path, version, file):
+        self.path = path
+        self.version = version
+        self.file = file
+
+    @property
+    def filename(self):
+        return os.path.basename(self.path)
+
+    def to_record(self):
+        """JSON-safe description used as a download task payload."""
+        return {
+            "old_filename": self.filename,
+            "filename": os.path.basename(self.file["filename"]),
+            "url": self.file["url"],
+            "hashes": self.file.get("hashes", {}),
+            "size": self.file.get("size"),
+            "version_id": self.version["id"],
+            "project_id": self.version.get("project_id"),
+            "version_number": self.version.get("version_number", ""),
+        }
+
+
+def find_updates(http, file_hashes, loader, game_version):
+    """
+    Ask Modrinth for the newest compatible version of every file in one batched
+    `version_files/update` request. `file_hashes` maps path -> hashes.
+    Returns ModUpdates for files whose current hash isn't the newest version.
+    """
+    by_hash = {h["sha512"]: path for path, h in file_hashes.items()}
+    hashes = list(by_hash)
+    updates = []
+    for i in range(0, len(hashes), UPDATE_BATCH):
+        chunk = hashes[i:i + UPDATE_BATCH]
+        r = http.post(f"{MODRINTH_API}/version_files/update", json={
+            "hashes": chunk,
+            "algorithm": "sha512",
+            "loaders": [loader],
+            "game_versions": [game_version],
+        })
+        if r.status_code != 200:
+            raise Exception(f"Update check failed ({r.status_code})")
+        for current, version in r.json().items():
+            files = version.get("files", [])
+            if not files or any(f.get("hashes", {}).get("sha512") == current for f in files):
+                continue
+            primary = next((f for f in files if f.get("primary", False)), files[0])
+            updates.append(ModUpdate(by_hash[current], version, primary))
+    return sorted(updates, key=lambda u: u.filename.lower())
@@ -0,0 +1,103 @@
+import os
+import json
+import shutil
+import zipfile
+
+from downloads import DownloadCancelled
+
+INDEX_NAME = "modrinth.index.json"
+# Applied in this order, so client-overrides win over overrides
+OVERRIDE_PREFIXES = ("overrides/", "client-overrides/")
+COPY_BUFFER = 1024 * 1024
+
+
+class InvalidPack(Exception):
+    pass
+
+
+def safe_target(root, rel_path):
+    """Absolute path of `rel_path` inside `root`, or None if it would escape it."""
+    rel_path = rel_path.replace("\\", "/")
+    if not rel_path or rel_path.startswith("/") or os.path.isabs(rel_path):
+        return None
+    root = os.path.abspath(root)
+    dest = os.path.abspath(os.path.join(root, rel_path))
+    return dest if dest.startswith(root + os.sep) else None
+
+
+def read_index(archive_path):
+    """Read `modrinth.index.json` straight from the archive (nothing is extracted)."""
+    try:
+        with zipfile.ZipFile(archive_path, "r") as zf:
+            try:
+                raw = zf.read(INDEX_NAME)
+            except KeyError:
+                raise InvalidPack("Invalid mrpack: No index.json")
+    except zipfile.BadZipFile as e:
+        raise InvalidPack(f"Invalid mrpack: {e}")
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except ValueError as e:
+        raise InvalidPack(f"Invalid mrpack: bad index.json ({e})")
+
+
+def override_entries(zf, pack_dir, client=True):
+    """
+    `(zip member, destination)` pairs for the override folders, in the order
+    they must be applied. Directory entries are skipped; unsafe paths raise.
+    """
+    prefixes = OVERRIDE_PREFIXES if client else OVERRIDE_PREFIXES[:1]
+    members = zf.infolist()
+    out = []
+    for prefix in prefixes:
+        for info in members:
+            if info.is_dir() or not info.filename.startswith(prefix):
+                continue
+            rel = info.filename[len(prefix):]
+            if not rel:
+                continue
+            dest = safe_target(pack_dir, rel)
+            if dest is None:
+                raise InvalidPack(f"Invalid mrpack: unsafe path {info.filename}")
+            out.append((info, dest))
+    return out
+
+
+def extract_overrides(archive_path, pack_dir, skip=(), only=None, should_cancel=None):
+    """
+    Stream the override folders from the archive into `pack_dir`, one entry at
+    a time. Destinations in `skip` are left out and, when `only` is given, just
+    those destinations are written (callers use this to apply overrides that
+    collide with downloaded files after the downloads, so the two don't race).
+    Returns `(files, bytes)` written.
+    """
+    skip = set(skip)
+    files = written = 0
+    with zipfile.ZipFile(archive_path, "r") as zf:
+        for info, dest in override_entries(zf, pack_dir):
+            if dest in skip or (only is not None and dest not in only):
+                continue
+            if should_cancel and should_cancel():
+                raise DownloadCancelled()
+            copy_member(zf, info, dest)
+            files += 1
+            written += info.file_size
+    return files, written
+
+
+def copy_member(zf, info, dest):
+    """
+    Write a member to `dest` through a temp file and swap it in, so a file that
+    is hardlinked elsewhere (e.g. a jar from the object store) is replaced, not
+    rewritten in place.
+    """
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = f"{dest}.tmp"
+    try:
+        with zf.open(info, "r") as src, open(tmp_path, "wb") as out:
+            shutil.copyfileobj(src, out, COPY_BUFFER)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
@@ -0,0 +1,150 @@
+import os
+import time
+import shutil
+import threading
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+
+class ObjectStore:
+    """
+    Content-addressed file cache keyed by sha512 (`<root>/<sha[:2]>/<sha>`).
+    Verified downloads are added once and hardlinked (or copied, when the
+    filesystem can't link) into every pack that uses them.
+
+    An object whose link count is 1 is no longer used by any pack, so it can be
+    evicted. Eviction removes those objects least-recently-used first (by atime,
+    which `materialize` refreshes) until the store fits the size budget.
+    """
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _valid_key(sha512):
+        return bool(sha512) and len(sha512) == 128 and all(c in "0123456789abcdef" for c in sha512.lower())
+
+    def path_for(self, sha512):
+        sha512 = sha512.lower()
+        return os.path.join(self.root, sha512[:2], sha512)
+
+    def has(self, sha512):
+        return self._valid_key(sha512) and os.path.isfile(self.path_for(sha512))
+
+    @staticmethod
+    def _link(src, dest):
+        """Hardlink src to dest (atomically replacing dest); copy if linking isn't possible."""
+        tmp = f"{dest}.link"
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copy2(src, tmp)
+            os.replace(tmp, dest)
+        finally:
+            if os.path.exists(tmp):
+                try: os.remove(tmp)
+                except OSError: pass
+
+    def materialize(self, sha512, dest):
+        """Place the cached object at `dest`. Returns False on a cache miss."""
+        if not self.has(sha512):
+            with self._lock:
+                self.misses += 1
+            return False
+        src = self.path_for(sha512)
+        try:
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            if not (os.path.exists(dest) and os.path.samefile(src, dest)):
+                self._link(src, dest)
+            st = os.stat(src)
+            os.utime(src, (time.time(), st.st_mtime))
+        except OSError as e:
+            print(f"Object cache: could not use {sha512[:12]}: {e}")
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += st.st_size
+        return True
+
+    def adopt(self, path, sha512):
+        """Add an already verified file to the store (links it, the file stays where it is)."""
+        if not self._valid_key(sha512) or not os.path.isfile(path):
+            return False
+        target = self.path_for(sha512)
+        try:
+            if os.path.isfile(target):
+                # Already cached: share the cached inode instead of keeping two copies
+                if not os.path.samefile(target, path):
+                    self._link(target, path)
+                return True
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self._link(path, target)
+            return True
+        except OSError as e:
+            print(f"Object cache: could not store {os.path.basename(path)}: {e}")
+            return False
+
+    def _objects(self):
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            sub = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(sub):
+                continue
+            for name in os.listdir(sub):
+                if not self._valid_key(name):
+                    continue
+                path = os.path.join(sub, name)
+                try:
+                    yield path, os.stat(path)
+                except OSError:
+                    continue
+
+    def stats(self):
+        objects = referenced = total = unreferenced_bytes = 0
+        for _, st in self._objects():
+            objects += 1
+            total += st.st_size
+            if st.st_nlink > 1:
+                referenced += 1
+            else:
+                unreferenced_bytes += st.st_size
+        with self._lock:
+            return {
+                "objects": objects,
+                "bytes": total,
+                "referenced": referenced,
+                "unreferenced_bytes": unreferenced_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def evict(self, max_bytes=None):
+        """Drop unreferenced objects, oldest access first, until the store fits `max_bytes`."""
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = list(self._objects())
+        total = sum(st.st_size for _, st in entries)
+        removed = freed = 0
+        candidates = sorted((e for e in entries if e[1].st_nlink <= 1), key=lambda e: e[1].st_atime)
+        for path, st in candidates:
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= st.st_size
+            freed += st.st_size
+            removed += 1
+        return removed, freed